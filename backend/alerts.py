@@ -1,68 +1,72 @@
 # backend/alerts.py
+import time
 import logging
 from telegram import Update
-from db.internal_database import SessionLocal  # Internal DB for operational data
-from models.group import Group            # Internal group model
-from models.call_subscription import CallAlertSubscription  # Internal alert subscriptions
-from models.call_log import CallLog        # Internal call logs
-from datetime import datetime
-from backend.call_service import broadcast_conference_call
+from backend.call_queue import call_queue
+from backend.subscription_index import subscription_index
+from backend.escalation import escalation_engine
+from backend.coalescer import SignalCoalescer
+from utils.metrics import Counter, Histogram, timed
 
 logger = logging.getLogger(__name__)
 
+RECIPIENT_LOOKUP_SECONDS = Histogram(
+    "signal_recipient_lookup_seconds", "Time to resolve a group's recipients, by source.", ["source"]
+)
+SIGNAL_OUTCOMES = Counter("signal_coalescer_outcomes_total", "Detected signals by coalescer outcome.", ["outcome"])
+SIGNAL_QUEUE_WAIT_SECONDS = Histogram("signal_queue_wait_seconds", "Time from queuing an alert to a worker starting it.")
+SIGNAL_DELIVERY_SECONDS = Histogram("signal_delivery_seconds", "Time for deliver_signal to resolve recipients and run the first delivery step.")
+
 async def process_signal(update: Update):
     """
-    Processes an alert signal (e.g., a message in a group) by looking up the group
-    and active alert subscriptions (from the internal DB) and initiating a conference call.
+    Hands an alert signal (e.g., a message in a group) to the per-group coalescer,
+    which merges bursts of messages before they are queued for delivery.
+    """
+    message = update.message
+    outcome = await signal_coalescer.submit(str(message.chat.id), message.chat.title or "Unknown", message.text)
+    SIGNAL_OUTCOMES.inc(outcome=outcome)
+    logger.info("Alert signal for group %s %s", message.chat.id, outcome)
+
+async def enqueue_signal(chat_id: str, chat_title: str, message_text: str):
+    """
+    Queues a (possibly merged) alert for delivery by the call workers, so the
+    Telegram update handler returns without waiting on the DB or Twilio.
     """
-    message_text = update.message.text
-    chat_id = str(update.message.chat.id)
-    chat_title = update.message.chat.title or "Unknown"
+    job_id = await call_queue.enqueue("signal", {
+        "chat_id": chat_id,
+        "chat_title": chat_title,
+        "message_text": message_text,
+        "queued_at": time.time(),
+    })
+    logger.info("Queued alert signal for group %s as job %s", chat_id, job_id)
 
-    logger.info("Processing alert signal for group %s (%s): %s", chat_id, chat_title, message_text)
-    db = SessionLocal()
+signal_coalescer = SignalCoalescer(enqueue_signal, call_queue)
 
-    # Retrieve or create the internal group record.
-    group = db.query(Group).filter(Group.telegram_group_id == chat_id).first()
-    if not group:
-        group = Group(telegram_group_id=chat_id, name=chat_title)
-        db.add(group)
-        db.commit()
-        logger.info("Created internal group record for %s", chat_title)
+@timed(SIGNAL_DELIVERY_SECONDS)
+async def deliver_signal(chat_id: str, chat_title: str, message_text: str, queued_at: float = None):
+    """
+    Delivers a queued alert signal by resolving the group's active recipients
+    from the subscription index and starting the escalation ladder for them.
+    """
+    logger.debug("Processing alert signal for group %s (%s)", chat_id, chat_title)
 
-    # Fetch active alert subscriptions for the group.
-    subscriptions = db.query(CallAlertSubscription).filter(
-        CallAlertSubscription.group_id == group.id,
-        CallAlertSubscription.active == True
-    ).all()
-    logger.info("Found %d active alert subscriptions for group %s", len(subscriptions), chat_title)
+    if queued_at is not None:
+        SIGNAL_QUEUE_WAIT_SECONDS.observe(time.time() - queued_at)
 
-    # Collect phone numbers from subscriptions that are within the allowed call window.
-    phone_numbers = []
-    valid_subscriptions = []
-    for subscription in subscriptions:
-        now = datetime.utcnow().time()
-        start_time = datetime.strptime(subscription.call_window_start, "%H:%M").time()
-        end_time = datetime.strptime(subscription.call_window_end, "%H:%M").time()
-        if start_time <= now <= end_time:
-            # Assume subscription.user is set up via relationship, or adjust to directly use phone_number.
-            phone_numbers.append(subscription.user.phone_number)
-            valid_subscriptions.append(subscription)
-        else:
-            logger.info("Subscription ID %s is outside its call window.", subscription.id)
+    # Recipients come from the in-memory index; the DB is only hit on a miss.
+    with RECIPIENT_LOOKUP_SECONDS.time(source="index"):
+        group = subscription_index.get(chat_id)
+    if group is None:
+        with RECIPIENT_LOOKUP_SECONDS.time(source="db"):
+            group = await subscription_index.load_group(chat_id, chat_title)
 
-    if phone_numbers:
-        call_message = f"New signal from {group.name}: {message_text}"
-        # Initiate the conference call broadcast.
-        call_sids = broadcast_conference_call(phone_numbers, conference_room=group.name, wait_url=None, message=call_message)
-        for subscription in valid_subscriptions:
-            number = subscription.user.phone_number
-            call_sid = call_sids.get(number)
-            logger.info("Conference call initiated for %s with SID: %s", number, call_sid)
-            call_log = CallLog(subscription_id=subscription.id, status="initiated", details=call_sid or "failed")
-            db.add(call_log)
-            db.commit()
+    # Keep only recipients whose call window contains the current time in their timezone.
+    recipients = group.eligible_recipients()
+
+    if recipients:
+        # Telegram first, then SMS, then a call, each only for recipients who have not acknowledged.
+        reached = await escalation_engine.deliver(chat_id, group.name, message_text, recipients)
+        logger.info("Alerted %d of %d recipients for group %s by %s (%d subscriptions outside their call window).",
+                    reached, len(recipients), chat_id, escalation_engine.ladder[0], len(group.recipients) - len(recipients))
     else:
         logger.info("No active alert subscriptions for group %s", chat_title)
-
-    db.close()
@@ -0,0 +1,240 @@
+# backend/analytics.py
+import os
+import sys
+import asyncio
+import logging
+import argparse
+from itertools import takewhile
+from collections import Counter
+from datetime import datetime, timedelta
+from sqlalchemy import select, text, tuple_
+from db.internal_database import engine, get_session
+from models.call_event import CallEvent
+from models.call_rollup import CallRollupHourly, CallRollupState
+
+logger = logging.getLogger(__name__)
+
+ANALYTICS_ENABLED = os.getenv("ANALYTICS_ENABLED", "true").lower() == "true"
+ANALYTICS_ROLLUP_INTERVAL_SECONDS = int(os.getenv("ANALYTICS_ROLLUP_INTERVAL_SECONDS", "300"))
+ANALYTICS_ROLLUP_BATCH_SIZE = int(os.getenv("ANALYTICS_ROLLUP_BATCH_SIZE", "20000"))
+# Events younger than this are left for the next run, so rows still being committed are not skipped.
+ANALYTICS_ROLLUP_LAG_SECONDS = int(os.getenv("ANALYTICS_ROLLUP_LAG_SECONDS", "60"))
+# Daily call_events partitions are created this far ahead and dropped after the retention period (Postgres only).
+ANALYTICS_PARTITION_DAYS_AHEAD = int(os.getenv("ANALYTICS_PARTITION_DAYS_AHEAD", "7"))
+ANALYTICS_RETENTION_DAYS = int(os.getenv("ANALYTICS_RETENTION_DAYS", "90"))
+ANALYTICS_EXPORT_CHUNK_SIZE = int(os.getenv("ANALYTICS_EXPORT_CHUNK_SIZE", "50000"))
+
+# call_events.event -> call_rollups_hourly column
+EVENT_COLUMNS = {
+    "dialed": "dials",
+    "retry": "retries",
+    "rejected": "rejected",
+    "suppressed": "suppressed",
+    "in-progress": "answered",
+    "answered": "answered",
+    "completed": "completed",
+    "busy": "busy",
+    "no-answer": "no_answer",
+    "failed": "failed",
+    "canceled": "canceled",
+    "sms": "sms",
+}
+ROLLUP_COLUMNS = tuple(dict.fromkeys(EVENT_COLUMNS.values())) + ("duration_seconds",)
+_PARTITION_PREFIX = "call_events_p"
+
+
+def _hour(timestamp):
+    return timestamp.replace(minute=0, second=0, microsecond=0)
+
+
+async def refresh_rollups(batch_size=ANALYTICS_ROLLUP_BATCH_SIZE, lag=ANALYTICS_ROLLUP_LAG_SECONDS):
+    """
+    Folds call_events recorded since the last run into call_rollups_hourly, one
+    batch per transaction. Only one process rolls up at a time; the others skip.
+    Returns the number of events read.
+    """
+    cutoff = datetime.utcnow() - timedelta(seconds=lag)
+    total = 0
+    while True:
+        async with get_session() as session:
+            state = (await session.execute(
+                select(CallRollupState).where(CallRollupState.name == "hourly").with_for_update(skip_locked=True)
+            )).scalars().first()
+            if state is None:
+                return total
+            batch = (await session.execute(
+                select(CallEvent.id, CallEvent.group_id, CallEvent.occurred_at, CallEvent.event, CallEvent.duration_seconds)
+                .where(CallEvent.id > state.last_event_id)
+                .order_by(CallEvent.id)
+                .limit(batch_size)
+            )).all()
+            # occurred_at is stamped when an event is buffered but the id at insert, so a young event can sit
+            # below an old one; the watermark stops at the first event still inside the lag window.
+            events = list(takewhile(lambda event: event.occurred_at < cutoff, batch))
+            if not events:
+                return total
+
+            deltas = {}
+            for event in events:
+                column = EVENT_COLUMNS.get(event.event)
+                if column is None or event.group_id is None:
+                    continue
+                delta = deltas.setdefault((event.group_id, _hour(event.occurred_at)), Counter())
+                delta[column] += 1
+                if event.event == "completed" and event.duration_seconds:
+                    delta["duration_seconds"] += event.duration_seconds
+            if deltas:
+                existing = {
+                    (row.group_id, row.hour): row
+                    for row in (await session.execute(
+                        select(CallRollupHourly).where(tuple_(CallRollupHourly.group_id, CallRollupHourly.hour).in_(list(deltas)))
+                    )).scalars()
+                }
+                for (group_id, hour), delta in deltas.items():
+                    row = existing.get((group_id, hour))
+                    if row is None:
+                        row = CallRollupHourly(group_id=group_id, hour=hour, **{column: 0 for column in ROLLUP_COLUMNS})
+                        session.add(row)
+                    for column, count in delta.items():
+                        setattr(row, column, getattr(row, column) + count)
+            state.last_event_id = events[-1].id
+            await session.commit()
+        total += len(events)
+        if len(batch) < batch_size or len(events) < len(batch):
+            return total
+
+
+async def hourly_rollups(group_id, since, until=None):
+    """
+    The group's rollup rows from `since` (inclusive) to `until`, oldest first, as dicts.
+    """
+    stmt = select(CallRollupHourly).where(CallRollupHourly.group_id == str(group_id), CallRollupHourly.hour >= _hour(since))
+    if until is not None:
+        stmt = stmt.where(CallRollupHourly.hour < until)
+    async with get_session() as session:
+        rows = (await session.execute(stmt.order_by(CallRollupHourly.hour))).scalars().all()
+    return [{"hour": row.hour.isoformat(), **{column: getattr(row, column) for column in ROLLUP_COLUMNS}} for row in rows]
+
+
+def summarize(rows):
+    """
+    Totals over rollup rows plus the answer rate and mean answered-call duration.
+    """
+    totals = {column: sum(row[column] for row in rows) for column in ROLLUP_COLUMNS}
+    placed = totals["dials"] + totals["retries"]
+    totals["answer_rate"] = totals["answered"] / placed if placed else None
+    totals["mean_duration_seconds"] = totals["duration_seconds"] / totals["completed"] if totals["completed"] else None
+    return totals
+
+
+async def ensure_partitions(days_ahead=ANALYTICS_PARTITION_DAYS_AHEAD, retention_days=ANALYTICS_RETENTION_DAYS):
+    """
+    Creates the coming days' call_events partitions and drops those past retention.
+    Does nothing on databases without table partitioning.
+    """
+    if engine.dialect.name != "postgresql":
+        return
+    today = datetime.utcnow().date()
+    async with get_session() as session:
+        for offset in range(days_ahead + 1):
+            day = today + timedelta(days=offset)
+            await session.execute(text(
+                f"CREATE TABLE IF NOT EXISTS {_PARTITION_PREFIX}{day:%Y%m%d} PARTITION OF call_events "
+                f"FOR VALUES FROM ('{day}') TO ('{day + timedelta(days=1)}')"
+            ))
+        partitions = (await session.execute(text(
+            "SELECT c.relname FROM pg_inherits i "
+            "JOIN pg_class c ON c.oid = i.inhrelid JOIN pg_class p ON p.oid = i.inhparent "
+            "WHERE p.relname = 'call_events'"
+        ))).scalars().all()
+        oldest = f"{_PARTITION_PREFIX}{today - timedelta(days=retention_days):%Y%m%d}"
+        expired = sorted(name for name in partitions if name.startswith(_PARTITION_PREFIX) and name < oldest)
+        for name in expired:
+            await session.execute(text(f"DROP TABLE {name}"))
+        await session.commit()
+    if expired:
+        logger.info("Dropped %d call_events partitions older than %d days.", len(expired), retention_days)
+
+
+async def run_analytics_maintenance():
+    try:
+        await ensure_partitions()
+    except Exception as e:
+        logger.exception("Call events partition maintenance failed: %s", e)
+    try:
+        count = await refresh_rollups()
+    except Exception as e:
+        logger.exception("Call analytics rollup failed: %s", e)
+        return
+    if count:
+        logger.info("Rolled up %d call events.", count)
+
+
+def build_analytics_scheduler():
+    from apscheduler.schedulers.asyncio import AsyncIOScheduler
+    scheduler = AsyncIOScheduler(timezone="UTC")
+    scheduler.add_job(
+        run_analytics_maintenance,
+        "interval",
+        seconds=ANALYTICS_ROLLUP_INTERVAL_SECONDS,
+        id="call_analytics_rollup",
+        max_instances=1,
+        coalesce=True,
+        next_run_time=datetime.utcnow(),
+    )
+    return scheduler
+
+
+def export_call_events(out, since=None, until=None, group_id=None, chunksize=ANALYTICS_EXPORT_CHUNK_SIZE):
+    """
+    Writes call_events as CSV to `out` (a path or file object) one chunk at a
+    time, with a server-side cursor, so memory use is bounded by `chunksize`
+    rows however large the table is. Returns the number of rows written.
+    """
+    import pandas as pd
+    stmt = select(*CallEvent.__table__.columns).order_by(CallEvent.id)
+    if since is not None:
+        stmt = stmt.where(CallEvent.occurred_at >= since)
+    if until is not None:
+        stmt = stmt.where(CallEvent.occurred_at < until)
+    if group_id is not None:
+        stmt = stmt.where(CallEvent.group_id == str(group_id))
+    written = 0
+    # Rows are fetched in chunks and framed by hand: pandas.read_sql needs SQLAlchemy 2 for engine support.
+    with engine.connect().execution_options(stream_results=True) as conn:
+        result = conn.execute(stmt)
+        columns = list(result.keys())
+        while rows := result.fetchmany(chunksize):
+            chunk = pd.DataFrame.from_records(rows, columns=columns)
+            chunk.to_csv(out, mode="a" if written else "w", header=not written, index=False)
+            written += len(chunk)
+    return written
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Call analytics maintenance and export.")
+    commands = parser.add_subparsers(dest="command", required=True)
+    commands.add_parser("rollup", help="Create partitions and fold new call events into the hourly rollups.")
+    export = commands.add_parser("export", help="Stream call events to CSV.")
+    export.add_argument("--out", default="-", help="Output path; '-' for stdout.")
+    export.add_argument("--since", type=datetime.fromisoformat)
+    export.add_argument("--until", type=datetime.fromisoformat)
+    export.add_argument("--group-id")
+    export.add_argument("--chunksize", type=int, default=ANALYTICS_EXPORT_CHUNK_SIZE)
+    args = parser.parse_args()
+
+    if args.command == "rollup":
+        asyncio.run(run_analytics_maintenance())
+    else:
+        out = sys.stdout if args.out == "-" else args.out
+        count = export_call_events(out, args.since, args.until, args.group_id, args.chunksize)
+        logger.info("Exported %d call events.", count)
+
+
+if __name__ == "__main__":
+    # python -m backend.analytics rollup | export --since 2026-10-01 --out events.csv
+    from dotenv import load_dotenv
+    load_dotenv()
+    from utils.logging_config import configure_logging
+    configure_logging()
+    main()
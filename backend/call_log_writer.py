@@ -0,0 +1,123 @@
+# backend/call_log_writer.py
+import os
+import logging
+import threading
+from datetime import datetime
+from sqlalchemy import insert
+from db.internal_database import engine
+from models.call_log import CallLog
+from models.call_event import CallEvent
+
+logger = logging.getLogger(__name__)
+
+# Flush once this many entries are buffered, or after the interval, whichever comes first.
+CALL_LOG_FLUSH_SIZE = int(os.getenv("CALL_LOG_FLUSH_SIZE", "500"))
+CALL_LOG_FLUSH_INTERVAL = float(os.getenv("CALL_LOG_FLUSH_INTERVAL", "1.0"))
+# Entries kept in memory while the database is unreachable; the oldest are dropped beyond this.
+CALL_LOG_MAX_BUFFER = int(os.getenv("CALL_LOG_MAX_BUFFER", "50000"))
+
+
+class CallLogWriter:
+    """
+    Buffers CallLog and CallEvent rows and writes them with one executemany
+    INSERT per table per flush from a background thread, so neither the bot
+    loop nor the webhook loop ever waits on a call-log transaction.
+    """
+
+    def __init__(self, flush_size=CALL_LOG_FLUSH_SIZE, flush_interval=CALL_LOG_FLUSH_INTERVAL):
+        self.flush_size = flush_size
+        self.flush_interval = flush_interval
+        self._buffer = []
+        self._events = []
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stopping = threading.Event()
+        self._thread = None
+
+    def record(self, subscription_id, status, details):
+        with self._lock:
+            self._buffer.append({
+                "subscription_id": subscription_id,
+                "status": status,
+                "details": details,
+                "timestamp": datetime.utcnow(),
+            })
+            full = len(self._buffer) >= self.flush_size
+        if full:
+            self._wake.set()
+
+    def record_event(self, event, group_id=None, subscription_id=None, call_sid=None, retry_count=0, duration_seconds=None,
+                     caller_id=None):
+        """
+        Buffers one CallEvent for the analytics rollups (see backend/analytics.py).
+        """
+        with self._lock:
+            self._events.append({
+                "occurred_at": datetime.utcnow(),
+                "group_id": group_id,
+                "subscription_id": subscription_id,
+                "call_sid": call_sid,
+                "event": event,
+                "retry_count": retry_count,
+                "duration_seconds": duration_seconds,
+                "caller_id": caller_id,
+            })
+            full = len(self._events) >= self.flush_size
+        if full:
+            self._wake.set()
+
+    def request_flush(self):
+        """
+        Asks the background thread to flush now instead of waiting for the interval.
+        """
+        self._wake.set()
+
+    def flush(self):
+        with self._flush_lock:
+            with self._lock:
+                rows, self._buffer = self._buffer, []
+                events, self._events = self._events, []
+            if not rows and not events:
+                return 0
+            try:
+                with engine.begin() as conn:
+                    if rows:
+                        conn.execute(insert(CallLog), rows)
+                    if events:
+                        conn.execute(insert(CallEvent), events)
+            except Exception as e:
+                logger.exception("Failed to write %d call log entries and %d call events: %s", len(rows), len(events), e)
+                with self._lock:
+                    self._buffer = (rows + self._buffer)[-CALL_LOG_MAX_BUFFER:]
+                    self._events = (events + self._events)[-CALL_LOG_MAX_BUFFER:]
+                return 0
+            return len(rows) + len(events)
+
+    def _run(self):
+        while not self._stopping.is_set():
+            self._wake.wait(self.flush_interval)
+            self._wake.clear()
+            self.flush()
+
+    def start(self):
+        if self._thread is not None:
+            return
+        self._stopping.clear()
+        self._thread = threading.Thread(target=self._run, name="call-log-writer", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """
+        Stops the background thread and writes whatever is still buffered.
+        """
+        if self._thread is None:
+            return
+        self._stopping.set()
+        self._wake.set()
+        self._thread.join()
+        self._thread = None
+        self.flush()
+
+
+call_log_writer = CallLogWriter()
@@ -0,0 +1,211 @@
+# backend/call_queue.py
+import os
+import asyncio
+import logging
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from sqlalchemy import text, select, update, delete, func
+from db.internal_database import get_session
+from models.call_job import CallJob
+
+logger = logging.getLogger(__name__)
+
+CALL_QUEUE_BACKEND = os.getenv("CALL_QUEUE_BACKEND", "postgres")  # "postgres" or "memory"
+# A running job whose worker has not renewed its lease within this long is handed to another
+# worker. Workers renew every third of the lease while a job runs (see heartbeat).
+CALL_JOB_LEASE_SECONDS = int(os.getenv("CALL_JOB_LEASE_SECONDS", "300"))
+# Finished jobs are deleted once they are this old.
+CALL_JOB_RETENTION_SECONDS = int(os.getenv("CALL_JOB_RETENTION_SECONDS", str(24 * 3600)))
+CALL_JOB_MAX_ATTEMPTS = int(os.getenv("CALL_JOB_MAX_ATTEMPTS", "3"))
+CALL_JOB_RETRY_DELAY_SECONDS = int(os.getenv("CALL_JOB_RETRY_DELAY_SECONDS", "5"))
+
+
+@dataclass
+class Job:
+    id: int
+    kind: str
+    payload: dict
+    attempts: int
+
+
+def _retry_delay(attempts):
+    return timedelta(seconds=CALL_JOB_RETRY_DELAY_SECONDS * 2 ** max(attempts - 1, 0))
+
+
+class MemoryCallQueue:
+    """
+    Process-local stand-in for PostgresCallQueue, for tests and single-process runs.
+    Jobs do not survive a restart.
+    """
+
+    def __init__(self):
+        self._jobs = {}
+        self._next_id = 1
+        self._lock = asyncio.Lock()
+
+    async def enqueue(self, kind, payload, delay=0):
+        async with self._lock:
+            job_id = self._next_id
+            self._next_id += 1
+            self._jobs[job_id] = {
+                "job": Job(job_id, kind, payload, 0),
+                "status": "pending",
+                "available_at": datetime.utcnow() + timedelta(seconds=delay),
+                "locked_at": None,
+                "locked_by": None,
+            }
+        return job_id
+
+    async def claim(self, worker_id, limit=1):
+        now = datetime.utcnow()
+        stale_before = now - timedelta(seconds=CALL_JOB_LEASE_SECONDS)
+        claimed = []
+        async with self._lock:
+            for entry in self._jobs.values():
+                if len(claimed) >= limit:
+                    break
+                due = entry["status"] == "pending" and entry["available_at"] <= now
+                stale = entry["status"] == "running" and entry["locked_at"] < stale_before
+                if due or stale:
+                    entry["status"] = "running"
+                    entry["locked_at"] = now
+                    entry["locked_by"] = worker_id
+                    entry["job"].attempts += 1
+                    claimed.append(entry["job"])
+        return claimed
+
+    async def heartbeat(self, job_id, worker_id):
+        async with self._lock:
+            entry = self._jobs.get(job_id)
+            if entry is None or entry["status"] != "running" or entry["locked_by"] != worker_id:
+                return False
+            entry["locked_at"] = datetime.utcnow()
+            return True
+
+    async def complete(self, job_id):
+        async with self._lock:
+            self._jobs.pop(job_id, None)
+
+    async def purge_done(self, retention=CALL_JOB_RETENTION_SECONDS):
+        # Completed jobs are dropped at once.
+        return 0
+
+    async def fail(self, job_id, error):
+        async with self._lock:
+            entry = self._jobs.get(job_id)
+            if entry is None:
+                return
+            if entry["job"].attempts >= CALL_JOB_MAX_ATTEMPTS:
+                entry["status"] = "failed"
+            else:
+                entry["status"] = "pending"
+                entry["available_at"] = datetime.utcnow() + _retry_delay(entry["job"].attempts)
+
+    async def depth(self):
+        return sum(1 for entry in self._jobs.values() if entry["status"] in ("pending", "running"))
+
+
+class PostgresCallQueue:
+    """
+    Durable job queue stored in the internal Postgres database.
+    Workers on any node claim jobs with FOR UPDATE SKIP LOCKED, so the same job
+    is never handed to two workers and a crashed worker's jobs are reclaimed
+    once their lease expires.
+    """
+
+    CLAIM_SQL = text("""
+        UPDATE call_jobs
+        SET status = 'running', locked_at = :now, locked_by = :worker_id, attempts = attempts + 1
+        WHERE id IN (
+            SELECT id FROM call_jobs
+            WHERE (status = 'pending' AND available_at <= :now)
+               OR (status = 'running' AND locked_at < :stale_before)
+            ORDER BY id
+            LIMIT :limit
+            FOR UPDATE SKIP LOCKED
+        )
+        RETURNING id, kind, payload, attempts
+    """)
+
+    HEARTBEAT_SQL = text("""
+        UPDATE call_jobs SET locked_at = :now
+        WHERE id = :id AND status = 'running' AND locked_by = :worker_id
+    """)
+
+    async def enqueue(self, kind, payload, delay=0):
+        """
+        Adds a job; with `delay`, workers only claim it that many seconds from now.
+        """
+        async with get_session() as session:
+            job = CallJob(kind=kind, payload=payload, available_at=datetime.utcnow() + timedelta(seconds=delay))
+            session.add(job)
+            await session.commit()
+            return job.id
+
+    async def claim(self, worker_id, limit=1):
+        now = datetime.utcnow()
+        async with get_session() as session:
+            result = await session.execute(self.CLAIM_SQL, {
+                "now": now,
+                "stale_before": now - timedelta(seconds=CALL_JOB_LEASE_SECONDS),
+                "worker_id": worker_id,
+                "limit": limit,
+            })
+            rows = result.fetchall()
+            await session.commit()
+        return [Job(row.id, row.kind, row.payload, row.attempts) for row in rows]
+
+    async def heartbeat(self, job_id, worker_id):
+        """
+        Renews the lease on a running job. Returns False if the job is no longer held by `worker_id`.
+        """
+        async with get_session() as session:
+            result = await session.execute(self.HEARTBEAT_SQL, {"now": datetime.utcnow(), "id": job_id, "worker_id": worker_id})
+            await session.commit()
+        return result.rowcount > 0
+
+    async def complete(self, job_id):
+        async with get_session() as session:
+            await session.execute(
+                update(CallJob).where(CallJob.id == job_id).values(status="done", locked_at=None)
+            )
+            await session.commit()
+
+    async def fail(self, job_id, error):
+        async with get_session() as session:
+            job = await session.get(CallJob, job_id)
+            if job:
+                job.last_error = error
+                job.locked_at = None
+                if job.attempts >= CALL_JOB_MAX_ATTEMPTS:
+                    job.status = "failed"
+                else:
+                    job.status = "pending"
+                    job.available_at = datetime.utcnow() + _retry_delay(job.attempts)
+                await session.commit()
+
+    async def purge_done(self, retention=CALL_JOB_RETENTION_SECONDS):
+        """
+        Deletes completed jobs that became available more than `retention` seconds ago; returns the count.
+        """
+        async with get_session() as session:
+            result = await session.execute(delete(CallJob).where(
+                CallJob.status == "done", CallJob.available_at < datetime.utcnow() - timedelta(seconds=retention)
+            ))
+            await session.commit()
+        return result.rowcount
+
+    async def depth(self):
+        async with get_session() as session:
+            return await session.scalar(
+                select(func.count()).select_from(CallJob).where(CallJob.status.in_(["pending", "running"]))
+            )
+
+
+def build_call_queue(backend=CALL_QUEUE_BACKEND):
+    if backend == "memory":
+        return MemoryCallQueue()
+    return PostgresCallQueue()
+
+
+call_queue = build_call_queue()
@@ -1,55 +1,190 @@
 # backend/call_service.py
 import os
-from urllib.parse import urlencode
-from twilio.rest import Client
-from twilio.twiml.voice_response import VoiceResponse, Dial
+import time
+import asyncio
+import logging
+import weakref
+import functools
+from urllib.parse import quote, urlencode
+from utils.metrics import Counter, Histogram
+
+logger = logging.getLogger(__name__)
 
 TWILIO_ACCOUNT_SID = os.getenv("TWILIO_ACCOUNT_SID")
 TWILIO_AUTH_TOKEN = os.getenv("TWILIO_AUTH_TOKEN")
 TWILIO_CALLER_ID = os.getenv("TWILIO_CALLER_ID")
+# Sender for escalation SMS; defaults to the caller ID, which must then be SMS-capable.
+TWILIO_SMS_FROM = os.getenv("TWILIO_SMS_FROM") or TWILIO_CALLER_ID
 STATUS_CALLBACK_URL = os.getenv("TWILIO_STATUS_CALLBACK_URL")  # Must be fully qualified, e.g., https://...
 DEFAULT_CONFERENCE = os.getenv("DEFAULT_CONFERENCE", "AlertConferenceRoom")
 TWILIO_WAIT_URL = os.getenv("TWILIO_WAIT_URL", None)
+TWILIO_HTTP_POOL_SIZE = int(os.getenv("TWILIO_HTTP_POOL_SIZE", "50"))
+TWILIO_HTTP_TIMEOUT = float(os.getenv("TWILIO_HTTP_TIMEOUT", "10"))
+# Overrides https://api.twilio.com for the async client, e.g. to point load tests at benchmarks.fake_twilio.
+TWILIO_API_BASE_URL = os.getenv("TWILIO_API_BASE_URL", "").rstrip("/")
+STATUS_CALLBACK_EVENTS = ["initiated", "ringing", "answered", "completed"]
+# Public base URL of this server. When set, calls fetch TwiML from /twilio/twiml/{room}
+# via `url=` instead of carrying it inline, which keeps calls.create requests small.
+TWILIO_TWIML_BASE_URL = os.getenv("TWILIO_TWIML_BASE_URL", "").rstrip("/")
+TWIML_CACHE_SIZE = int(os.getenv("TWIML_CACHE_SIZE", "1024"))
+# Whether one participant hanging up ends the conference for everyone else in it.
+CONFERENCE_END_ON_EXIT = os.getenv("CONFERENCE_END_ON_EXIT", "false").lower() in ("1", "true", "yes")
+
+CALL_CREATE_SECONDS = Histogram("twilio_call_create_seconds", "Latency of one calls.create request, by outcome.", ["outcome"])
+CALLS_CREATED = Counter("twilio_calls_total", "calls.create requests, by outcome.", ["outcome"])
+SMS_SENT = Counter("twilio_sms_total", "messages.create requests, by outcome.", ["outcome"])
+
+# Twilio SDK clients are built on first use, so importing this module stays cheap.
+# One pooled client per event loop: an aiohttp session cannot be shared between loops.
+_async_clients = weakref.WeakKeyDictionary()
+# Per loop, subaccount SID -> client sharing that loop's pooled session.
+_subaccount_clients = weakref.WeakKeyDictionary()
+
+
+def get_async_client(account_sid=None):
+    """
+    Returns the Twilio client backed by a pooled aiohttp session for the running event loop.
+    With `account_sid`, the client acts on that subaccount through the same session.
+    """
+    loop = asyncio.get_running_loop()
+    async_client = _async_clients.get(loop)
+    if async_client is None:
+        from backend.twilio_http import build_async_client
+        async_client = build_async_client(
+            TWILIO_ACCOUNT_SID, TWILIO_AUTH_TOKEN, TWILIO_HTTP_POOL_SIZE, TWILIO_HTTP_TIMEOUT, TWILIO_API_BASE_URL
+        )
+        _async_clients[loop] = async_client
+    if not account_sid or account_sid == TWILIO_ACCOUNT_SID:
+        return async_client
+    subaccounts = _subaccount_clients.setdefault(loop, {})
+    if account_sid not in subaccounts:
+        from backend.twilio_http import build_subaccount_client
+        subaccounts[account_sid] = build_subaccount_client(async_client, account_sid)
+    return subaccounts[account_sid]
+
+
+async def close_async_client():
+    loop = asyncio.get_running_loop()
+    _subaccount_clients.pop(loop, None)
+    async_client = _async_clients.pop(loop, None)
+    if async_client is not None:
+        await async_client.http_client.close()
 
-client = Client(TWILIO_ACCOUNT_SID, TWILIO_AUTH_TOKEN)
 
+@functools.lru_cache(maxsize=TWIML_CACHE_SIZE)
 def create_conference_twiml(conference_room, wait_url=None):
+    """
+    TwiML joining a call to conference_room. Cached: every number dialed into a room shares it.
+    """
+    from twilio.twiml.voice_response import VoiceResponse, Dial
     response = VoiceResponse()
     dial = Dial()
     if wait_url:
-        dial.conference(conference_room, wait_url=wait_url, start_conference_on_enter=True, end_conference_on_exit=True)
+        dial.conference(conference_room, wait_url=wait_url, start_conference_on_enter=True, end_conference_on_exit=CONFERENCE_END_ON_EXIT)
     else:
-        dial.conference(conference_room, start_conference_on_enter=True, end_conference_on_exit=True)
+        dial.conference(conference_room, start_conference_on_enter=True, end_conference_on_exit=CONFERENCE_END_ON_EXIT)
     response.append(dial)
     return str(response)
 
-def initiate_conference_call_with_callback(number, conference_room=DEFAULT_CONFERENCE, wait_url=TWILIO_WAIT_URL, message="", retry_count=0):
-    twiml = create_conference_twiml(conference_room, wait_url)
-    params = urlencode({
-        "number": number,
-        "conference_room": conference_room,
-        "message": message,
-        "retry_count": retry_count
-    })
-    full_status_callback = f"{STATUS_CALLBACK_URL}?{params}"
-    
+
+def twiml_url(conference_room, wait_url=None):
+    """
+    Public URL of the /twilio/twiml/{room} route serving create_conference_twiml.
+    """
+    url = f"{TWILIO_TWIML_BASE_URL}/twilio/twiml/{quote(conference_room, safe='')}"
+    return f"{url}?{urlencode({'wait_url': wait_url})}" if wait_url else url
+
+
+@functools.lru_cache(maxsize=TWIML_CACHE_SIZE)
+def _call_template(conference_room, wait_url):
+    # calls.create arguments that are the same for every number dialed into a room.
+    params = {
+        "from_": TWILIO_CALLER_ID,
+        "status_callback_event": STATUS_CALLBACK_EVENTS,
+        "status_callback_method": "POST",
+    }
+    if TWILIO_TWIML_BASE_URL:
+        params.update(url=twiml_url(conference_room, wait_url), method="GET")
+    else:
+        params["twiml"] = create_conference_twiml(conference_room, wait_url)
+    return params
+
+
+@functools.lru_cache(maxsize=TWIML_CACHE_SIZE)
+def _status_callback_prefix(conference_room, message):
+    return f"{STATUS_CALLBACK_URL}?{urlencode({'conference_room': conference_room, 'message': message})}"
+
+
+def build_status_callback_url(number, conference_room, message, retry_count):
+    return f"{_status_callback_prefix(conference_room, message)}&{urlencode({'number': number, 'retry_count': retry_count})}"
+
+
+def build_call_params(number, conference_room, wait_url=None, message="", retry_count=0, caller_id=None):
+    """
+    Keyword arguments for calls.create: the room's cached template plus the per-number fields.
+    `caller_id` overrides the template's TWILIO_CALLER_ID.
+    """
+    params = {
+        **_call_template(conference_room, wait_url),
+        "to": number,
+        "status_callback": build_status_callback_url(number, conference_room, message, retry_count),
+    }
+    if caller_id:
+        params["from_"] = caller_id
+    return params
+
+
+def _dial_guard():
+    # Imported on first dial; the guard pulls in the database layer.
+    from backend.dial_guard import dial_guard
+    return dial_guard
+
+
+def _caller_id_pool():
+    from backend.caller_ids import caller_id_pool
+    return caller_id_pool
+
+
+async def initiate_conference_call_async(number, conference_room=DEFAULT_CONFERENCE, wait_url=TWILIO_WAIT_URL, message="", retry_count=0, guard=True):
+    """
+    Places one conference call through the pooled async client. Unless `guard` is False, the
+    number is skipped while it is already on a call or over its per-number dial rate.
+    The caller ID comes from the weighted pool in backend.caller_ids, after waiting for its CPS budget.
+    Returns the call SID, or None if Twilio rejected the call or the guard suppressed it.
+    Pass guard=False when the caller has already taken the number's lease from the dial guard.
+    """
+    if guard and not await _dial_guard().acquire_many([number]):
+        logger.debug("Suppressed duplicate or rate-limited call to %s", number)
+        return None
+    pool = _caller_id_pool()
+    caller_id = await pool.acquire()
+    params = build_call_params(number, conference_room, wait_url, message, retry_count, caller_id and caller_id.number)
+
+    started = time.perf_counter()
     try:
-        call = client.calls.create(
-            twiml=twiml,
-            to=number,
-            from_=TWILIO_CALLER_ID,
-            status_callback=full_status_callback,
-            status_callback_event=["initiated", "ringing", "answered", "completed"],
-            status_callback_method="POST"
-        )
-        return call.sid
+        call = await get_async_client(caller_id and caller_id.account_sid).calls.create_async(**params)
     except Exception as e:
-        print(f"Failed to initiate conference call to {number}: {e}")
+        CALL_CREATE_SECONDS.observe(time.perf_counter() - started, outcome="error")
+        CALLS_CREATED.inc(outcome="error")
+        pool.record_result(caller_id, error=e)
+        logger.warning("Failed to initiate conference call to %s: %s", number, e)
+        await _dial_guard().release(number)
         return None
+    CALL_CREATE_SECONDS.observe(time.perf_counter() - started, outcome="ok")
+    CALLS_CREATED.inc(outcome="ok")
+    pool.record_result(caller_id)
+    return call.sid
+
 
-def broadcast_conference_call(phone_numbers, conference_room=DEFAULT_CONFERENCE, wait_url=TWILIO_WAIT_URL, message=""):
-    call_sids = {}
-    for number in phone_numbers:
-        sid = initiate_conference_call_with_callback(number, conference_room, wait_url, message, retry_count=0)
-        call_sids[number] = sid
-    return call_sids
+async def send_sms_async(number, body):
+    """
+    Sends one SMS through the pooled async client. Returns the message SID, or None if Twilio rejected it.
+    """
+    try:
+        message = await get_async_client().messages.create_async(to=number, from_=TWILIO_SMS_FROM, body=body)
+    except Exception as e:
+        SMS_SENT.inc(outcome="error")
+        logger.warning("Failed to send SMS to %s: %s", number, e)
+        return None
+    SMS_SENT.inc(outcome="ok")
+    return message.sid
@@ -0,0 +1,136 @@
+# backend/call_worker.py
+import os
+import socket
+import asyncio
+import logging
+from backend.call_queue import call_queue, CALL_JOB_LEASE_SECONDS
+from backend.alerts import deliver_signal, signal_coalescer
+from backend.callback_pipeline import redial
+
+logger = logging.getLogger(__name__)
+
+# Workers started inside the bot process; set to 0 to run only dedicated worker processes.
+CALL_WORKER_CONCURRENCY = int(os.getenv("CALL_WORKER_CONCURRENCY", "4"))
+CALL_WORKER_POLL_INTERVAL = float(os.getenv("CALL_WORKER_POLL_INTERVAL", "0.5"))
+CALL_JOB_PURGE_INTERVAL_SECONDS = int(os.getenv("CALL_JOB_PURGE_INTERVAL_SECONDS", "3600"))
+
+JOB_HANDLERS = {
+    "signal": deliver_signal,
+    "redial": redial,
+    "signal_burst": signal_coalescer.fire,
+}
+
+async def _keep_lease(queue, job, worker_id, interval):
+    # Renews the job's lease while its handler runs, so a long fan-out is not reclaimed and run twice.
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            if not await queue.heartbeat(job.id, worker_id):
+                logger.warning("Call worker %s lost the lease on job %s.", worker_id, job.id)
+                return
+        except Exception as e:
+            logger.warning("Could not renew the lease on job %s: %s", job.id, e)
+
+async def process_job(queue, job, worker_id=None):
+    handler = JOB_HANDLERS.get(job.kind)
+    if handler is None:
+        logger.error("No handler for job %s of kind %s", job.id, job.kind)
+        await queue.fail(job.id, f"unknown job kind {job.kind}")
+        return
+    heartbeat = asyncio.create_task(_keep_lease(queue, job, worker_id, CALL_JOB_LEASE_SECONDS / 3))
+    try:
+        await handler(**job.payload)
+    except Exception as e:
+        logger.exception("Job %s (%s) failed on attempt %s: %s", job.id, job.kind, job.attempts, e)
+        await queue.fail(job.id, str(e))
+    else:
+        await queue.complete(job.id)
+    finally:
+        heartbeat.cancel()
+
+async def run_worker(queue, worker_id, poll_interval=CALL_WORKER_POLL_INTERVAL):
+    """
+    Claims and runs jobs one at a time until cancelled.
+    """
+    logger.info("Call worker %s started.", worker_id)
+    while True:
+        try:
+            jobs = await queue.claim(worker_id, limit=1)
+        except Exception as e:
+            logger.exception("Call worker %s could not claim jobs: %s", worker_id, e)
+            jobs = []
+        if not jobs:
+            await asyncio.sleep(poll_interval)
+            continue
+        for job in jobs:
+            await process_job(queue, job, worker_id)
+
+async def purge_finished_jobs(queue, interval=CALL_JOB_PURGE_INTERVAL_SECONDS):
+    while True:
+        try:
+            purged = await queue.purge_done()
+            if purged:
+                logger.info("Purged %d finished call jobs.", purged)
+        except Exception as e:
+            logger.exception("Purging finished call jobs failed: %s", e)
+        await asyncio.sleep(interval)
+
+class WorkerPool:
+    """
+    A set of run_worker tasks sharing one queue within the current event loop.
+    """
+
+    def __init__(self, queue, size=CALL_WORKER_CONCURRENCY):
+        self.queue = queue
+        self.size = size
+        self.tasks = []
+
+    def start(self):
+        prefix = f"{socket.gethostname()}:{os.getpid()}"
+        for n in range(self.size):
+            self.tasks.append(asyncio.create_task(run_worker(self.queue, f"{prefix}:{n}")))
+        self.tasks.append(asyncio.create_task(purge_finished_jobs(self.queue)))
+
+    async def stop(self):
+        for task in self.tasks:
+            task.cancel()
+        await asyncio.gather(*self.tasks, return_exceptions=True)
+        self.tasks = []
+
+worker_pool = WorkerPool(call_queue)
+
+async def main():
+    from backend.call_service import close_async_client
+    from backend.call_log_writer import call_log_writer
+    from backend.escalation import escalation_engine
+    from backend.caller_ids import caller_id_pool
+    from bot.state_store import conversation_store
+    from backend.subscription_index import subscription_index
+    from db.internal_database import dispose_async_engine
+    call_log_writer.start()
+    conversation_store.start()
+    await escalation_engine.start()
+    # Signals are delivered here, so this process keeps its own recipient index current.
+    await subscription_index.warm()
+    subscription_index.start()
+    caller_id_pool.start()
+    worker_pool.start()
+    try:
+        await asyncio.gather(*worker_pool.tasks)
+    finally:
+        await worker_pool.stop()
+        await escalation_engine.stop()
+        await caller_id_pool.stop()
+        await subscription_index.stop()
+        await conversation_store.stop()
+        await close_async_client()
+        await dispose_async_engine()
+        call_log_writer.stop()
+
+if __name__ == "__main__":
+    # Dedicated worker process: python -m backend.call_worker
+    from dotenv import load_dotenv
+    load_dotenv()
+    from utils.logging_config import configure_logging
+    configure_logging()
+    asyncio.run(main())
@@ -0,0 +1,170 @@
+# backend/callback_pipeline.py
+import os
+import time
+import asyncio
+import logging
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from backend.call_service import initiate_conference_call_async
+from backend.call_log_writer import call_log_writer
+from backend.rooms import room_allocator, parse_room_name
+from backend.dial_guard import dial_guard
+from backend.call_queue import call_queue
+from utils.metrics import Counter, Gauge, Histogram
+
+logger = logging.getLogger(__name__)
+
+MAX_RETRIES = int(os.getenv("TWILIO_MAX_RETRIES", "3"))
+# Delay before the first redial; doubled for every further attempt.
+CALLBACK_RETRY_BASE_DELAY = float(os.getenv("CALLBACK_RETRY_BASE_DELAY", "30"))
+# Number of recent (CallSid, status) pairs remembered for de-duplication.
+CALLBACK_DEDUPE_SIZE = int(os.getenv("CALLBACK_DEDUPE_SIZE", "10000"))
+
+# Only these final statuses mean the subscriber was not reached and should be redialed.
+RETRYABLE_STATUSES = {"no-answer", "failed"}
+TERMINAL_STATUSES = {"completed", "busy", "no-answer", "failed", "canceled"}
+_STATUS_ORDER = {"queued": 0, "initiated": 1, "ringing": 2, "in-progress": 3, "answered": 3}
+
+CALLBACKS_RECEIVED = Counter("twilio_callbacks_total", "Twilio status callbacks, by call status.", ["status"])
+CALLBACK_QUEUE_SECONDS = Histogram("twilio_callback_queue_seconds", "Time a callback waits before the pipeline handles it.")
+CALLBACK_RETRY_SECONDS = Histogram(
+    "twilio_callback_retry_seconds",
+    "Time from a retryable callback arriving to its redial being placed, backoff included.",
+    buckets=(1, 5, 15, 30, 60, 120, 240, 480, 960),
+)
+CALLBACK_BACKLOG = Gauge("twilio_callback_backlog", "Callbacks queued but not yet handled.")
+
+
+@dataclass
+class CallbackEvent:
+    call_sid: str
+    status: str
+    number: str
+    conference_room: str
+    message: str
+    retry_count: int = 0
+    duration: int = None  # Twilio CallDuration, sent with the completed status
+    caller_id: str = None  # Twilio From: the pool number that placed the call
+    received_at: float = field(default_factory=time.monotonic)
+
+    @property
+    def group_id(self):
+        room = parse_room_name(self.conference_room)
+        return room[0] if room else None
+
+
+class CallbackPipeline:
+    """
+    Processes Twilio status callbacks off the request path. Events are
+    de-duplicated by (CallSid, status), each call's latest status is tracked,
+    and calls that end in a retryable status are redialed with exponential backoff.
+    Redials are delayed jobs on the durable call queue, so a restart does not lose them.
+    """
+
+    def __init__(self, max_retries=MAX_RETRIES, base_delay=CALLBACK_RETRY_BASE_DELAY, dedupe_size=CALLBACK_DEDUPE_SIZE):
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.dedupe_size = dedupe_size
+        self.call_states = {}
+        self._seen = OrderedDict()
+        self._queue = None
+        self._task = None
+
+    def submit(self, event: CallbackEvent) -> bool:
+        """
+        Queues an event without waiting. Returns False for duplicates.
+        """
+        CALLBACKS_RECEIVED.inc(status=event.status)
+        key = (event.call_sid, event.status)
+        if key in self._seen:
+            return False
+        self._seen[key] = None
+        if len(self._seen) > self.dedupe_size:
+            self._seen.popitem(last=False)
+        self._queue.put_nowait(event)
+        return True
+
+    async def _handle(self, event: CallbackEvent):
+        """
+        Applies one status change. Returns True when it ended the call.
+        """
+        previous = self.call_states.get(event.call_sid)
+        if previous in TERMINAL_STATUSES or (
+            previous is not None and _STATUS_ORDER.get(event.status, 99) < _STATUS_ORDER.get(previous, 99)
+        ):
+            logger.debug("Ignoring out-of-order status %s for call %s (already %s)", event.status, event.call_sid, previous)
+            return False
+        call_log_writer.record(None, event.status, event.call_sid)
+        call_log_writer.record_event(event.status, group_id=event.group_id, call_sid=event.call_sid,
+                                     retry_count=event.retry_count, duration_seconds=event.duration,
+                                     caller_id=event.caller_id)
+        room_allocator.on_call_status(event.conference_room, event.call_sid, event.status)
+
+        if event.status not in TERMINAL_STATUSES:
+            self.call_states[event.call_sid] = event.status
+            return False
+        self.call_states.pop(event.call_sid, None)
+
+        if event.status not in RETRYABLE_STATUSES:
+            logger.debug("Call for %s ended with acceptable status: %s", event.number, event.status)
+        elif event.retry_count < self.max_retries:
+            delay = self.base_delay * 2 ** event.retry_count
+            logger.info("Call for %s in conference %s failed (status: %s). Retrying (attempt %s) in %.0fs...",
+                        event.number, event.conference_room, event.status, event.retry_count + 1, delay)
+            await call_queue.enqueue("redial", {
+                "number": event.number,
+                "conference_room": event.conference_room,
+                "message": event.message,
+                "retry_count": event.retry_count + 1,
+                "failed_at": time.time(),
+            }, delay=delay)
+            room_allocator.expect_redial(event.conference_room)
+        else:
+            logger.info("Max retries reached for %s. No further retry.", event.number)
+        return True
+
+    async def _run(self):
+        while True:
+            event = await self._queue.get()
+            CALLBACK_QUEUE_SECONDS.observe(time.monotonic() - event.received_at)
+            try:
+                if await self._handle(event) and event.number:
+                    # The number is free for other alerts (and this call's redial) again.
+                    await dial_guard.release(event.number)
+            except Exception as e:
+                logger.exception("Error handling Twilio callback for %s: %s", event.call_sid, e)
+
+    def backlog(self):
+        return self._queue.qsize() if self._queue is not None else 0
+
+    def start(self):
+        if self._task is not None:
+            return
+        self._queue = asyncio.Queue()
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is None:
+            return
+        self._task.cancel()
+        await asyncio.gather(self._task, return_exceptions=True)
+        self._task = None
+
+
+async def redial(number, conference_room, message, retry_count, failed_at=None):
+    """
+    Job handler for a scheduled redial (see CallbackPipeline). Room bookkeeping is per
+    process: when another process runs the redial, the room here closes on its TTL.
+    """
+    new_call_sid = await initiate_conference_call_async(number, conference_room, message=message, retry_count=retry_count)
+    room_allocator.record_dial(conference_room, new_call_sid)
+    room = parse_room_name(conference_room)
+    call_log_writer.record_event("retry" if new_call_sid else "rejected", group_id=room[0] if room else None,
+                                 call_sid=new_call_sid, retry_count=retry_count)
+    if failed_at is not None:
+        CALLBACK_RETRY_SECONDS.observe(time.time() - failed_at)
+    logger.debug("Retried call for %s with new Call SID: %s", number, new_call_sid)
+
+
+callback_pipeline = CallbackPipeline()
+CALLBACK_BACKLOG.set_function(callback_pipeline.backlog)
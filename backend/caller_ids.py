@@ -0,0 +1,194 @@
+# backend/caller_ids.py
+import os
+import time
+import asyncio
+import logging
+import threading
+from datetime import datetime, timedelta
+from utils.metrics import Counter, Gauge
+
+logger = logging.getLogger(__name__)
+
+# Outbound caller IDs, comma-separated. Each entry is "number[:cps[:subaccount_sid]]", e.g.
+# "+15550001111:1,+15550002222:1:AC0123...". Empty means the single TWILIO_CALLER_ID.
+TWILIO_CALLER_IDS = os.getenv("TWILIO_CALLER_IDS", "")
+TWILIO_CALLER_ID = os.getenv("TWILIO_CALLER_ID")
+# Calls per second each listed number may start, across all processes, when its entry gives none; 0 means unlimited.
+CALLER_ID_DEFAULT_CPS = float(os.getenv("CALLER_ID_DEFAULT_CPS", "1"))
+# A number is rested for CALLER_ID_COOLDOWN_SECONDS after this many calls.create errors in a row.
+CALLER_ID_FAILURE_THRESHOLD = int(os.getenv("CALLER_ID_FAILURE_THRESHOLD", "5"))
+CALLER_ID_COOLDOWN_SECONDS = float(os.getenv("CALLER_ID_COOLDOWN_SECONDS", "300"))
+# Answer rates are read from the last CALLER_ID_STATS_WINDOW_HOURS of call_events every CALLER_ID_REFRESH_SECONDS.
+CALLER_ID_STATS_WINDOW_HOURS = float(os.getenv("CALLER_ID_STATS_WINDOW_HOURS", "6"))
+CALLER_ID_REFRESH_SECONDS = float(os.getenv("CALLER_ID_REFRESH_SECONDS", "60"))
+# A number's weight never drops below this share of its CPS, so a poor answer rate can still recover.
+CALLER_ID_MIN_WEIGHT = float(os.getenv("CALLER_ID_MIN_WEIGHT", "0.05"))
+# Answer rate assumed for a number until it has this many finished calls in the window.
+_PRIOR_ANSWER_RATE = 0.5
+_PRIOR_CALLS = 10
+_FINISHED_STATUSES = ("completed", "busy", "no-answer", "failed", "canceled")
+# Twilio errors about the dialed number (invalid, unreachable, blocked) say nothing about the caller ID.
+_RECIPIENT_ERROR_CODES = {21211, 21214, 21215, 21216, 21217, 13224, 13225}
+
+CALLER_ID_CALLS = Counter("caller_id_calls_total", "calls.create requests per caller ID, by outcome.", ["caller_id", "outcome"])
+CALLER_ID_WEIGHT = Gauge("caller_id_weight", "Current selection weight of each caller ID; 0 while cooling down.", ["caller_id"])
+
+
+class CallerId:
+    """
+    One outbound number: its CPS budget, the Twilio (sub)account it belongs to,
+    and the health figures that set its share of calls.
+    """
+
+    def __init__(self, number, cps=0.0, account_sid=None):
+        self.number = number
+        self.cps = cps
+        self.account_sid = account_sid  # None: the main account
+        self.answer_rate = _PRIOR_ANSWER_RATE
+        self.consecutive_errors = 0
+        self.cooldown_until = 0.0
+        self.current_weight = 0.0
+
+    @property
+    def weight(self):
+        if self.cooldown_until > time.monotonic():
+            return 0.0
+        return (self.cps or 1.0) * max(CALLER_ID_MIN_WEIGHT, self.answer_rate)
+
+
+def parse_caller_ids(spec=TWILIO_CALLER_IDS, fallback=TWILIO_CALLER_ID, default_cps=CALLER_ID_DEFAULT_CPS):
+    caller_ids = []
+    for entry in filter(None, (part.strip() for part in spec.split(","))):
+        number, _, rest = entry.partition(":")
+        cps, _, account_sid = rest.partition(":")
+        caller_ids.append(CallerId(number, float(cps) if cps else default_cps, account_sid or None))
+    if not caller_ids and fallback:
+        # The single legacy caller ID is throttled only by TWILIO_CALLS_PER_SECOND, as before.
+        caller_ids.append(CallerId(fallback))
+    return caller_ids
+
+
+class CallerIdPool:
+    """
+    Spreads calls over the configured caller IDs with smooth weighted
+    round-robin (interleaved, not bursty). A number's weight is its CPS scaled
+    by its recent answer rate; numbers that keep failing calls.create are
+    skipped until their cooldown ends. Each number's CPS is enforced by
+    spacing out the calls it is picked for, through the dial guard so that
+    every process shares the budget.
+    """
+
+    def __init__(self, caller_ids):
+        self.caller_ids = list(caller_ids)
+        self._by_number = {c.number: c for c in self.caller_ids}
+        self._lock = threading.Lock()  # Redials run on the webhook thread's loop in polling mode
+        self._task = None
+        for caller_id in self.caller_ids:
+            CALLER_ID_WEIGHT.set(caller_id.weight, caller_id=caller_id.number)
+
+    def _pick(self):
+        # Smooth WRR (as in nginx): every candidate gains its weight, the largest wins and pays back the total.
+        candidates = [(c, c.weight) for c in self.caller_ids]
+        candidates = [(c, w) for c, w in candidates if w > 0] or [
+            # Everything is cooling down: fall back to the number that recovers first.
+            (min(self.caller_ids, key=lambda c: c.cooldown_until), 1.0)
+        ]
+        total = sum(w for _, w in candidates)
+        for caller_id, weight in candidates:
+            caller_id.current_weight += weight
+        chosen = max(candidates, key=lambda item: item[0].current_weight)[0]
+        chosen.current_weight -= total
+        return chosen
+
+    async def acquire(self):
+        """
+        Picks the caller ID for the next call, waiting out its CPS budget. None if none are configured.
+        """
+        if not self.caller_ids:
+            return None
+        with self._lock:
+            caller_id = self._pick()
+        if caller_id.cps > 0:
+            from backend.dial_guard import dial_guard
+            delay = await dial_guard.reserve_slot(caller_id.number, 1.0 / caller_id.cps)
+            if delay > 0:
+                await asyncio.sleep(delay)
+        return caller_id
+
+    def record_result(self, caller_id, error=None):
+        """
+        Counts one calls.create outcome; enough errors in a row start the number's cooldown.
+        """
+        if caller_id is None:
+            return
+        CALLER_ID_CALLS.inc(caller_id=caller_id.number, outcome="ok" if error is None else "error")
+        with self._lock:
+            if error is None or getattr(error, "code", None) in _RECIPIENT_ERROR_CODES:
+                caller_id.consecutive_errors = 0
+                return
+            caller_id.consecutive_errors += 1
+            if caller_id.consecutive_errors < CALLER_ID_FAILURE_THRESHOLD:
+                return
+            caller_id.consecutive_errors = 0
+            caller_id.cooldown_until = time.monotonic() + CALLER_ID_COOLDOWN_SECONDS
+        CALLER_ID_WEIGHT.set(0, caller_id=caller_id.number)
+        logger.warning("Caller ID %s failed %d calls in a row; resting it for %.0fs.",
+                       caller_id.number, CALLER_ID_FAILURE_THRESHOLD, CALLER_ID_COOLDOWN_SECONDS)
+
+    def set_answer_rates(self, stats):
+        """
+        Applies {number: (answered, finished)} counts, smoothed towards the prior for small samples.
+        """
+        with self._lock:
+            for caller_id in self.caller_ids:
+                answered, finished = stats.get(caller_id.number, (0, 0))
+                caller_id.answer_rate = (answered + _PRIOR_ANSWER_RATE * _PRIOR_CALLS) / (finished + _PRIOR_CALLS)
+        for caller_id in self.caller_ids:
+            CALLER_ID_WEIGHT.set(caller_id.weight, caller_id=caller_id.number)
+
+    async def refresh_answer_rates(self, window_hours=CALLER_ID_STATS_WINDOW_HOURS):
+        """
+        Reads each caller ID's answered and finished calls from call_events, so
+        every process weighs numbers by the same, recent answer rates.
+        """
+        from sqlalchemy import select, func, case
+        from db.internal_database import get_session
+        from models.call_event import CallEvent
+        since = datetime.utcnow() - timedelta(hours=window_hours)
+        async with get_session() as session:
+            rows = (await session.execute(
+                select(
+                    CallEvent.caller_id,
+                    func.sum(case((CallEvent.event == "completed", 1), else_=0)),
+                    func.count(),
+                )
+                .where(
+                    CallEvent.caller_id.in_(list(self._by_number)),
+                    CallEvent.occurred_at >= since,
+                    CallEvent.event.in_(_FINISHED_STATUSES),
+                )
+                .group_by(CallEvent.caller_id)
+            )).all()
+        self.set_answer_rates({row[0]: (int(row[1] or 0), row[2]) for row in rows})
+
+    async def _run(self, interval):
+        while True:
+            try:
+                await self.refresh_answer_rates()
+            except Exception as e:
+                logger.exception("Caller ID answer-rate refresh failed: %s", e)
+            await asyncio.sleep(interval)
+
+    def start(self, interval=CALLER_ID_REFRESH_SECONDS):
+        # One number has nothing to balance against.
+        if self._task is None and len(self.caller_ids) > 1:
+            self._task = asyncio.create_task(self._run(interval))
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+
+caller_id_pool = CallerIdPool(parse_caller_ids())
@@ -0,0 +1,240 @@
+# backend/coalescer.py
+import os
+import logging
+import threading
+from contextlib import asynccontextmanager
+from datetime import datetime, timedelta
+from sqlalchemy import select, update
+from db.internal_database import engine, get_session
+from models.signal_burst import SignalBurst
+
+logger = logging.getLogger(__name__)
+
+SIGNAL_COALESCER_BACKEND = os.getenv("SIGNAL_COALESCER_BACKEND", "sql")  # "sql" or "memory"
+# A group's first signal goes out at once. Once messages are being held, a trailing alert
+# waits at least this long after the message that started the hold, so a burst goes out as one.
+SIGNAL_DEBOUNCE_SECONDS = float(os.getenv("SIGNAL_DEBOUNCE_SECONDS", "5"))
+# For this long after an alert goes out (a fixed timer, not tied to its calls), further
+# messages are held and sent together as one trailing alert once it ends.
+SIGNAL_COOLDOWN_SECONDS = float(os.getenv("SIGNAL_COOLDOWN_SECONDS", "120"))
+# Hard cap on alerts per group per hour; messages beyond it wait for the next free slot.
+SIGNAL_MAX_ALERTS_PER_HOUR = int(os.getenv("SIGNAL_MAX_ALERTS_PER_HOUR", "10"))
+# Held messages older than this when their alert is due are dropped rather than sent late.
+SIGNAL_MAX_HOLD_SECONDS = float(os.getenv("SIGNAL_MAX_HOLD_SECONDS", "600"))
+# A scheduled send this far overdue is assumed lost (e.g. a crash before it was queued) and rescheduled.
+_STALE_FIRE_SECONDS = 60
+
+
+class _GroupState:
+    # messages holds [received_at (ISO), text] pairs, so they stay JSON-serialisable.
+    __slots__ = ("title", "messages", "fire_at", "last_dispatch_at", "dispatches")
+
+    def __init__(self, title=None, messages=(), fire_at=None, last_dispatch_at=None, dispatches=()):
+        self.title = title
+        self.messages = list(messages)
+        self.fire_at = fire_at
+        self.last_dispatch_at = last_dispatch_at
+        self.dispatches = list(dispatches)
+
+
+class MemoryCoalescerStore:
+    """
+    Process-local coalescer state, for tests and single-process runs.
+    The body of `locked` must not await: the lock is shared between event loops.
+    """
+
+    def __init__(self):
+        self._groups = {}
+        self._lock = threading.Lock()
+
+    @asynccontextmanager
+    async def locked(self, chat_id):
+        with self._lock:
+            yield self._groups.setdefault(chat_id, _GroupState())
+
+    def pending_groups(self):
+        return [chat_id for chat_id, state in self._groups.items() if state.messages]
+
+
+class SqlCoalescerStore:
+    """
+    Coalescer state in the signal_bursts table, locked per group for the
+    length of one transaction, so every process sees the same debounce
+    window, cooldown and hourly count.
+    """
+
+    @asynccontextmanager
+    async def locked(self, chat_id):
+        async with get_session() as session:
+            row = await self._lock_row(session, chat_id)
+            state = _GroupState(
+                row.title, row.messages or [], row.fire_at, row.last_dispatch_at,
+                [datetime.fromisoformat(at) for at in row.dispatches or []],
+            )
+            yield state
+            await session.execute(
+                update(SignalBurst).where(SignalBurst.group_id == chat_id).values(
+                    title=state.title, messages=list(state.messages), fire_at=state.fire_at,
+                    last_dispatch_at=state.last_dispatch_at, dispatches=[at.isoformat() for at in state.dispatches],
+                )
+            )
+            await session.commit()
+
+    @staticmethod
+    async def _lock_row(session, chat_id):
+        """
+        Reads the group's row, creating it if needed, locked until the transaction ends.
+        """
+        columns = SignalBurst.__table__.c
+        if engine.dialect.name == "postgresql":
+            from sqlalchemy.dialects.postgresql import insert
+            stmt = insert(SignalBurst).values(group_id=chat_id, messages=[], dispatches=[])
+            # A no-op upsert creates or locks the row and returns it in one statement.
+            return (await session.execute(
+                stmt.on_conflict_do_update(index_elements=[columns.group_id], set_={"group_id": stmt.excluded.group_id})
+                .returning(*columns)
+            )).one()
+        # SQLite locks the whole database for writing; writing first makes every other writer wait for us.
+        from sqlalchemy.dialects.sqlite import insert
+        await session.execute(insert(SignalBurst).values(group_id=chat_id, messages=[], dispatches=[]).on_conflict_do_nothing())
+        return (await session.execute(select(*columns).where(columns.group_id == chat_id))).one()
+
+    def pending_groups(self):
+        # Scheduled sends are durable queue jobs; nothing to flush on shutdown.
+        return []
+
+
+def build_coalescer_store(backend=SIGNAL_COALESCER_BACKEND):
+    if backend == "memory":
+        return MemoryCoalescerStore()
+    return SqlCoalescerStore()
+
+
+class SignalCoalescer:
+    """
+    Per-group rate control in front of alert dispatch. A signal for a group
+    with nothing held goes out at once. Messages during the cooldown that
+    follows, or beyond the hourly cap, are held and sent as one trailing
+    alert when the cooldown ends or the cap frees a slot; any held longer
+    than SIGNAL_MAX_HOLD_SECONDS by then are dropped. Scheduled sends are
+    delayed jobs on the call queue, handled by `fire`.
+    """
+
+    def __init__(self, dispatch, queue, store=None, debounce=SIGNAL_DEBOUNCE_SECONDS, cooldown=SIGNAL_COOLDOWN_SECONDS,
+                 max_per_hour=SIGNAL_MAX_ALERTS_PER_HOUR, max_hold=SIGNAL_MAX_HOLD_SECONDS):
+        self.dispatch = dispatch
+        self.queue = queue
+        self.store = store or build_coalescer_store()
+        self.debounce = debounce
+        self.cooldown = cooldown
+        self.max_per_hour = max_per_hour
+        self.max_hold = max_hold
+
+    def _hold_until(self, state, now):
+        """
+        When the group may next be alerted, and why it must wait ("cooldown", "rate_limited" or None).
+        """
+        state.dispatches = [at for at in state.dispatches if now - at < timedelta(hours=1)]
+        until, reason = now, None
+        if state.last_dispatch_at is not None and now - state.last_dispatch_at < timedelta(seconds=self.cooldown):
+            until, reason = state.last_dispatch_at + timedelta(seconds=self.cooldown), "cooldown"
+        if len(state.dispatches) >= self.max_per_hour:
+            slot = state.dispatches[-self.max_per_hour] + timedelta(hours=1)
+            if slot > until:
+                until, reason = slot, "rate_limited"
+        return until, reason
+
+    async def submit(self, chat_id, chat_title, message_text):
+        """
+        Returns "scheduled", "merged", "cooldown" or "rate_limited".
+        """
+        now = datetime.utcnow()
+        messages = None
+        async with self.store.locked(chat_id) as state:
+            state.title = chat_title
+            state.messages.append([now.isoformat(), message_text])
+            until, reason = self._hold_until(state, now)
+            if state.fire_at is not None and now < state.fire_at + timedelta(seconds=_STALE_FIRE_SECONDS):
+                return reason or "merged"
+            if reason is None:
+                # Nothing held and nothing to wait for: send in this same transaction.
+                messages = self._take(state, now)
+            else:
+                state.fire_at = fire_at = max(until, now + timedelta(seconds=self.debounce))
+        if messages is not None:
+            await self._dispatch(chat_id, chat_title, messages, now)
+            return "scheduled"
+        delay = (fire_at - now).total_seconds()
+        if reason == "rate_limited":
+            logger.warning("Group %s reached %d alerts in the last hour; signal held for %.0fs.", chat_id, self.max_per_hour, delay)
+        elif reason == "cooldown":
+            logger.info("Signal for group %s held until the cooldown ends in %.0fs.", chat_id, delay)
+        await self._schedule(chat_id, delay)
+        return reason or "scheduled"
+
+    async def _schedule(self, chat_id, delay):
+        if delay <= 0:
+            await self.fire(chat_id)
+        else:
+            await self.queue.enqueue("signal_burst", {"chat_id": chat_id}, delay=delay)
+
+    def _take(self, state, now):
+        """
+        Clears the held messages and returns those still fresh enough to send, counting the alert if any are.
+        """
+        held, state.messages, state.fire_at = state.messages, [], None
+        oldest = now - timedelta(seconds=self.max_hold)
+        messages = [entry for entry in held if datetime.fromisoformat(entry[0]) >= oldest]
+        if len(messages) < len(held):
+            logger.warning("Dropped %d signals held longer than %.0fs.", len(held) - len(messages), self.max_hold)
+        if messages:
+            state.last_dispatch_at = now
+            state.dispatches.append(now)
+        return messages
+
+    async def fire(self, chat_id):
+        """
+        Sends the group's held messages as one alert (the "signal_burst" job handler).
+        """
+        now = datetime.utcnow()
+        async with self.store.locked(chat_id) as state:
+            title = state.title
+            if not state.messages:
+                state.fire_at = None
+                return
+            until, _ = self._hold_until(state, now)
+            if until > now:
+                # Another alert went out since this send was scheduled.
+                state.fire_at = until
+            else:
+                messages = self._take(state, now)
+        if until > now:
+            await self._schedule(chat_id, (until - now).total_seconds())
+            return
+        if messages:
+            await self._dispatch(chat_id, title, messages, now)
+
+    async def _dispatch(self, chat_id, title, messages, now):
+        if len(messages) > 1:
+            logger.info("Coalesced %d signals for group %s into one alert.", len(messages), chat_id)
+        try:
+            await self.dispatch(chat_id, title, "\n".join(text for _, text in messages))
+        except Exception as e:
+            logger.exception("Failed to dispatch alert for group %s: %s", chat_id, e)
+            # Put the messages back and try again shortly rather than lose them.
+            async with self.store.locked(chat_id) as state:
+                state.messages[:0] = messages
+                state.fire_at = now + timedelta(seconds=max(self.debounce, 1))
+            await self._schedule(chat_id, max(self.debounce, 1))
+
+    async def flush_all(self):
+        """
+        Dispatches every alert still held in process memory; used on shutdown.
+        """
+        for chat_id in self.store.pending_groups():
+            async with self.store.locked(chat_id) as state:
+                messages, title, state.messages, state.fire_at = state.messages, state.title, [], None
+            try:
+                await self.dispatch(chat_id, title, "\n".join(text for _, text in messages))
+            except Exception as e:
+                logger.exception("Failed to dispatch alert for group %s: %s", chat_id, e)
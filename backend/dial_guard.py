@@ -0,0 +1,161 @@
+# backend/dial_guard.py
+import os
+import time
+import logging
+import threading
+from datetime import datetime, timedelta
+from sqlalchemy import text, bindparam, String
+from sqlalchemy.dialects.postgresql import ARRAY
+from db.internal_database import get_session
+from utils.metrics import Counter
+
+logger = logging.getLogger(__name__)
+
+DIAL_GUARD_BACKEND = os.getenv("DIAL_GUARD_BACKEND", "postgres")  # "postgres" or "memory"
+# Calls one number may receive back to back; room for the first dial plus its redials.
+DIAL_GUARD_BURST = float(os.getenv("DIAL_GUARD_BURST", "4"))
+# One more call is allowed per this many seconds once the burst is used up.
+DIAL_GUARD_REFILL_SECONDS = float(os.getenv("DIAL_GUARD_REFILL_SECONDS", "60"))
+# A number counts as on a call until its final status callback, or for at most this long.
+DIAL_GUARD_LEASE_SECONDS = float(os.getenv("DIAL_GUARD_LEASE_SECONDS", "900"))
+_MAX_TRACKED_NUMBERS = 100000
+
+DIALS_SUPPRESSED = Counter("dial_guard_suppressed_total", "Dials skipped because the number was on a call or over its rate.")
+
+
+class MemoryDialGuard:
+    """
+    Per-number token bucket plus an in-flight set, for one process. A number
+    is dialed only if it is not already on a call we placed and it has a
+    token left; the call's final status callback clears it from the set.
+    Also paces each outbound caller ID to its CPS.
+    """
+
+    def __init__(self, burst=DIAL_GUARD_BURST, refill_seconds=DIAL_GUARD_REFILL_SECONDS, lease=DIAL_GUARD_LEASE_SECONDS):
+        self.burst = burst
+        self.rate = 1.0 / refill_seconds if refill_seconds > 0 else 1e9
+        self.lease = lease
+        self._buckets = {}  # number -> (tokens, refilled_at)
+        self._in_flight = {}  # number -> lease expiry
+        self._slots = {}  # caller ID -> earliest start of its next call
+        self._lock = threading.Lock()
+
+    def _tokens(self, number, now):
+        tokens, refilled_at = self._buckets.get(number, (self.burst, now))
+        return min(self.burst, tokens + (now - refilled_at) * self.rate)
+
+    async def acquire_many(self, numbers):
+        """
+        Takes a token and an in-flight lease for each number that may be dialed; returns those numbers.
+        """
+        now = time.monotonic()
+        allowed = set()
+        with self._lock:
+            if len(self._buckets) > _MAX_TRACKED_NUMBERS:
+                self._sweep(now)
+            for number in set(numbers):
+                tokens = self._tokens(number, now)
+                if self._in_flight.get(number, 0) > now or tokens < 1:
+                    continue
+                self._buckets[number] = (tokens - 1, now)
+                self._in_flight[number] = now + self.lease
+                allowed.add(number)
+        DIALS_SUPPRESSED.inc(len(set(numbers)) - len(allowed))
+        return allowed
+
+    async def release(self, *numbers):
+        with self._lock:
+            for number in numbers:
+                self._in_flight.pop(number, None)
+
+    async def reserve_slot(self, caller_id, spacing):
+        """
+        Claims the caller ID's next call slot, `spacing` seconds after the last; returns how long to wait.
+        """
+        now = time.monotonic()
+        with self._lock:
+            slot = max(now, self._slots.get(caller_id, now))
+            self._slots[caller_id] = slot + spacing
+        return slot - now
+
+    def _sweep(self, now):
+        # Full buckets and expired leases carry no state worth keeping.
+        self._in_flight = {n: until for n, until in self._in_flight.items() if until > now}
+        self._buckets = {n: b for n, b in self._buckets.items() if self._tokens(n, now) < self.burst}
+        self._slots = {c: slot for c, slot in self._slots.items() if slot > now}
+
+
+class PostgresDialGuard:
+    """
+    The same limits kept in the dial_guards table, so every bot, worker and
+    webhook process shares them: a lease taken by a worker is released by the
+    status callback in the webhook process. One statement takes tokens and
+    leases for a whole batch of numbers. Caller-ID slots live in
+    caller_id_slots, so a number's CPS holds across all dialing processes.
+    """
+
+    ACQUIRE_SQL = text("""
+        INSERT INTO dial_guards AS g (phone_number, tokens, refilled_at, in_flight_until)
+        SELECT number, CAST(:burst AS double precision) - 1, :now, :lease_until FROM unnest(CAST(:numbers AS text[])) AS number
+        ON CONFLICT (phone_number) DO UPDATE
+        SET tokens = LEAST(:burst, g.tokens + EXTRACT(EPOCH FROM (CAST(:now AS timestamp) - g.refilled_at)) * :rate) - 1,
+            refilled_at = :now,
+            in_flight_until = :lease_until
+        WHERE (g.in_flight_until IS NULL OR g.in_flight_until <= :now)
+          AND LEAST(:burst, g.tokens + EXTRACT(EPOCH FROM (CAST(:now AS timestamp) - g.refilled_at)) * :rate) >= 1
+        RETURNING g.phone_number
+    """).bindparams(bindparam("numbers", type_=ARRAY(String)))
+
+    RELEASE_SQL = text("""
+        UPDATE dial_guards SET in_flight_until = NULL WHERE phone_number = ANY(CAST(:numbers AS text[]))
+    """).bindparams(bindparam("numbers", type_=ARRAY(String)))
+
+    # Slots run on the database clock, so hosts with skewed clocks still space calls correctly.
+    RESERVE_SLOT_SQL = text("""
+        INSERT INTO caller_id_slots AS s (caller_id, next_slot)
+        VALUES (:caller_id, (clock_timestamp() AT TIME ZONE 'UTC') + make_interval(secs => CAST(:spacing AS double precision)))
+        ON CONFLICT (caller_id) DO UPDATE
+        SET next_slot = GREATEST(s.next_slot + make_interval(secs => CAST(:spacing AS double precision)), excluded.next_slot)
+        RETURNING EXTRACT(EPOCH FROM (s.next_slot - (clock_timestamp() AT TIME ZONE 'UTC'))) - :spacing AS delay
+    """)
+
+    def __init__(self, burst=DIAL_GUARD_BURST, refill_seconds=DIAL_GUARD_REFILL_SECONDS, lease=DIAL_GUARD_LEASE_SECONDS):
+        self.burst = burst
+        self.rate = 1.0 / refill_seconds if refill_seconds > 0 else 1e9
+        self.lease = lease
+
+    def _params(self, numbers):
+        now = datetime.utcnow()
+        return {
+            "numbers": sorted(set(numbers)), "burst": self.burst, "rate": self.rate,
+            "now": now, "lease_until": now + timedelta(seconds=self.lease),
+        }
+
+    async def acquire_many(self, numbers):
+        if not numbers:
+            return set()
+        async with get_session() as session:
+            rows = (await session.execute(self.ACQUIRE_SQL, self._params(numbers))).all()
+            await session.commit()
+        DIALS_SUPPRESSED.inc(len(set(numbers)) - len(rows))
+        return {row.phone_number for row in rows}
+
+    async def release(self, *numbers):
+        async with get_session() as session:
+            await session.execute(self.RELEASE_SQL, {"numbers": list(numbers)})
+            await session.commit()
+
+    async def reserve_slot(self, caller_id, spacing):
+        async with get_session() as session:
+            delay = (await session.execute(self.RESERVE_SLOT_SQL, {"caller_id": caller_id, "spacing": spacing})).scalar_one()
+            await session.commit()
+        return max(0.0, float(delay))
+
+
+def build_dial_guard(backend=DIAL_GUARD_BACKEND):
+    if backend == "memory":
+        return MemoryDialGuard()
+    return PostgresDialGuard()
+
+
+dial_guard = build_dial_guard()
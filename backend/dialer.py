@@ -0,0 +1,116 @@
+# backend/dialer.py
+import os
+import time
+import asyncio
+import logging
+from backend.call_service import (
+    DEFAULT_CONFERENCE,
+    TWILIO_WAIT_URL,
+    initiate_conference_call_async,
+)
+from backend.rooms import room_allocator
+from backend.dial_guard import dial_guard
+
+logger = logging.getLogger(__name__)
+
+# Upper bound on calls.create requests in flight at once.
+DIAL_MAX_CONCURRENCY = int(os.getenv("DIAL_MAX_CONCURRENCY", "20"))
+# Outbound calls-per-second allowed on the Twilio account (1 by default on new accounts).
+TWILIO_CALLS_PER_SECOND = float(os.getenv("TWILIO_CALLS_PER_SECOND", "10"))
+
+
+class RateLimiter:
+    """
+    Spaces acquisitions at least 1/rate seconds apart across all callers.
+    """
+
+    def __init__(self, rate: float):
+        self.interval = 1.0 / rate if rate > 0 else 0.0
+        self._next_slot = 0.0
+        self._lock = asyncio.Lock()
+
+    async def acquire(self):
+        if not self.interval:
+            return
+        async with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._next_slot)
+            self._next_slot = slot + self.interval
+        delay = slot - now
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+
+class DialEngine:
+    """
+    Places conference calls concurrently, bounded by a concurrency limit and
+    the account-wide calls-per-second budget. Numbers the dial guard turns
+    away (already on a call, or over their own rate) are skipped before they
+    take a concurrency slot or a calls-per-second token.
+    """
+
+    def __init__(self, max_concurrency: int = DIAL_MAX_CONCURRENCY, calls_per_second: float = TWILIO_CALLS_PER_SECOND):
+        self.max_concurrency = max_concurrency
+        self.rate_limiter = RateLimiter(calls_per_second)
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+
+    async def _dial_one(self, number, conference_room, wait_url, message):
+        async with self._semaphore:
+            await self.rate_limiter.acquire()
+            sid = await initiate_conference_call_async(number, conference_room, wait_url, message, retry_count=0, guard=False)
+            return number, conference_room, sid, "placed" if sid else "rejected"
+
+    async def _dial_all(self, assignments, wait_url, message):
+        assignments = list(assignments)
+        # One guard round trip for the whole batch; a number listed twice is dialed once.
+        allowed = await dial_guard.acquire_many([number for number, _ in assignments])
+        tasks = []
+        for number, conference_room in assignments:
+            if number in allowed:
+                allowed.discard(number)
+                tasks.append(asyncio.create_task(self._dial_one(number, conference_room, wait_url, message)))
+            else:
+                yield number, conference_room, None, "suppressed"
+        try:
+            for next_done in asyncio.as_completed(tasks):
+                yield await next_done
+        finally:
+            for task in tasks:
+                task.cancel()
+
+    async def dial(self, phone_numbers, conference_room=DEFAULT_CONFERENCE, wait_url=TWILIO_WAIT_URL, message=""):
+        """
+        Dials every number into one conference and yields (number, call_sid) pairs as each call is placed.
+        call_sid is None for numbers Twilio rejected.
+        """
+        async for number, _, sid, _ in self._dial_all(((n, conference_room) for n in phone_numbers), wait_url, message):
+            yield number, sid
+
+    async def dial_rooms(self, rooms, wait_url=TWILIO_WAIT_URL, message=""):
+        """
+        Dials each room's numbers into that room, recording every outcome on the
+        room allocator, and yields (number, room_name, call_sid, outcome) as each
+        call is placed. outcome is "placed", "rejected" (by Twilio) or "suppressed" (by the dial guard).
+        """
+        assignments = [(number, room.name) for room in rooms for number in room.numbers]
+        async for number, name, sid, outcome in self._dial_all(assignments, wait_url, message):
+            room_allocator.record_dial(name, sid)
+            yield number, name, sid, outcome
+
+
+dial_engine = DialEngine()
+
+
+async def broadcast_conference_call(phone_numbers, conference_room=None, wait_url=TWILIO_WAIT_URL, message="", group_id="broadcast"):
+    """
+    Dials every number and returns {number: call_sid}. Without an explicit
+    conference_room the numbers get freshly allocated, capacity-sharded rooms.
+    """
+    call_sids = {}
+    if conference_room is not None:
+        async for number, sid in dial_engine.dial(phone_numbers, conference_room, wait_url, message):
+            call_sids[number] = sid
+        return call_sids
+    async for number, _, sid, _ in dial_engine.dial_rooms(room_allocator.allocate(group_id, phone_numbers), wait_url, message):
+        call_sids[number] = sid
+    return call_sids
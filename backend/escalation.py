@@ -0,0 +1,413 @@
+# backend/escalation.py
+import os
+import time
+import uuid
+import asyncio
+import logging
+from dataclasses import dataclass, asdict
+from datetime import datetime, timedelta
+from sqlalchemy import select, delete
+from db.internal_database import engine, get_session
+from models.escalation_timer import EscalationTimer
+from backend.dialer import RateLimiter, dial_engine
+from backend.rooms import room_allocator
+from backend.call_service import send_sms_async
+from backend.call_log_writer import call_log_writer
+from bot.application import ALERTS_BOT_TOKEN
+from bot.state_store import conversation_store
+from utils.timer_wheel import TimerWheel
+from utils.filters import parse_signals
+from utils.metrics import Counter, Gauge
+
+logger = logging.getLogger(__name__)
+
+ESCALATION_STEPS = ("telegram", "sms", "call")
+# Delivery channels tried in order; each later step only reaches recipients who have not acknowledged.
+# "call" on its own calls every recipient straight away, as before the ladder existed.
+ESCALATION_LADDER = tuple(
+    step.strip() for step in os.getenv("ESCALATION_LADDER", ",".join(ESCALATION_STEPS)).split(",") if step.strip()
+)
+# Wait between steps for subscriptions without their own ack_timeout_seconds.
+ESCALATION_ACK_TIMEOUT_SECONDS = int(os.getenv("ESCALATION_ACK_TIMEOUT_SECONDS", "120"))
+ESCALATION_TICK_SECONDS = float(os.getenv("ESCALATION_TICK_SECONDS", "1"))
+# Telegram allows about 30 messages per second per bot; long-code SMS senders far fewer.
+TELEGRAM_MESSAGES_PER_SECOND = float(os.getenv("TELEGRAM_MESSAGES_PER_SECOND", "25"))
+TWILIO_SMS_PER_SECOND = float(os.getenv("TWILIO_SMS_PER_SECOND", "10"))
+# Saved steps this far overdue belong to a process that died; any live process picks them up.
+ESCALATION_ORPHAN_SECONDS = float(os.getenv("ESCALATION_ORPHAN_SECONDS", "60"))
+SMS_MAX_LENGTH = 320
+
+ESCALATION_STEPS_TOTAL = Counter("escalation_steps_total", "Escalation steps run per recipient, by step and outcome.", ["step", "outcome"])
+ESCALATION_ACKS = Counter("escalation_acks_total", "Alerts acknowledged by a recipient, by the last step sent before the ack.", ["step"])
+
+
+@dataclass
+class Escalation:
+    """
+    One recipient's progress through the ladder for one alert. Saved as JSON in escalation_timers.
+    """
+    alert_id: str
+    group_id: str
+    group_name: str
+    message_text: str
+    subscription_id: int
+    phone_number: str
+    telegram_user_id: str = None
+    ack_timeout_seconds: int = ESCALATION_ACK_TIMEOUT_SECONDS
+    step: int = 0  # index into the ladder of the next step to run
+    summary: str = None  # one-line form of every signal in message_text, when each has a pair and entry
+
+    @property
+    def key(self):
+        return f"{self.alert_id}:{self.subscription_id}"
+
+    @property
+    def timer_key(self):
+        # One escalation_timers row per step, so a stale copy of an earlier step never claims the next one.
+        return f"{self.key}:{self.step}"
+
+    @property
+    def call_message(self):
+        return f"New signal from {self.group_name}: {self.message_text}"
+
+    @property
+    def sms_message(self):
+        return f"New signal from {self.group_name}: {self.summary or self.message_text}"[:SMS_MAX_LENGTH]
+
+
+def sms_summary(message_text):
+    """
+    The parsed signals in one line, or None (send the text as is) unless every one has its pair and entry.
+    """
+    signals = parse_signals(message_text)
+    if not all(signal and signal.pair and signal.entry is not None for signal in signals):
+        return None
+    return " | ".join(signal.summary() for signal in signals)
+
+
+def ack_key(key):
+    return f"ack:{key}"
+
+
+class EscalationEngine:
+    """
+    Delivers each alert through a ladder of channels (Telegram DM with an
+    acknowledge button, then SMS, then a conference call), moving a recipient
+    to the next step only if they have not acknowledged within their timeout.
+
+    Pending steps live in an in-memory timer wheel and are written through to
+    escalation_timers as they are scheduled. A due step runs only in the
+    process that deletes its row, so steps reloaded by several processes (or
+    acknowledged elsewhere) run at most once; a step that could not be saved
+    runs from this process's wheel without a claim. Acks are written to the
+    shared conversation store and delete the recipient's saved step.
+    """
+
+    def __init__(self, ladder=ESCALATION_LADDER, tick=ESCALATION_TICK_SECONDS):
+        unknown = set(ladder) - set(ESCALATION_STEPS)
+        if unknown:
+            raise ValueError(f"Unknown escalation steps: {', '.join(sorted(unknown))}")
+        self.ladder = tuple(ladder) or ("call",)
+        self.wheel = TimerWheel(tick)
+        self.telegram_limiter = RateLimiter(TELEGRAM_MESSAGES_PER_SECOND)
+        self.sms_limiter = RateLimiter(TWILIO_SMS_PER_SECOND)
+        self._bot = None
+        self._owns_bot = False
+        self._task = None
+        self._inflight = set()
+        self._unsaved = set()  # timer keys of pending steps that only this process knows about
+
+    def bind_bot(self, bot):
+        """
+        Sends Telegram steps through the bot Application's Bot instead of a separate client.
+        """
+        self._bot = bot
+
+    async def _get_bot(self):
+        if self._bot is None:
+            from telegram import Bot
+            bot = Bot(ALERTS_BOT_TOKEN)
+            await bot.initialize()
+            self._bot, self._owns_bot = bot, True
+        return self._bot
+
+    async def deliver(self, group_id, group_name, message_text, recipients):
+        """
+        Starts the ladder for one signal's recipients and runs its first step.
+        Returns the number of recipients the first step reached.
+        """
+        alert_id = uuid.uuid4().hex[:12]
+        summary = sms_summary(message_text)
+        escalations = [
+            Escalation(alert_id, str(group_id), group_name, message_text, r.subscription_id, r.phone_number,
+                       r.telegram_user_id, r.ack_timeout_seconds or ESCALATION_ACK_TIMEOUT_SECONDS, summary=summary)
+            for r in recipients
+        ]
+        return await self._run(escalations)
+
+    async def acknowledge(self, key):
+        """
+        Stops the ladder for one recipient of one alert. Returns False if it was already acknowledged.
+        """
+        if await conversation_store.get(ack_key(key)):
+            return False
+        escalation = self.wheel.cancel(key)
+        if escalation is not None:
+            self._unsaved.discard(escalation.timer_key)
+        await conversation_store.update(ack_key(key), acked_at=datetime.utcnow().isoformat())
+        async with get_session() as session:
+            await session.execute(
+                delete(EscalationTimer).where(EscalationTimer.key.startswith(f"{key}:", autoescape=True))
+                .execution_options(synchronize_session=False)
+            )
+            await session.commit()
+        ESCALATION_ACKS.inc(step=self.ladder[escalation.step - 1] if escalation else "unknown")
+        return True
+
+    async def _run(self, escalations):
+        """
+        Runs each escalation's current step. Recipients a step could not reach move
+        on to the next step at once; the rest wait out their ack timeout first.
+        """
+        reached = 0
+        scheduled = []
+        while escalations:
+            by_step = {}
+            for escalation in escalations:
+                by_step.setdefault(self.ladder[escalation.step], []).append(escalation)
+            escalations = []
+            for step, batch in by_step.items():
+                failed = await getattr(self, f"_step_{step}")(batch)
+                ESCALATION_STEPS_TOTAL.inc(len(batch) - len(failed), step=step, outcome="sent")
+                ESCALATION_STEPS_TOTAL.inc(len(failed), step=step, outcome="failed")
+                failed_keys = {escalation.key for escalation in failed}
+                for escalation in batch:
+                    escalation.step += 1
+                    if escalation.key in failed_keys:
+                        if escalation.step < len(self.ladder):
+                            escalations.append(escalation)
+                        continue
+                    reached += 1
+                    if escalation.step < len(self.ladder):
+                        scheduled.append(escalation)
+        await self._schedule(scheduled)
+        return reached
+
+    async def _schedule(self, escalations):
+        """
+        Saves each escalation's next step, then sets its timer.
+        """
+        if not escalations:
+            return
+        now = datetime.utcnow()
+        await self._save([(escalation, now + timedelta(seconds=escalation.ack_timeout_seconds)) for escalation in escalations])
+        for escalation in escalations:
+            self.wheel.schedule(escalation.key, escalation.ack_timeout_seconds, escalation)
+
+    async def _save(self, timers):
+        """
+        Writes (escalation, due_at) pairs to escalation_timers. Steps that cannot be
+        written are remembered as unsaved, so they still run here without a claim.
+        """
+        try:
+            async with get_session() as session:
+                session.add_all([
+                    EscalationTimer(key=escalation.timer_key, payload=asdict(escalation), due_at=due_at)
+                    for escalation, due_at in timers
+                ])
+                await session.commit()
+        except Exception as e:
+            self._unsaved.update(escalation.timer_key for escalation, _ in timers)
+            logger.exception("Failed to save %d escalation steps; they run from this process only: %s", len(timers), e)
+            return False
+        self._unsaved.difference_update(escalation.timer_key for escalation, _ in timers)
+        return True
+
+    async def _claim(self, escalations):
+        """
+        Deletes the escalations' saved steps and returns those whose row this call
+        removed; the rest already ran in another process or were acknowledged.
+        Unsaved steps have no row and belong to this process alone.
+        """
+        unsaved = {escalation.timer_key for escalation in escalations} & self._unsaved
+        self._unsaved -= unsaved
+        local = [escalation for escalation in escalations if escalation.timer_key in unsaved]
+        by_key = {escalation.timer_key: escalation for escalation in escalations if escalation.timer_key not in unsaved}
+        if not by_key:
+            return local
+        async with get_session() as session:
+            if engine.dialect.name == "postgresql":
+                claimed = set((await session.execute(
+                    delete(EscalationTimer).where(EscalationTimer.key.in_(list(by_key)))
+                    .returning(EscalationTimer.key).execution_options(synchronize_session=False)
+                )).scalars())
+            else:
+                # No DELETE ... RETURNING here; SQLite serialises writers, so row counts are exact.
+                claimed = set()
+                for key in by_key:
+                    result = await session.execute(
+                        delete(EscalationTimer).where(EscalationTimer.key == key).execution_options(synchronize_session=False)
+                    )
+                    if result.rowcount:
+                        claimed.add(key)
+            await session.commit()
+        return local + [escalation for key, escalation in by_key.items() if key in claimed]
+
+    async def _step_telegram(self, batch):
+        from telegram import InlineKeyboardButton, InlineKeyboardMarkup
+        try:
+            bot = await self._get_bot()
+        except Exception as e:
+            logger.warning("No Telegram bot for alerts, skipping to the next step: %s", e)
+            return list(batch)
+
+        async def send(escalation):
+            if not escalation.telegram_user_id:
+                return False
+            if escalation.step + 1 < len(self.ladder):
+                fallback = "call" if self.ladder[escalation.step + 1] == "call" else "text"
+                note = f"Tap Acknowledge within {escalation.ack_timeout_seconds}s or we will {fallback} you."
+            else:
+                note = "Tap Acknowledge to confirm you have seen it."
+            await self.telegram_limiter.acquire()
+            try:
+                sent = await bot.send_message(
+                    chat_id=escalation.telegram_user_id,
+                    text=f"🚨 {escalation.call_message}\n\n{note}",
+                    reply_markup=InlineKeyboardMarkup([[
+                        InlineKeyboardButton("Acknowledge", callback_data=ack_key(escalation.key)),
+                    ]]),
+                )
+            except Exception as e:
+                logger.warning("Telegram alert to subscription %s failed: %s", escalation.subscription_id, e)
+                return False
+            call_log_writer.record(escalation.subscription_id, "telegram", str(sent.message_id))
+            return True
+
+        results = await asyncio.gather(*(send(escalation) for escalation in batch))
+        return [escalation for escalation, ok in zip(batch, results) if not ok]
+
+    async def _step_sms(self, batch):
+        async def send(escalation):
+            await self.sms_limiter.acquire()
+            sid = await send_sms_async(escalation.phone_number, escalation.sms_message)
+            call_log_writer.record(escalation.subscription_id, "sms", sid or "failed")
+            if sid:
+                call_log_writer.record_event("sms", group_id=escalation.group_id, subscription_id=escalation.subscription_id)
+            return sid is not None
+
+        results = await asyncio.gather(*(send(escalation) for escalation in batch))
+        return [escalation for escalation, ok in zip(batch, results) if not ok]
+
+    async def _step_call(self, batch):
+        failed = []
+        by_alert = {}
+        for escalation in batch:
+            by_alert.setdefault(escalation.alert_id, []).append(escalation)
+        for escalations in by_alert.values():
+            first = escalations[0]
+            by_number = {escalation.phone_number: escalation for escalation in escalations}
+            # Each alert gets its own rooms, sharded so none exceeds the conference capacity.
+            rooms = room_allocator.allocate(first.group_id, list(by_number))
+            placed = 0
+            suppressed = 0
+            async for number, room, call_sid, outcome in dial_engine.dial_rooms(rooms, wait_url=None, message=first.call_message):
+                logger.debug("Conference call %s for %s in %s with SID: %s", outcome, number, room, call_sid)
+                subscription_id = by_number[number].subscription_id
+                call_log_writer.record_event("dialed" if outcome == "placed" else outcome, group_id=first.group_id,
+                                             subscription_id=subscription_id, call_sid=call_sid)
+                if outcome == "suppressed":
+                    # Already on a call (e.g. for another group's alert) or dialed too often.
+                    call_log_writer.record(subscription_id, "suppressed", "dial guard")
+                    suppressed += 1
+                    continue
+                call_log_writer.record(subscription_id, "initiated", call_sid or "failed")
+                if call_sid is None:
+                    failed.append(by_number[number])
+                placed += call_sid is not None
+            logger.info("Placed %d of %d calls for group %s in %d room(s); %d suppressed by the dial guard.",
+                        placed, len(by_number), first.group_id, len(rooms), suppressed)
+        # Write the whole broadcast's call logs in one transaction.
+        call_log_writer.request_flush()
+        return failed
+
+    async def _escalate(self, due):
+        due = await self._claim(due)
+        acked = await conversation_store.get_many([ack_key(escalation.key) for escalation in due])
+        pending = [escalation for escalation in due if ack_key(escalation.key) not in acked]
+        if pending:
+            await self._run(pending)
+
+    async def _tick(self):
+        swept_at = time.monotonic()
+        while True:
+            await asyncio.sleep(self.wheel.tick)
+            if time.monotonic() - swept_at >= ESCALATION_ORPHAN_SECONDS:
+                swept_at = time.monotonic()
+                try:
+                    await self.restore(overdue_by=ESCALATION_ORPHAN_SECONDS)
+                except Exception as e:
+                    logger.exception("Failed to load orphaned escalation steps: %s", e)
+            due = [escalation for _, escalation in self.wheel.advance()]
+            if not due:
+                continue
+            # Steps run as their own tasks so a slow batch of calls never delays the next tick.
+            task = asyncio.create_task(self._escalate(due))
+            self._inflight.add(task)
+            task.add_done_callback(self._finished)
+
+    def _finished(self, task):
+        self._inflight.discard(task)
+        if not task.cancelled() and task.exception() is not None:
+            logger.error("Escalation step failed: %s", task.exception(), exc_info=task.exception())
+
+    async def restore(self, overdue_by=None):
+        """
+        Loads saved steps into the wheel: all of them on startup, or only those
+        at least `overdue_by` seconds late, whose process has died. Loading
+        claims nothing; a step runs wherever its row is deleted first.
+        """
+        query = select(EscalationTimer)
+        if overdue_by is not None:
+            query = query.where(EscalationTimer.due_at <= datetime.utcnow() - timedelta(seconds=overdue_by))
+        async with get_session() as session:
+            rows = (await session.execute(query)).scalars().all()
+        now = datetime.utcnow()
+        restored = 0
+        for row in rows:
+            escalation = Escalation(**row.payload)
+            if escalation.step < len(self.ladder) and escalation.key not in self.wheel:
+                self.wheel.schedule(escalation.key, (row.due_at - now).total_seconds(), escalation)
+                restored += 1
+        if restored:
+            logger.info("Restored %d pending escalation steps.", restored)
+
+    async def start(self):
+        if self._task is None:
+            await self.restore()
+            self._task = asyncio.create_task(self._tick())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+        await asyncio.gather(*list(self._inflight), return_exceptions=True)
+        # Pending steps are already saved, bar any whose save failed; whichever process starts next takes them over.
+        timers = self.wheel.snapshot()
+        unsaved = [(escalation, datetime.utcfromtimestamp(due_at)) for _, escalation, due_at in timers
+                   if escalation.timer_key in self._unsaved]
+        if unsaved and not await self._save(unsaved):
+            logger.error("Dropping %d escalation steps that could not be saved.", len(unsaved))
+        for key, _, _ in timers:
+            self.wheel.cancel(key)
+        self._unsaved.clear()
+        if self._owns_bot:
+            await self._bot.shutdown()
+            self._bot, self._owns_bot = None, False
+
+
+escalation_engine = EscalationEngine()
+Gauge("escalation_steps_pending", "Escalation steps waiting on an ack timeout in this process.").set_function(
+    lambda: len(escalation_engine.wheel)
+)
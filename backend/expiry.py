@@ -0,0 +1,118 @@
+# backend/expiry.py
+import os
+import logging
+from datetime import datetime, timedelta
+from sqlalchemy import select, update
+from db.internal_database import get_session
+from models.alert_subscription import AlertSubscription
+from backend.subscription_index import subscription_index
+
+logger = logging.getLogger(__name__)
+
+EXPIRY_SWEEP_ENABLED = os.getenv("EXPIRY_SWEEP_ENABLED", "true").lower() == "true"
+EXPIRY_SWEEP_INTERVAL_SECONDS = int(os.getenv("EXPIRY_SWEEP_INTERVAL_SECONDS", "300"))
+EXPIRY_BATCH_SIZE = int(os.getenv("EXPIRY_BATCH_SIZE", "1000"))
+RENEWAL_REMINDER_DAYS = int(os.getenv("RENEWAL_REMINDER_DAYS", "3"))
+
+
+async def deactivate_expired(now=None, batch_size=EXPIRY_BATCH_SIZE):
+    """
+    Deactivates every active subscription whose period has ended, one batch per
+    transaction. Returns the set of affected group ids.
+    """
+    now = now or datetime.utcnow()
+    groups = set()
+    while True:
+        async with get_session() as session:
+            rows = (await session.execute(
+                select(AlertSubscription.id, AlertSubscription.group_id)
+                .where(AlertSubscription.active == True, AlertSubscription.subscription_end < now)
+                .order_by(AlertSubscription.subscription_end)
+                .limit(batch_size)
+                .with_for_update(skip_locked=True)
+            )).all()
+            if not rows:
+                break
+            await session.execute(
+                update(AlertSubscription)
+                .where(AlertSubscription.id.in_([row.id for row in rows]))
+                .values(active=False)
+                .execution_options(synchronize_session=False)
+            )
+            await session.commit()
+        groups.update(row.group_id for row in rows)
+        logger.info("Deactivated %d expired alert subscriptions.", len(rows))
+        if len(rows) < batch_size:
+            break
+    return groups
+
+
+async def claim_renewal_reminders(now=None, batch_size=EXPIRY_BATCH_SIZE):
+    """
+    Marks and returns (telegram_user_id, group_id, subscription_end) for active
+    subscriptions ending within RENEWAL_REMINDER_DAYS that have not been reminded yet.
+    """
+    now = now or datetime.utcnow()
+    async with get_session() as session:
+        rows = (await session.execute(
+            select(AlertSubscription.id, AlertSubscription.telegram_user_id,
+                   AlertSubscription.group_id, AlertSubscription.subscription_end)
+            .where(
+                AlertSubscription.active == True,
+                AlertSubscription.subscription_end >= now,
+                AlertSubscription.subscription_end < now + timedelta(days=RENEWAL_REMINDER_DAYS),
+                AlertSubscription.reminder_sent_at.is_(None),
+            )
+            .limit(batch_size)
+            .with_for_update(skip_locked=True)
+        )).all()
+        if rows:
+            await session.execute(
+                update(AlertSubscription)
+                .where(AlertSubscription.id.in_([row.id for row in rows]))
+                .values(reminder_sent_at=now)
+                .execution_options(synchronize_session=False)
+            )
+            await session.commit()
+    return [(row.telegram_user_id, row.group_id, row.subscription_end) for row in rows]
+
+
+async def run_expiry_sweep(bot=None):
+    """
+    One sweep: deactivate lapsed subscriptions, drop their groups from the
+    recipient index, then send renewal reminders.
+    """
+    try:
+        for group_id in await deactivate_expired():
+            subscription_index.invalidate(group_id)
+        reminders = await claim_renewal_reminders()
+    except Exception as e:
+        logger.exception("Subscription expiry sweep failed: %s", e)
+        return
+    if bot is None:
+        return
+    for telegram_user_id, group_id, subscription_end in reminders:
+        try:
+            await bot.send_message(
+                chat_id=int(telegram_user_id),
+                text=(f"Your AlertsBySyncGram subscription for group {group_id} ends on "
+                      f"{subscription_end:%Y-%m-%d}. Use /start to renew it."),
+            )
+        except Exception as e:
+            logger.warning("Could not send renewal reminder to %s: %s", telegram_user_id, e)
+
+
+def build_expiry_scheduler(bot=None):
+    from apscheduler.schedulers.asyncio import AsyncIOScheduler
+    scheduler = AsyncIOScheduler(timezone="UTC")
+    scheduler.add_job(
+        run_expiry_sweep,
+        "interval",
+        seconds=EXPIRY_SWEEP_INTERVAL_SECONDS,
+        args=[bot],
+        id="subscription_expiry_sweep",
+        max_instances=1,
+        coalesce=True,
+        next_run_time=datetime.utcnow(),
+    )
+    return scheduler
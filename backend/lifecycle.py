@@ -0,0 +1,68 @@
+# backend/lifecycle.py
+import asyncio
+import logging
+from backend.call_service import close_async_client
+from backend.paystack import close_paystack_client
+from backend.call_worker import worker_pool
+from backend.alerts import signal_coalescer
+from backend.call_log_writer import call_log_writer
+from backend.escalation import escalation_engine
+from backend.caller_ids import caller_id_pool
+from backend.subscription_index import subscription_index
+from bot.state_store import conversation_store
+from backend.expiry import EXPIRY_SWEEP_ENABLED, build_expiry_scheduler
+from backend.analytics import ANALYTICS_ENABLED, build_analytics_scheduler
+from db.external_ormar_config import connect_external, disconnect_external
+from db.internal_database import dispose_async_engine
+
+logger = logging.getLogger(__name__)
+
+_expiry_scheduler = None
+_analytics_scheduler = None
+
+async def on_startup(application):
+    """
+    Starts background services on the bot's event loop (wired as the Application post_init hook).
+    """
+    global _expiry_scheduler, _analytics_scheduler
+    await connect_external()
+    call_log_writer.start()
+    conversation_store.start()
+    await subscription_index.warm()
+    subscription_index.start()
+    if application is not None:
+        escalation_engine.bind_bot(application.bot)
+    await escalation_engine.start()
+    caller_id_pool.start()
+    if worker_pool.size > 0:
+        worker_pool.start()
+        logger.info("Started %d in-process call workers.", worker_pool.size)
+    if EXPIRY_SWEEP_ENABLED:
+        _expiry_scheduler = build_expiry_scheduler(application.bot if application else None)
+        _expiry_scheduler.start()
+    if ANALYTICS_ENABLED:
+        _analytics_scheduler = build_analytics_scheduler()
+        _analytics_scheduler.start()
+
+async def on_shutdown(application):
+    """
+    Stops background services (wired as the Application post_shutdown hook).
+    """
+    global _expiry_scheduler, _analytics_scheduler
+    if _expiry_scheduler is not None:
+        _expiry_scheduler.shutdown(wait=False)
+        _expiry_scheduler = None
+    if _analytics_scheduler is not None:
+        _analytics_scheduler.shutdown(wait=False)
+        _analytics_scheduler = None
+    await signal_coalescer.flush_all()
+    await worker_pool.stop()
+    await escalation_engine.stop()
+    await caller_id_pool.stop()
+    await subscription_index.stop()
+    await conversation_store.stop()
+    await asyncio.to_thread(call_log_writer.stop)
+    await close_async_client()
+    await close_paystack_client()
+    await dispose_async_engine()
+    await disconnect_external()
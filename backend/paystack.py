@@ -1,44 +1,82 @@
 # backend/paystack.py
 import os
+import hmac
 import uuid
-import requests
+import asyncio
+import hashlib
+import logging
+import weakref
 
-def initiate_paystack_payment(amount: int, subscription_id: int, callback_url: str, customer_email: str, customer_name: str = "") -> str:
+logger = logging.getLogger(__name__)
+
+PAYSTACK_BASE_URL = os.getenv("PAYSTACK_BASE_URL", "https://api.paystack.co")  # Override to point at a local stub.
+PAYSTACK_TIMEOUT = float(os.getenv("PAYSTACK_TIMEOUT", "10"))
+PAYSTACK_MAX_CONNECTIONS = int(os.getenv("PAYSTACK_MAX_CONNECTIONS", "20"))
+
+# One pooled client per event loop, like the Twilio client in call_service.
+_clients = weakref.WeakKeyDictionary()
+
+
+def get_paystack_client():
+    loop = asyncio.get_running_loop()
+    client = _clients.get(loop)
+    if client is None:
+        import httpx  # Loaded on first payment call rather than at import.
+        client = httpx.AsyncClient(
+            base_url=PAYSTACK_BASE_URL,
+            timeout=PAYSTACK_TIMEOUT,
+            limits=httpx.Limits(max_connections=PAYSTACK_MAX_CONNECTIONS, max_keepalive_connections=PAYSTACK_MAX_CONNECTIONS),
+        )
+        _clients[loop] = client
+    return client
+
+
+async def close_paystack_client():
+    client = _clients.pop(asyncio.get_running_loop(), None)
+    if client is not None:
+        await client.aclose()
+
+
+def _headers():
+    secret_key = os.getenv("PAYSTACK_SECRET_KEY")
+    if not secret_key:
+        return None
+    return {
+        "Authorization": f"Bearer {secret_key}",
+        "Content-Type": "application/json"
+    }
+
+
+async def initiate_paystack_payment(amount: int, subscription_id: int, callback_url: str, customer_email: str,
+                                    customer_name: str = "", reference: str = None) -> str:
     """
     Initiates a payment with Paystack and returns the payment authorization URL.
     
     Parameters:
       amount (int): The amount to charge the customer in NGN. (Converted to kobo internally)
-      subscription_id (int): Your internal subscription ID (for metadata if desired).
+      subscription_id (int): Your internal subscription ID, sent as transaction metadata.
       callback_url (str): The URL to redirect the customer after the transaction.
       customer_email (str): The customer's email address.
       customer_name (str): The customer's name (optional).
+      reference (str): Transaction reference to verify the payment with later (generated if omitted).
       
     Returns:
       str: The authorization URL (payment URL) if successful, otherwise None.
     """
-    endpoint = "https://api.paystack.co/transaction/initialize"
-    secret_key = os.getenv("PAYSTACK_SECRET_KEY")
-    if not secret_key:
-        print("PAYSTACK_SECRET_KEY is not set in environment.")
+    headers = _headers()
+    if not headers:
+        logger.error("PAYSTACK_SECRET_KEY is not set in environment.")
         return None
 
-    headers = {
-        "Authorization": f"Bearer {secret_key}",
-        "Content-Type": "application/json"
-    }
-    
-    # Generate a unique transaction reference.
-    reference = str(uuid.uuid4())
-    
     # Paystack expects the amount in kobo (i.e., NGN * 100).
     payload = {
         "amount": amount * 100,  # Convert NGN to kobo.
         "email": customer_email,
-        "reference": reference,
+        "reference": reference or str(uuid.uuid4()),
         "callback_url": callback_url,
         "currency": "NGN",
         "channels": ["card", "bank_transfer"],
+        "metadata": {"subscription_id": subscription_id},
         "customer": {
             "name": customer_name,
             "email": customer_email
@@ -46,19 +84,50 @@ def initiate_paystack_payment(amount: int, subscription_id: int, callback_url: s
     }
     
     try:
-        response = requests.post(endpoint, json=payload, headers=headers)
+        response = await get_paystack_client().post("/transaction/initialize", json=payload, headers=headers)
         if response.status_code == 200:
             data = response.json()
             if data.get("status") is True:
-                authorization_url = data.get("data", {}).get("authorization_url")
-                return authorization_url
-            else:
-                print("Paystack API error:", data.get("message"))
-                return None
-        else:
-            print("Error initiating Paystack payment, status code:", response.status_code)
-            print(response.text)
+                return data.get("data", {}).get("authorization_url")
+            logger.error("Paystack API error: %s", data.get("message"))
+            return None
+        logger.error("Error initiating Paystack payment, status code: %s: %s", response.status_code, response.text)
+        return None
+    except Exception as e:
+        logger.error("Exception during Paystack payment initiation: %s", e)
+        return None
+
+
+async def verify_paystack_transaction(reference: str):
+    """
+    Looks up a transaction by reference.
+
+    Returns:
+      dict: Paystack's transaction data if the transaction succeeded, otherwise None.
+    """
+    headers = _headers()
+    if not headers or not reference:
+        return None
+    try:
+        response = await get_paystack_client().get(f"/transaction/verify/{reference}", headers=headers)
+        if response.status_code != 200:
+            logger.warning("Paystack verify for %s returned status code %s", reference, response.status_code)
             return None
+        data = response.json().get("data") or {}
+        if data.get("status") == "success":
+            return data
+        return None
     except Exception as e:
-        print("Exception during Paystack payment initiation:", str(e))
+        logger.error("Exception during Paystack verification of %s: %s", reference, e)
         return None
+
+
+def is_valid_webhook_signature(body: bytes, signature: str) -> bool:
+    """
+    Checks the x-paystack-signature header (HMAC-SHA512 of the raw body with the secret key).
+    """
+    secret_key = os.getenv("PAYSTACK_SECRET_KEY")
+    if not secret_key or not signature:
+        return False
+    expected = hmac.new(secret_key.encode(), body, hashlib.sha512).hexdigest()
+    return hmac.compare_digest(expected, signature)
@@ -0,0 +1,176 @@
+# backend/rooms.py
+import os
+import time
+import uuid
+import logging
+import threading
+from dataclasses import dataclass, field
+from utils.metrics import Gauge
+
+logger = logging.getLogger(__name__)
+
+# Most participants placed in one conference; Twilio caps a conference at 250.
+CONFERENCE_CAPACITY = int(os.getenv("CONFERENCE_CAPACITY", "250"))
+CONFERENCE_ROOM_PREFIX = os.getenv("CONFERENCE_ROOM_PREFIX", "alert")
+# Rooms whose calls never all report a final status are forgotten after this long.
+CONFERENCE_ROOM_TTL_SECONDS = float(os.getenv("CONFERENCE_ROOM_TTL_SECONDS", "7200"))
+
+FINAL_CALL_STATUSES = {"completed", "busy", "no-answer", "failed", "canceled"}
+
+
+@dataclass
+class Room:
+    """
+    One conference for one shard of one signal's recipients.
+    state moves allocated -> active (first call placed) -> ended (every call finished).
+    """
+    name: str
+    group_id: str
+    signal_id: str
+    shard: int
+    numbers: tuple
+    created_at: float = field(default_factory=time.monotonic)
+    state: str = "allocated"
+    calls: dict = field(default_factory=dict)  # call sid -> latest status
+    pending_dials: int = 0  # numbers not yet handed to Twilio
+    ended_at: float = None
+
+    @property
+    def live_calls(self):
+        return sum(1 for status in self.calls.values() if status not in FINAL_CALL_STATUSES)
+
+
+def room_name(group_id, signal_id, shard):
+    return f"{CONFERENCE_ROOM_PREFIX}-{group_id}-{signal_id}-{shard}"
+
+
+def parse_room_name(name):
+    """
+    Returns (group_id, signal_id, shard) for a room name built by room_name, or None.
+    """
+    prefix, _, rest = (name or "").partition("-")
+    head, _, shard = rest.rpartition("-")
+    group_id, _, signal_id = head.rpartition("-")
+    if prefix != CONFERENCE_ROOM_PREFIX or not group_id or not signal_id or not shard.isdigit():
+        return None
+    return group_id, signal_id, int(shard)
+
+
+def shard_numbers(numbers, capacity=CONFERENCE_CAPACITY):
+    """
+    Splits numbers into the fewest shards of at most `capacity`, balanced in size.
+    """
+    numbers = list(numbers)
+    if not numbers:
+        return []
+    shards = -(-len(numbers) // max(1, capacity))
+    size, extra = divmod(len(numbers), shards)
+    result, start = [], 0
+    for i in range(shards):
+        end = start + size + (1 if i < extra else 0)
+        result.append(tuple(numbers[start:end]))
+        start = end
+    return result
+
+
+class RoomAllocator:
+    """
+    Hands out a fresh set of conference rooms per signal, so overlapping signals
+    and groups with the same name never share a conference, and no room exceeds
+    `capacity` participants. Room lifecycle is tracked in memory, per process,
+    from the dialer and the Twilio status callbacks.
+    """
+
+    def __init__(self, capacity=CONFERENCE_CAPACITY, ttl=CONFERENCE_ROOM_TTL_SECONDS):
+        self.capacity = capacity
+        self.ttl = ttl
+        self._rooms = {}
+        self._lock = threading.Lock()
+
+    def allocate(self, group_id, numbers):
+        """
+        Returns the rooms for one signal; every number appears in exactly one room.
+        """
+        self.sweep()
+        signal_id = uuid.uuid4().hex[:12]
+        rooms = [
+            Room(name=room_name(group_id, signal_id, shard), group_id=str(group_id), signal_id=signal_id,
+                 shard=shard, numbers=members, pending_dials=len(members))
+            for shard, members in enumerate(shard_numbers(numbers, self.capacity))
+        ]
+        with self._lock:
+            for room in rooms:
+                self._rooms[room.name] = room
+        if len(rooms) > 1:
+            logger.info("Signal %s for group %s sharded across %d conference rooms.", signal_id, group_id, len(rooms))
+        return rooms
+
+    def get(self, name):
+        return self._rooms.get(name)
+
+    def record_dial(self, name, call_sid):
+        """
+        Records the outcome of one calls.create for a room; call_sid is None when Twilio rejected it.
+        """
+        with self._lock:
+            room = self._rooms.get(name)
+            if room is None:
+                return
+            room.pending_dials = max(0, room.pending_dials - 1)
+            if call_sid:
+                room.calls[call_sid] = "queued"
+                room.state = "active"
+            self._maybe_end(room)
+
+    def expect_redial(self, name):
+        """
+        Keeps (or reopens) a room for a retry that is scheduled but not yet placed; pair with record_dial.
+        """
+        with self._lock:
+            room = self._rooms.get(name)
+            if room is not None:
+                room.pending_dials += 1
+                room.state, room.ended_at = "active", None
+
+    def on_call_status(self, name, call_sid, status):
+        """
+        Applies a Twilio status callback; the room ends once every call in it is final.
+        """
+        with self._lock:
+            room = self._rooms.get(name)
+            if room is None or call_sid not in room.calls:
+                return
+            room.calls[call_sid] = status
+            self._maybe_end(room)
+
+    def _maybe_end(self, room):
+        if room.state != "ended" and room.pending_dials == 0 and room.live_calls == 0:
+            room.state, room.ended_at = "ended", time.monotonic()
+
+    def sweep(self, retention=60.0):
+        """
+        Forgets rooms that ended more than `retention` seconds ago or outlived the TTL.
+        Rooms are kept briefly after ending so a late redial can reopen them.
+        """
+        now = time.monotonic()
+        with self._lock:
+            stale = [
+                name for name, room in self._rooms.items()
+                if (room.ended_at is not None and now - room.ended_at > retention) or now - room.created_at > self.ttl
+            ]
+            for name in stale:
+                del self._rooms[name]
+        return len(stale)
+
+    def count(self, state=None):
+        return sum(1 for room in list(self._rooms.values()) if state is None or room.state == state)
+
+    def stats(self):
+        rooms = list(self._rooms.values())
+        return {state: sum(1 for room in rooms if room.state == state) for state in ("allocated", "active", "ended")}
+
+
+room_allocator = RoomAllocator()
+Gauge("conference_rooms_open", "Conference rooms allocated or active in this process.").set_function(
+    lambda: room_allocator.count("allocated") + room_allocator.count("active")
+)
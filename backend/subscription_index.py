@@ -0,0 +1,264 @@
+# backend/subscription_index.py
+import os
+import time
+import asyncio
+import logging
+import threading
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta, timezone
+import numpy as np
+from sqlalchemy import select
+from db.internal_database import get_session
+from models.group import Group
+from models.alert_subscription import AlertSubscription
+from utils.call_windows import window_mask, local_minutes_of_day
+
+logger = logging.getLogger(__name__)
+
+# Entries older than this are reloaded regardless; a backstop for changes the refresh below misses.
+SUBSCRIPTION_INDEX_MAX_AGE_SECONDS = float(os.getenv("SUBSCRIPTION_INDEX_MAX_AGE_SECONDS", "300"))
+# How often each process drops the groups whose subscriptions another process changed (by updated_at),
+# so an activation or expiry is seen everywhere within about this long.
+SUBSCRIPTION_INDEX_REFRESH_SECONDS = float(os.getenv("SUBSCRIPTION_INDEX_REFRESH_SECONDS", "5"))
+
+
+@dataclass(frozen=True)
+class Recipient:
+    subscription_id: int
+    phone_number: str
+    window_start: int  # minute of day, subscriber's local time
+    window_end: int
+    timezone: str = "UTC"
+    expires_at: float = float("inf")  # subscription_end as a UTC timestamp
+    telegram_user_id: str = None  # also the chat id of the subscriber's DM with the bot
+    ack_timeout_seconds: int = None  # None means ESCALATION_ACK_TIMEOUT_SECONDS
+
+
+@dataclass
+class GroupEntry:
+    """
+    A group's recipients plus their call windows and expiry laid out as NumPy
+    arrays, so eligibility for a whole group is one vectorized pass.
+    """
+    group_id: str
+    name: str
+    recipients: tuple = ()
+    loaded_at: float = field(default_factory=time.monotonic)
+    starts: np.ndarray = field(default=None, repr=False)
+    ends: np.ndarray = field(default=None, repr=False)
+    expires: np.ndarray = field(default=None, repr=False)
+    timezones: tuple = field(default=(), repr=False)
+    tz_codes: np.ndarray = field(default=None, repr=False)
+
+    def __post_init__(self):
+        self.recipients = tuple(self.recipients)
+        self.timezones = tuple(sorted({r.timezone for r in self.recipients}))
+        codes = {name: code for code, name in enumerate(self.timezones)}
+        count = len(self.recipients)
+        self.starts = np.fromiter((r.window_start for r in self.recipients), dtype=np.int32, count=count)
+        self.ends = np.fromiter((r.window_end for r in self.recipients), dtype=np.int32, count=count)
+        self.expires = np.fromiter((r.expires_at for r in self.recipients), dtype=np.float64, count=count)
+        self.tz_codes = np.fromiter((codes[r.timezone] for r in self.recipients), dtype=np.int32, count=count)
+
+    def eligible_recipients(self, now=None):
+        """
+        Unexpired recipients whose call window contains the current time in their own timezone.
+        """
+        if not self.recipients:
+            return []
+        now = now or datetime.now(timezone.utc)
+        local = local_minutes_of_day(now, self.timezones, self.tz_codes)
+        mask = window_mask(self.starts, self.ends, local) & (self.expires > now.timestamp())
+        return [self.recipients[i] for i in np.flatnonzero(mask)]
+
+
+def _recipient(subscription_id, phone_number, window_start, window_end, tz_name, subscription_end=None,
+               telegram_user_id=None, ack_timeout_seconds=None):
+    expires_at = subscription_end.replace(tzinfo=timezone.utc).timestamp() if subscription_end else float("inf")
+    return Recipient(subscription_id, phone_number, window_start, window_end, tz_name or "UTC", expires_at,
+                     telegram_user_id, ack_timeout_seconds)
+
+
+class SubscriptionIndex:
+    """
+    Process-local map of telegram group id -> group and its active call recipients.
+    Entries are replaced wholesale on every change, so readers on the event loop
+    never see a half-updated recipient list. Changes made in other processes
+    reach it through `refresh_changed`, run every SUBSCRIPTION_INDEX_REFRESH_SECONDS.
+    """
+
+    def __init__(self, max_age=SUBSCRIPTION_INDEX_MAX_AGE_SECONDS):
+        self.max_age = max_age
+        self._groups = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.warmed_at = None
+        self._changed_since = datetime.utcnow()
+        self._task = None
+
+    async def _recipient_rows(self, session, telegram_group_id=None):
+        # Every selected column is in ix_alert_subscriptions_group_active, so this is index-only.
+        stmt = select(
+            AlertSubscription.group_id,
+            AlertSubscription.id,
+            AlertSubscription.phone_number,
+            AlertSubscription.call_window_start_minute,
+            AlertSubscription.call_window_end_minute,
+            AlertSubscription.timezone,
+            AlertSubscription.subscription_end,
+            AlertSubscription.telegram_user_id,
+            AlertSubscription.ack_timeout_seconds,
+        ).where(
+            AlertSubscription.active == True,
+            AlertSubscription.subscription_end > datetime.utcnow(),
+        )
+        if telegram_group_id is not None:
+            stmt = stmt.where(AlertSubscription.group_id == telegram_group_id)
+        return (await session.execute(stmt)).all()
+
+    async def warm(self):
+        """
+        Loads every group and its active recipients in two queries.
+        """
+        self._changed_since = datetime.utcnow()
+        async with get_session() as session:
+            names = dict((await session.execute(select(Group.telegram_group_id, Group.name))).all())
+            recipients = {}
+            for tg_id, *fields in await self._recipient_rows(session):
+                recipients.setdefault(tg_id, []).append(_recipient(*fields))
+        groups = {
+            tg_id: GroupEntry(group_id=tg_id, name=names.get(tg_id, tg_id), recipients=recipients.get(tg_id, ()))
+            for tg_id in names.keys() | recipients.keys()
+        }
+        with self._lock:
+            self._groups = groups
+        self.warmed_at = time.time()
+        logger.info("Subscription index warmed with %d groups, %d recipients.",
+                    len(groups), sum(len(r) for r in recipients.values()))
+
+    def get(self, telegram_group_id):
+        """
+        Returns the cached GroupEntry, or None if it is missing or stale.
+        """
+        entry = self._groups.get(telegram_group_id)
+        if entry is None or time.monotonic() - entry.loaded_at > self.max_age:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return entry
+
+    async def load_group(self, telegram_group_id, name="Unknown"):
+        """
+        Reloads one group from the database, creating the group record if needed.
+        """
+        async with get_session() as session:
+            group = (await session.execute(
+                select(Group).where(Group.telegram_group_id == telegram_group_id)
+            )).scalars().first()
+            if not group:
+                group = Group(telegram_group_id=telegram_group_id, name=name)
+                session.add(group)
+                await session.commit()
+                logger.info("Created internal group record for %s", name)
+            entry = GroupEntry(group_id=telegram_group_id, name=group.name, recipients=[
+                _recipient(*fields) for _, *fields in await self._recipient_rows(session, telegram_group_id)
+            ])
+        with self._lock:
+            self._groups[telegram_group_id] = entry
+        return entry
+
+    def upsert_subscription(self, alert_sub, group_name=None):
+        """
+        Applies a created or changed AlertSubscription without touching the database.
+        Inactive subscriptions are removed from the group's recipients.
+        """
+        telegram_group_id = alert_sub.group_id
+        with self._lock:
+            entry = self._groups.get(telegram_group_id)
+            recipients = [r for r in (entry.recipients if entry else ()) if r.subscription_id != alert_sub.id]
+            if alert_sub.active:
+                recipients.append(_recipient(
+                    alert_sub.id, alert_sub.phone_number, alert_sub.call_window_start_minute,
+                    alert_sub.call_window_end_minute, alert_sub.timezone, alert_sub.subscription_end,
+                    alert_sub.telegram_user_id, alert_sub.ack_timeout_seconds,
+                ))
+            self._groups[telegram_group_id] = GroupEntry(
+                group_id=telegram_group_id,
+                name=group_name or (entry.name if entry else telegram_group_id),
+                recipients=recipients,
+                loaded_at=entry.loaded_at if entry else time.monotonic(),
+            )
+
+    def remove_subscription(self, telegram_group_id, subscription_id):
+        with self._lock:
+            entry = self._groups.get(telegram_group_id)
+            if entry is None:
+                return
+            self._groups[telegram_group_id] = GroupEntry(
+                group_id=entry.group_id,
+                name=entry.name,
+                recipients=[r for r in entry.recipients if r.subscription_id != subscription_id],
+                loaded_at=entry.loaded_at,
+            )
+
+    def invalidate(self, telegram_group_id=None):
+        """
+        Drops one group (or every group) so the next lookup reloads it.
+        """
+        with self._lock:
+            if telegram_group_id is None:
+                self._groups = {}
+            else:
+                self._groups.pop(telegram_group_id, None)
+
+    async def refresh_changed(self, overlap=SUBSCRIPTION_INDEX_REFRESH_SECONDS):
+        """
+        Drops every cached group with a subscription updated since the last call.
+        Each window overlaps the previous one, so small clock differences between hosts lose nothing.
+        """
+        polled_at = datetime.utcnow()
+        async with get_session() as session:
+            group_ids = (await session.execute(
+                select(AlertSubscription.group_id).distinct()
+                .where(AlertSubscription.updated_at > self._changed_since - timedelta(seconds=overlap))
+            )).scalars().all()
+        self._changed_since = polled_at
+        for group_id in group_ids:
+            self.invalidate(group_id)
+        return group_ids
+
+    async def _run(self, interval):
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                await self.refresh_changed()
+            except Exception as e:
+                logger.exception("Subscription index refresh failed: %s", e)
+
+    def start(self, interval=SUBSCRIPTION_INDEX_REFRESH_SECONDS):
+        if self._task is None:
+            self._task = asyncio.create_task(self._run(interval))
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    def stats(self):
+        now = time.monotonic()
+        groups = list(self._groups.values())
+        lookups = self.hits + self.misses
+        return {
+            "groups": len(groups),
+            "recipients": sum(len(entry.recipients) for entry in groups),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": self.hits / lookups if lookups else None,
+            "oldest_entry_age_seconds": max((now - entry.loaded_at for entry in groups), default=0.0),
+            "warmed_at": self.warmed_at,
+        }
+
+
+subscription_index = SubscriptionIndex()
@@ -0,0 +1,60 @@
+# backend/subscriptions.py
+import logging
+import datetime
+from sqlalchemy import select, update
+from db.internal_database import get_session
+from models.alert_subscription import AlertSubscription
+from backend.subscription_index import subscription_index
+
+logger = logging.getLogger(__name__)
+
+SUBSCRIPTION_PRICE_NGN = 1000
+SUBSCRIPTION_DAYS = 30
+
+
+def payment_covers_subscription(transaction) -> bool:
+    """
+    True if a verified Paystack transaction paid at least the subscription price.
+    """
+    return transaction.get("currency", "NGN") == "NGN" and transaction.get("amount", 0) >= SUBSCRIPTION_PRICE_NGN * 100
+
+
+async def activate_alert_subscription(session, alert_sub):
+    """
+    Marks a paid alert subscription active for SUBSCRIPTION_DAYS and adds it to the recipient index.
+    Its payment reference is used up: a replayed charge.success or /payment_success for it,
+    even after the subscription has expired, changes nothing. Returns True if this call activated it.
+    """
+    activated = False
+    if alert_sub.paid_at is None:
+        now = datetime.datetime.utcnow()
+        # The paid_at check is part of the UPDATE, so concurrent deliveries of one charge activate it once.
+        result = await session.execute(
+            update(AlertSubscription)
+            .where(AlertSubscription.id == alert_sub.id, AlertSubscription.paid_at.is_(None))
+            .values(active=True, paid_at=now, subscription_start=now,
+                    subscription_end=now + datetime.timedelta(days=SUBSCRIPTION_DAYS))
+            .execution_options(synchronize_session=False)
+        )
+        await session.commit()
+        await session.refresh(alert_sub)
+        activated = result.rowcount > 0
+        if activated:
+            logger.info("Activated alert subscription %s for group %s", alert_sub.id, alert_sub.group_id)
+    else:
+        logger.info("Payment reference for alert subscription %s was already used; not extending it.", alert_sub.id)
+    subscription_index.upsert_subscription(alert_sub)
+    return activated
+
+
+async def activate_by_reference(reference: str):
+    """
+    Activates the subscription paid with the given Paystack reference. Returns it, or None if unknown.
+    """
+    async with get_session() as session:
+        alert_sub = (await session.execute(
+            select(AlertSubscription).where(AlertSubscription.payment_reference == reference)
+        )).scalars().first()
+        if alert_sub:
+            await activate_alert_subscription(session, alert_sub)
+        return alert_sub
@@ -0,0 +1,42 @@
+# backend/twilio_http.py
+# Imported lazily by backend.call_service: the Twilio SDK and aiohttp are only
+# loaded once the first call is placed.
+from aiohttp import ClientSession, ClientTimeout, TCPConnector
+from twilio.rest import Client
+from twilio.http.async_http_client import AsyncTwilioHttpClient
+
+
+class PooledTwilioHttpClient(AsyncTwilioHttpClient):
+    """
+    AsyncTwilioHttpClient that applies the client-wide timeout to every request.
+    The stock client forwards timeout=None to aiohttp, which disables it entirely.
+    Requests go to api_base_url instead of api.twilio.com when it is set.
+    """
+
+    def __init__(self, *args, api_base_url="", **kwargs):
+        super().__init__(*args, **kwargs)
+        self.api_base_url = api_base_url
+
+    async def request(self, method, url, timeout=None, **kwargs):
+        if self.api_base_url:
+            url = url.replace("https://api.twilio.com", self.api_base_url, 1)
+        return await super().request(method, url, timeout=timeout or self.timeout, **kwargs)
+
+
+def build_async_client(account_sid, auth_token, pool_size, timeout, api_base_url=""):
+    """
+    Twilio client whose requests share one pooled aiohttp session.
+    """
+    http_client = PooledTwilioHttpClient(pool_connections=False, timeout=timeout, api_base_url=api_base_url)
+    http_client.session = ClientSession(
+        connector=TCPConnector(limit=pool_size),
+        timeout=ClientTimeout(total=timeout),
+    )
+    return Client(account_sid, auth_token, http_client=http_client)
+
+
+def build_subaccount_client(parent, subaccount_sid):
+    """
+    Client acting on a subaccount with the parent's credentials, sharing the parent's connection pool.
+    """
+    return Client(parent.username, parent.password, account_sid=subaccount_sid, http_client=parent.http_client)
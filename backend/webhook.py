@@ -1,43 +1,168 @@
 # backend/webhook.py
 from fastapi import FastAPI, Request, Response
+from fastapi.responses import JSONResponse
+import os
+import hmac
+import asyncio
+import json
 import logging
-from backend.call_service import initiate_conference_call_with_callback
+from datetime import datetime, timedelta
+from backend.call_queue import call_queue
+from backend.call_service import close_async_client, create_conference_twiml
+from backend.call_log_writer import call_log_writer
+from backend.callback_pipeline import CallbackEvent, callback_pipeline
+from backend.paystack import close_paystack_client, is_valid_webhook_signature, verify_paystack_transaction
+from backend.subscriptions import activate_by_reference, payment_covers_subscription
+from backend.analytics import hourly_rollups, summarize
+from db.internal_database import dispose_async_engine
+from utils.metrics import CONTENT_TYPE, REGISTRY, Gauge
+from utils.logging_config import configure_logging
+from bot.application import TELEGRAM_MODE, TELEGRAM_WEBHOOK_PATH, TELEGRAM_WEBHOOK_SECRET, build_application
 
 app = FastAPI()
 logger = logging.getLogger(__name__)
 
-MAX_RETRIES = 3
+# Bearer token for the /analytics routes; they are disabled when it is unset.
+ANALYTICS_API_TOKEN = os.getenv("ANALYTICS_API_TOKEN")
+
+CALL_QUEUE_DEPTH = Gauge("call_queue_depth", "Call jobs pending or running, sampled on scrape.")
+
+# Set on startup when Telegram updates are delivered to this server (TELEGRAM_MODE=webhook).
+telegram_application = None
+
+@app.on_event("startup")
+async def start_background_services():
+    global telegram_application
+    # Worker processes spawned by uvicorn (WEB_CONCURRENCY > 1) never run main.py's setup;
+    # a no-op where logging is already configured.
+    configure_logging()
+    if TELEGRAM_MODE == "webhook" and not TELEGRAM_WEBHOOK_SECRET:
+        # Every update would be rejected with 403 and the bot would go silent.
+        raise RuntimeError("TELEGRAM_WEBHOOK_SECRET must be set when TELEGRAM_MODE=webhook.")
+    call_log_writer.start()
+    callback_pipeline.start()
+    if TELEGRAM_MODE == "webhook":
+        from backend.lifecycle import on_startup
+        telegram_application = build_application(polling=False)
+        await telegram_application.initialize()
+        await on_startup(telegram_application)
+        await telegram_application.start()
+        logger.info("Serving Telegram updates on %s", TELEGRAM_WEBHOOK_PATH)
+
+@app.on_event("shutdown")
+async def stop_background_services():
+    if telegram_application is not None:
+        from backend.lifecycle import on_shutdown
+        await telegram_application.stop()
+        await on_shutdown(telegram_application)
+        await telegram_application.shutdown()
+    await callback_pipeline.stop()
+    await close_async_client()
+    await close_paystack_client()
+    await dispose_async_engine()
+    await asyncio.to_thread(call_log_writer.stop)
+
+@app.post(TELEGRAM_WEBHOOK_PATH)
+async def telegram_update(request: Request) -> Response:
+    """
+    Receives a Telegram update and queues it on the bot Application running in this event loop.
+    """
+    if telegram_application is None:
+        return Response(status_code=404)
+    token = request.headers.get("X-Telegram-Bot-Api-Secret-Token", "")
+    if not TELEGRAM_WEBHOOK_SECRET or not hmac.compare_digest(token, TELEGRAM_WEBHOOK_SECRET):
+        logger.warning("Rejected Telegram update with an invalid secret token.")
+        return Response(status_code=403)
+    from telegram import Update
+    try:
+        update = Update.de_json(await request.json(), telegram_application.bot)
+    except Exception as e:
+        logger.warning("Malformed Telegram update: %s", e)
+        return Response(status_code=400)
+    await telegram_application.update_queue.put(update)
+    return Response(status_code=200)
 
 @app.post("/twilio/callback")
 async def twilio_callback(request: Request) -> Response:
+    """
+    Acknowledges a Twilio status callback immediately and hands it to the callback pipeline.
+    """
     try:
         data = await request.form()
-        call_sid = data.get("CallSid")
-        call_status = data.get("CallStatus")
-        
         params = request.query_params
-        number = params.get("number")
-        conference_room = params.get("conference_room")
-        message = params.get("message")
         try:
             retry_count = int(params.get("retry_count", "0"))
         except ValueError:
             retry_count = 0
-        
-        logger.info("Twilio callback: Call SID %s, Status %s, Number %s, Conference %s, Retry %s",
-                    call_sid, call_status, number, conference_room, retry_count)
-                    
-        if call_status not in ["completed", "busy"]:
-            if retry_count < MAX_RETRIES:
-                new_retry_count = retry_count + 1
-                logger.info("Call for %s in conference %s failed (status: %s). Retrying (attempt %s)...",
-                            number, conference_room, call_status, new_retry_count)
-                new_call_sid = initiate_conference_call_with_callback(number, conference_room, message=message, retry_count=new_retry_count)
-                logger.info("Retried call for %s with new Call SID: %s", number, new_call_sid)
-            else:
-                logger.info("Max retries reached for %s. No further retry.", number)
-        else:
-            logger.info("Call for %s ended with acceptable status: %s", number, call_status)
+        event = CallbackEvent(
+            call_sid=data.get("CallSid"),
+            status=data.get("CallStatus"),
+            number=params.get("number"),
+            conference_room=params.get("conference_room"),
+            message=params.get("message"),
+            retry_count=retry_count,
+            duration=int(data["CallDuration"]) if str(data.get("CallDuration", "")).isdigit() else None,
+            caller_id=data.get("From"),
+        )
+        logger.debug("Twilio callback: Call SID %s, Status %s, Number %s, Conference %s, Retry %s",
+                    event.call_sid, event.status, event.number, event.conference_room, event.retry_count)
+        if not callback_pipeline.submit(event):
+            logger.debug("Duplicate Twilio callback for %s (%s) ignored.", event.call_sid, event.status)
     except Exception as e:
         logger.exception("Error in Twilio callback: %s", e)
     return Response(status_code=204)
+
+@app.api_route("/twilio/twiml/{room}", methods=["GET", "POST"])
+async def twilio_twiml(room: str, wait_url: str = None) -> Response:
+    """
+    Serves the (cached) conference TwiML for calls placed with TWILIO_TWIML_BASE_URL set.
+    """
+    return Response(content=create_conference_twiml(room, wait_url or None), media_type="application/xml")
+
+@app.post("/paystack/webhook")
+async def paystack_webhook(request: Request) -> Response:
+    """
+    Activates alert subscriptions server-side when Paystack reports a successful charge.
+    """
+    body = await request.body()
+    if not is_valid_webhook_signature(body, request.headers.get("x-paystack-signature", "")):
+        logger.warning("Rejected Paystack webhook with an invalid signature.")
+        return Response(status_code=401)
+    try:
+        event = json.loads(body)
+        if event.get("event") == "charge.success":
+            reference = event.get("data", {}).get("reference")
+            # Re-verify with the API rather than trusting the event amount alone.
+            transaction = await verify_paystack_transaction(reference)
+            if transaction and payment_covers_subscription(transaction):
+                if await activate_by_reference(reference) is None:
+                    logger.warning("Paystack charge %s does not match any alert subscription.", reference)
+            else:
+                logger.warning("Paystack charge %s could not be verified.", reference)
+    except Exception as e:
+        logger.exception("Error in Paystack webhook: %s", e)
+    return Response(status_code=200)
+
+@app.get("/analytics/groups/{group_id}/hourly")
+async def group_hourly_analytics(group_id: str, request: Request, hours: int = 24) -> Response:
+    """
+    Hourly call rollups for one group over the last `hours` hours, with totals.
+    """
+    token = request.headers.get("Authorization", "").removeprefix("Bearer ")
+    if not ANALYTICS_API_TOKEN:
+        return Response(status_code=404)
+    if not hmac.compare_digest(token, ANALYTICS_API_TOKEN):
+        return Response(status_code=401)
+    rows = await hourly_rollups(group_id, datetime.utcnow() - timedelta(hours=max(1, min(hours, 24 * 90))))
+    return JSONResponse({"group_id": group_id, "hours": rows, "totals": summarize(rows)})
+
+@app.get("/metrics")
+async def metrics() -> Response:
+    """
+    Exposes hot-path counters and latency histograms in the Prometheus text format.
+    """
+    try:
+        CALL_QUEUE_DEPTH.set(await call_queue.depth())
+    except Exception as e:
+        logger.warning("Could not sample call queue depth: %s", e)
+    return Response(content=REGISTRY.render(), media_type=CONTENT_TYPE)
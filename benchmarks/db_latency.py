@@ -0,0 +1,107 @@
+# benchmarks/db_latency.py
+"""
+Latency of the group/recipient lookup on the sync SessionLocal path versus the
+async get_session path, with a heartbeat task measuring how long the event
+loop is stalled while the lookups run.
+
+    INTERNAL_DATABASE_URL=postgresql://... python -m benchmarks.db_latency
+    INTERNAL_DATABASE_URL=sqlite:////tmp/bench.db python -m benchmarks.db_latency  # needs aiosqlite
+"""
+import time
+import asyncio
+import datetime
+import statistics
+from sqlalchemy import select
+from db.internal_database import Base, engine, SessionLocal, get_session
+from models.alert_subscription import AlertSubscription
+
+GROUPS = 50
+SUBSCRIBERS_PER_GROUP = 100
+LOOKUPS = 200
+CONCURRENCY = 20
+
+
+def seed():
+    Base.metadata.create_all(bind=engine)
+    session = SessionLocal()
+    try:
+        if session.query(AlertSubscription).filter(AlertSubscription.group_id.like("bench-%")).count():
+            return
+        end = datetime.datetime.utcnow() + datetime.timedelta(days=365)
+        session.bulk_insert_mappings(AlertSubscription, [
+            {
+                "telegram_user_id": f"bench-{g}-{u}",
+                "group_id": f"bench-{g}",
+                "phone_number": f"+1555{g:03d}{u:04d}",
+                "subscription_end": end,
+                "active": True,
+            }
+            for g in range(GROUPS) for u in range(SUBSCRIBERS_PER_GROUP)
+        ])
+        session.commit()
+    finally:
+        session.close()
+
+
+def _recipients_stmt(telegram_group_id):
+    return select(AlertSubscription.id, AlertSubscription.phone_number).where(
+        AlertSubscription.group_id == telegram_group_id, AlertSubscription.active == True
+    )
+
+
+async def sync_lookup(n):
+    session = SessionLocal()
+    try:
+        return session.execute(_recipients_stmt(f"bench-{n % GROUPS}")).all()
+    finally:
+        session.close()
+
+
+async def async_lookup(n):
+    async with get_session() as session:
+        return (await session.execute(_recipients_stmt(f"bench-{n % GROUPS}"))).all()
+
+
+async def heartbeat(stalls, interval=0.001):
+    while True:
+        started = time.perf_counter()
+        await asyncio.sleep(interval)
+        stalls.append(time.perf_counter() - started - interval)
+
+
+async def run(lookup):
+    semaphore = asyncio.Semaphore(CONCURRENCY)
+    latencies, stalls = [], []
+
+    async def timed(n):
+        async with semaphore:
+            started = time.perf_counter()
+            await lookup(n)
+            latencies.append(time.perf_counter() - started)
+
+    await lookup(0)  # warm the pool
+    beat = asyncio.create_task(heartbeat(stalls))
+    await asyncio.sleep(0)  # let the heartbeat start its first sleep
+    started = time.perf_counter()
+    await asyncio.gather(*(timed(n) for n in range(LOOKUPS)))
+    elapsed = time.perf_counter() - started
+    await asyncio.sleep(0.002)  # let the heartbeat observe a stall that lasted until the end
+    beat.cancel()
+    latencies.sort()
+    return {
+        "p50_ms": statistics.median(latencies) * 1000,
+        "p95_ms": latencies[int(len(latencies) * 0.95) - 1] * 1000,
+        "lookups_per_s": LOOKUPS / elapsed,
+        "max_loop_stall_ms": max(stalls, default=0.0) * 1000,
+    }
+
+
+async def main():
+    seed()
+    for name, lookup in (("sync SessionLocal", sync_lookup), ("async get_session", async_lookup)):
+        result = await run(lookup)
+        print(f"{name:>18}: " + " ".join(f"{key}={value:.2f}" for key, value in result.items()))
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,122 @@
+# benchmarks/fake_paystack.py
+"""
+Local stand-in for the Paystack transaction API (initialize and verify) and its webhooks.
+
+Transactions start as "abandoned", like a checkout nobody completed; `pay`
+marks one successful, and `charge_success` builds the signed charge.success
+webhook Paystack would then send. Point the app at it with PAYSTACK_BASE_URL.
+
+    python -m benchmarks.fake_paystack --port 8098 --secret-key sk_test_local
+"""
+import hmac
+import json
+import uuid
+import hashlib
+import argparse
+from dataclasses import dataclass
+from aiohttp import web
+
+
+@dataclass
+class FakePaystackConfig:
+    secret_key: str = "sk_test_fake"
+    checkout_url: str = "https://checkout.paystack.test"
+
+
+class FakePaystack:
+    """
+    aiohttp application that keeps every initialized transaction by reference.
+    """
+
+    def __init__(self, config: FakePaystackConfig = None):
+        self.config = config or FakePaystackConfig()
+        self.transactions = {}
+        self.app = web.Application()
+        self.app.router.add_post("/transaction/initialize", self.initialize)
+        self.app.router.add_get("/transaction/verify/{reference}", self.verify)
+
+    def _authorized(self, request):
+        return hmac.compare_digest(request.headers.get("Authorization", ""), f"Bearer {self.config.secret_key}")
+
+    @staticmethod
+    def _error(message, status):
+        return web.json_response({"status": False, "message": message}, status=status)
+
+    async def initialize(self, request):
+        if not self._authorized(request):
+            return self._error("Invalid key", 401)
+        body = await request.json()
+        if not body.get("email") or not body.get("amount"):
+            return self._error("Email and amount are required", 400)
+        reference = body.get("reference") or uuid.uuid4().hex
+        if reference in self.transactions:
+            return self._error("Duplicate Transaction Reference", 400)
+        access_code = uuid.uuid4().hex[:15]
+        self.transactions[reference] = {
+            "reference": reference,
+            "amount": int(body["amount"]),
+            "currency": body.get("currency", "NGN"),
+            "status": "abandoned",
+            "metadata": body.get("metadata") or {},
+            "customer": {"email": body["email"]},
+        }
+        return web.json_response({
+            "status": True,
+            "message": "Authorization URL created",
+            "data": {
+                "authorization_url": f"{self.config.checkout_url}/{access_code}",
+                "access_code": access_code,
+                "reference": reference,
+            },
+        })
+
+    async def verify(self, request):
+        if not self._authorized(request):
+            return self._error("Invalid key", 401)
+        transaction = self.transactions.get(request.match_info["reference"])
+        if transaction is None:
+            return self._error("Transaction reference not found", 404)
+        return web.json_response({"status": True, "message": "Verification successful", "data": transaction})
+
+    def pay(self, reference, amount=None):
+        """
+        Completes a checkout, optionally for a different amount (in kobo) than was initialized.
+        """
+        transaction = self.transactions[reference]
+        transaction["status"] = "success"
+        if amount is not None:
+            transaction["amount"] = amount
+
+    def charge_success(self, reference, secret_key=None):
+        """
+        The charge.success webhook for a transaction, as (raw body, x-paystack-signature).
+        """
+        body = json.dumps({"event": "charge.success", "data": self.transactions[reference]}).encode()
+        signature = hmac.new((secret_key or self.config.secret_key).encode(), body, hashlib.sha512).hexdigest()
+        return body, signature
+
+
+async def start_fake_paystack(config: FakePaystackConfig = None, host="127.0.0.1", port=0):
+    """
+    Starts the fake server in the running loop. Returns (fake, runner, base_url).
+    """
+    fake = FakePaystack(config)
+    runner = web.AppRunner(fake.app)
+    await runner.setup()
+    site = web.TCPSite(runner, host, port)
+    await site.start()
+    bound_port = site._server.sockets[0].getsockname()[1]
+    return fake, runner, f"http://{host}:{bound_port}"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8098)
+    parser.add_argument("--secret-key", default=FakePaystackConfig.secret_key)
+    args = parser.parse_args()
+    web.run_app(FakePaystack(FakePaystackConfig(secret_key=args.secret_key)).app, host=args.host, port=args.port)
+
+
+if __name__ == "__main__":
+    main()
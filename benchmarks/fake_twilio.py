@@ -0,0 +1,183 @@
+# benchmarks/fake_twilio.py
+"""
+Local stand-in for the Twilio REST API's calls.create (and messages.create) endpoints.
+
+Each call request is answered after a configurable latency, with a failure
+mix of rejected requests (HTTP 400) and calls that end as no-answer/busy.
+Status callbacks are then POSTed to the call's StatusCallback URL the way
+Twilio would send them. Point the app at it with TWILIO_API_BASE_URL.
+
+    python -m benchmarks.fake_twilio --port 8099 --latency-ms 150 --reject-rate 0.02
+"""
+import re
+import time
+import random
+import asyncio
+import argparse
+import itertools
+from dataclasses import dataclass, field
+from urllib.parse import unquote
+from aiohttp import web, ClientSession
+
+_CONFERENCE = re.compile(r"<Conference[^>]*>([^<]*)</Conference>")
+_TWIML_ROUTE = re.compile(r"/twilio/twiml/([^/?]+)")
+
+
+@dataclass
+class FakeTwilioConfig:
+    latency_ms: float = 150.0  # mean calls.create latency
+    jitter_ms: float = 50.0
+    reject_rate: float = 0.0  # calls.create answered with HTTP 400
+    no_answer_rate: float = 0.0
+    busy_rate: float = 0.0
+    ring_seconds: float = 0.2  # initiated -> ringing -> final status spacing
+    send_callbacks: bool = True
+    seed: int = 7
+
+
+@dataclass
+class CallRecord:
+    sid: str
+    to: str
+    conference_room: str
+    status_callback: str
+    received_at: float
+    rejected: bool
+    from_: str = None
+    final_status: str = None
+    callbacks_sent: list = field(default_factory=list)
+
+
+class FakeTwilio:
+    """
+    aiohttp application that records every calls.create request it receives.
+    """
+
+    def __init__(self, config: FakeTwilioConfig = None):
+        self.config = config or FakeTwilioConfig()
+        self.calls = []
+        self.messages = []
+        self._random = random.Random(self.config.seed)
+        self._sids = itertools.count(1)
+        self._tasks = set()
+        self._session = None
+        self.app = web.Application()
+        self.app.router.add_post("/2010-04-01/Accounts/{account_sid}/Calls.json", self.create_call)
+        self.app.router.add_post("/2010-04-01/Accounts/{account_sid}/Messages.json", self.create_message)
+        self.app.on_cleanup.append(self._cleanup)
+
+    def _latency(self):
+        return max(0.0, self._random.gauss(self.config.latency_ms, self.config.jitter_ms)) / 1000
+
+    def _final_status(self):
+        roll = self._random.random()
+        if roll < self.config.no_answer_rate:
+            return "no-answer"
+        if roll < self.config.no_answer_rate + self.config.busy_rate:
+            return "busy"
+        return "completed"
+
+    async def create_call(self, request):
+        received_at = time.perf_counter()
+        form = await request.post()
+        match = _CONFERENCE.search(form.get("Twiml", "")) or _TWIML_ROUTE.search(form.get("Url", ""))
+        rejected = self._random.random() < self.config.reject_rate
+        record = CallRecord(
+            sid=f"CA{next(self._sids):032d}",
+            to=form.get("To"),
+            from_=form.get("From"),
+            conference_room=unquote(match.group(1)) if match else None,
+            status_callback=form.get("StatusCallback"),
+            received_at=received_at,
+            rejected=rejected,
+        )
+        self.calls.append(record)
+        await asyncio.sleep(self._latency())
+        if rejected:
+            return web.json_response(
+                {"code": 21211, "message": f"The 'To' number {record.to} is not a valid phone number.", "status": 400},
+                status=400,
+            )
+        record.final_status = self._final_status()
+        if self.config.send_callbacks and record.status_callback:
+            task = asyncio.create_task(self._send_callbacks(record))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+        return web.json_response({
+            "sid": record.sid,
+            "account_sid": request.match_info["account_sid"],
+            "to": record.to,
+            "from": form.get("From"),
+            "status": "queued",
+        }, status=201)
+
+    async def create_message(self, request):
+        form = await request.post()
+        sid = f"SM{len(self.messages) + 1:032d}"
+        self.messages.append((sid, form.get("To"), form.get("Body")))
+        await asyncio.sleep(self._latency())
+        return web.json_response({
+            "sid": sid,
+            "account_sid": request.match_info["account_sid"],
+            "to": form.get("To"),
+            "from": form.get("From"),
+            "body": form.get("Body"),
+            "status": "queued",
+        }, status=201)
+
+    async def _send_callbacks(self, record):
+        if self._session is None:
+            self._session = ClientSession()
+        for status in ("initiated", "ringing", record.final_status):
+            await asyncio.sleep(self.config.ring_seconds)
+            try:
+                async with self._session.post(record.status_callback, data={"CallSid": record.sid, "CallStatus": status, "From": record.from_ or ""}) as response:
+                    record.callbacks_sent.append((status, response.status))
+            except Exception as e:
+                record.callbacks_sent.append((status, repr(e)))
+
+    async def drain(self):
+        """Waits for every scheduled status callback to be delivered."""
+        while self._tasks:
+            await asyncio.gather(*list(self._tasks), return_exceptions=True)
+
+    async def _cleanup(self, app):
+        for task in self._tasks:
+            task.cancel()
+        if self._session is not None:
+            await self._session.close()
+
+
+async def start_fake_twilio(config: FakeTwilioConfig = None, host="127.0.0.1", port=0):
+    """
+    Starts the fake server in the running loop. Returns (fake, runner, base_url).
+    """
+    fake = FakeTwilio(config)
+    runner = web.AppRunner(fake.app)
+    await runner.setup()
+    site = web.TCPSite(runner, host, port)
+    await site.start()
+    bound_port = site._server.sockets[0].getsockname()[1]
+    return fake, runner, f"http://{host}:{bound_port}"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8099)
+    parser.add_argument("--latency-ms", type=float, default=150.0)
+    parser.add_argument("--jitter-ms", type=float, default=50.0)
+    parser.add_argument("--reject-rate", type=float, default=0.0)
+    parser.add_argument("--no-answer-rate", type=float, default=0.0)
+    parser.add_argument("--busy-rate", type=float, default=0.0)
+    parser.add_argument("--ring-seconds", type=float, default=0.2)
+    args = parser.parse_args()
+    config = FakeTwilioConfig(
+        latency_ms=args.latency_ms, jitter_ms=args.jitter_ms, reject_rate=args.reject_rate,
+        no_answer_rate=args.no_answer_rate, busy_rate=args.busy_rate, ring_seconds=args.ring_seconds,
+    )
+    web.run_app(FakeTwilio(config).app, host=args.host, port=args.port)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,116 @@
+# benchmarks/import_time.py
+"""
+Import-time profile of the process entry points, from `python -X importtime`
+in a fresh interpreter per module. Prints the total and the heaviest
+top-level imports for each entry point.
+
+--check fails (exit 1) when an entry point's import time exceeds its budget
+in import_time_baseline.json by more than the tolerance (and by at least
+--slack-ms, so millisecond-sized budgets do not fail on noise), or when it eagerly
+imports a module that should only load on first use (the Twilio SDK,
+APScheduler, python-telegram-bot outside webhook mode).
+
+    python -m benchmarks.import_time
+    python -m benchmarks.import_time --check
+    python -m benchmarks.import_time --record
+"""
+import os
+import sys
+import json
+import argparse
+import subprocess
+import statistics
+
+BASELINE_PATH = os.path.join(os.path.dirname(__file__), "import_time_baseline.json")
+DEFAULT_TOLERANCE = 0.5
+# Absolute headroom on every budget; process start-up noise alone is a few milliseconds.
+DEFAULT_SLACK_MS = 5.0
+RUNS = 5
+
+# entry point -> modules it must not import eagerly
+ENTRY_POINTS = {
+    "main": ("twilio", "apscheduler", "telegram", "alembic"),
+    "backend.webhook": ("twilio", "apscheduler", "telegram", "alembic"),
+    "backend.call_worker": ("twilio", "apscheduler", "alembic"),
+    "backend.call_service": ("twilio", "aiohttp"),
+    "bot.application": ("telegram",),
+}
+
+
+def profile(module):
+    """
+    Returns (total_ms, {top-level import: cumulative ms}, [every imported module]).
+    """
+    env = dict(os.environ)
+    env.setdefault("INTERNAL_DATABASE_URL", "sqlite:////tmp/import-time.db")
+    env.setdefault("EXTERNAL_DATABASE_URL", "sqlite:////tmp/import-time-external.db")
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        capture_output=True, text=True, env=env, cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+    )
+    if result.returncode != 0:
+        raise RuntimeError(f"import {module} failed:\n{result.stderr[-2000:]}")
+    top_level, imported, total = {}, [], 0.0
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _, cumulative, name = line.split("|")
+        if not cumulative.strip().isdigit():
+            continue  # header line
+        depth = (len(name) - len(name.lstrip())) // 2
+        name = name.strip()
+        imported.append(name)
+        if name == module:
+            total = int(cumulative) / 1000
+        elif depth == 1:
+            top_level[name] = int(cumulative) / 1000
+    return total, top_level, imported
+
+
+def measure(module, runs=RUNS):
+    profile(module)  # warm the bytecode cache
+    samples = [profile(module) for _ in range(runs)]
+    totals = [total for total, _, _ in samples]
+    _, top_level, imported = samples[-1]
+    return statistics.median(totals), top_level, imported
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Import-time guard for the entry points.")
+    parser.add_argument("--check", action="store_true")
+    parser.add_argument("--record", action="store_true")
+    parser.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE)
+    parser.add_argument("--slack-ms", type=float, default=DEFAULT_SLACK_MS)
+    parser.add_argument("--runs", type=int, default=RUNS)
+    args = parser.parse_args()
+
+    baseline = {}
+    if args.check:
+        with open(BASELINE_PATH) as f:
+            baseline = json.load(f)
+    results, failures = {}, []
+    for module, forbidden in ENTRY_POINTS.items():
+        total, top_level, imported = measure(module, args.runs)
+        results[module] = round(total, 1)
+        heaviest = sorted(top_level.items(), key=lambda item: item[1], reverse=True)[:5]
+        print(f"{module:>22}: {total:7.1f} ms  (" + ", ".join(f"{name} {ms:.0f}" for name, ms in heaviest) + ")")
+        eager = sorted({name.split(".")[0] for name in imported} & set(forbidden))
+        if eager:
+            failures.append(f"{module} eagerly imports {', '.join(eager)}")
+        budget = baseline.get(module)
+        if budget is not None and total > max(budget * (1 + args.tolerance), budget + args.slack_ms):
+            failures.append(f"{module} imports in {total:.1f} ms, budget {budget:.1f} ms")
+
+    if args.record:
+        with open(BASELINE_PATH, "w") as f:
+            json.dump(results, f, indent=2, sort_keys=True)
+            f.write("\n")
+        print(f"Baseline written to {BASELINE_PATH}")
+    for failure in failures:
+        print(f"REGRESSION: {failure}", file=sys.stderr)
+    if args.check and failures:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
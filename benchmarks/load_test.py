@@ -0,0 +1,309 @@
+# benchmarks/load_test.py
+"""
+End-to-end load test: replays a synthetic stream of group signals through
+bot.listener.handle_message and measures them through the coalescer, the call
+queue, the workers and the dialer. Calls land on benchmarks.fake_twilio, which
+posts status callbacks back to /twilio/callback on the real FastAPI app
+served locally.
+
+Reports signal-to-first-dial and signal-to-last-dial percentiles, calls per
+second and DB queries per signal. --check compares the run against
+load_test_baseline.json and exits non-zero on a regression.
+
+    python -m benchmarks.load_test
+    python -m benchmarks.load_test --check            # CI gate
+    python -m benchmarks.load_test --record           # refresh the baseline
+    INTERNAL_DATABASE_URL=postgresql://... CALL_QUEUE_BACKEND=postgres python -m benchmarks.load_test
+
+Without INTERNAL_DATABASE_URL a throwaway sqlite database is used. Debounce
+defaults to 0 and the calls-per-second budget to 50 so the run measures the
+pipeline itself. Set SIGNAL_DEBOUNCE_SECONDS / TWILIO_CALLS_PER_SECOND to
+measure production settings.
+"""
+import os
+import sys
+import json
+import time
+import socket
+import asyncio
+import argparse
+import tempfile
+import datetime
+from urllib.parse import urlparse, parse_qs
+
+BASELINE_PATH = os.path.join(os.path.dirname(__file__), "load_test_baseline.json")
+# Allowed slowdown before --check fails, as a fraction of the baseline.
+DEFAULT_TOLERANCE = 0.5
+SIGNAL_TEXT = "BUY XAUUSD @ 2345.5 TP1 2350 SL 2330"
+
+
+def _free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def configure_environment(web_port, twilio_port):
+    """
+    Points the app at the local stand-ins. Must run before any app module is imported,
+    since they read their configuration at import time.
+    """
+    scratch = tempfile.mkdtemp(prefix="alert-loadtest-")
+    os.environ.setdefault("INTERNAL_DATABASE_URL", f"sqlite:///{scratch}/internal.db")
+    os.environ.setdefault("EXTERNAL_DATABASE_URL", f"sqlite:///{scratch}/external.db")
+    os.environ.setdefault("CALL_QUEUE_BACKEND", "memory")
+    os.environ.setdefault("TWILIO_ACCOUNT_SID", "ACloadtest")
+    os.environ.setdefault("TWILIO_AUTH_TOKEN", "loadtest")
+    os.environ.setdefault("TWILIO_CALLER_ID", "+15550000000")
+    os.environ.setdefault("SIGNAL_DEBOUNCE_SECONDS", "0")
+    os.environ.setdefault("TWILIO_CALLS_PER_SECOND", "50")
+    os.environ.setdefault("CALLBACK_RETRY_BASE_DELAY", "0.5")
+    # Measure the call path: every recipient is called straight away rather than messaged first.
+    os.environ.setdefault("ESCALATION_LADDER", "call")
+    os.environ.setdefault("DIAL_GUARD_BACKEND", "memory")
+    os.environ["TWILIO_API_BASE_URL"] = f"http://127.0.0.1:{twilio_port}"
+    os.environ["TWILIO_STATUS_CALLBACK_URL"] = f"http://127.0.0.1:{web_port}/twilio/callback"
+
+
+def seed(groups, subscribers):
+    from db.internal_database import SessionLocal
+    from db.migrate import upgrade
+    from models.group import Group
+    from models.alert_subscription import AlertSubscription
+
+    upgrade()
+    session = SessionLocal()
+    try:
+        session.query(AlertSubscription).filter(AlertSubscription.group_id.like("-100777%")).delete(synchronize_session=False)
+        session.query(Group).filter(Group.telegram_group_id.like("-100777%")).delete(synchronize_session=False)
+        end = datetime.datetime.utcnow() + datetime.timedelta(days=30)
+        session.bulk_insert_mappings(Group, [
+            {"telegram_group_id": f"-100777{g:05d}", "name": f"Load Group {g}"} for g in range(groups)
+        ])
+        session.bulk_insert_mappings(AlertSubscription, [
+            {
+                "telegram_user_id": f"{g}-{u}",
+                "group_id": f"-100777{g:05d}",
+                "phone_number": f"+1777{g:04d}{u:04d}",
+                "subscription_end": end,
+                "active": True,
+            }
+            for g in range(groups) for u in range(subscribers)
+        ])
+        session.commit()
+    finally:
+        session.close()
+
+
+def make_update(bot, n, chat_id, title):
+    from telegram import Update
+    return Update.de_json({
+        "update_id": n,
+        "message": {
+            "message_id": n,
+            "date": int(time.time()),
+            "chat": {"id": int(chat_id), "type": "supergroup", "title": title},
+            "text": SIGNAL_TEXT,
+        },
+    }, bot)
+
+
+class QueryCounter:
+    """Counts statements executed on the internal database's sync engine and the running loop's async engine."""
+
+    def __init__(self):
+        from db.internal_database import engine, get_async_engine
+        self.count = 0
+        self._engines = [engine, get_async_engine().sync_engine]
+
+    def _increment(self, *_):
+        self.count += 1
+
+    def __enter__(self):
+        from sqlalchemy import event
+        for engine in self._engines:
+            event.listen(engine, "before_cursor_execute", self._increment)
+        return self
+
+    def __exit__(self, *exc):
+        from sqlalchemy import event
+        for engine in self._engines:
+            event.remove(engine, "before_cursor_execute", self._increment)
+        return False
+
+
+def percentile(values, fraction):
+    ordered = sorted(values)
+    if not ordered:
+        return float("nan")
+    return ordered[min(len(ordered) - 1, int(round(fraction * (len(ordered) - 1))))]
+
+
+def _retry_count(call):
+    query = parse_qs(urlparse(call.status_callback or "").query)
+    return int(query.get("retry_count", ["0"])[0])
+
+
+async def run(args, web_port):
+    import uvicorn
+    from telegram import Bot
+    from benchmarks.fake_twilio import FakeTwilioConfig, start_fake_twilio
+    from bot.listener import handle_message
+    from backend.webhook import app
+    from backend.alerts import signal_coalescer
+    from backend.call_worker import worker_pool
+    from backend.call_queue import call_queue
+    from backend.call_service import close_async_client
+    from backend.call_log_writer import call_log_writer
+    from db.internal_database import dispose_async_engine
+    from backend.subscription_index import subscription_index
+    from backend.rooms import parse_room_name, room_allocator
+
+    fake, runner, _ = await start_fake_twilio(FakeTwilioConfig(
+        latency_ms=args.latency_ms, jitter_ms=args.latency_ms / 3, reject_rate=args.reject_rate,
+        no_answer_rate=args.no_answer_rate, busy_rate=args.busy_rate, ring_seconds=0.05,
+    ), port=args.twilio_port)
+    server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=web_port, log_level="warning", lifespan="on"))
+    serving = asyncio.create_task(server.serve())
+    while not server.started:
+        await asyncio.sleep(0.01)
+
+    await subscription_index.warm()
+    worker_pool.start()
+    bot = Bot("123456:loadtest")
+    groups = [(f"-100777{g:05d}", f"Load Group {g}") for g in range(args.signals)]
+    signalled_at = {}
+    expected_dials = args.signals * args.subscribers
+    try:
+        with QueryCounter() as queries:
+            started = time.perf_counter()
+            for n, (chat_id, title) in enumerate(groups):
+                signalled_at[chat_id] = time.perf_counter()
+                await handle_message(make_update(bot, n, chat_id, title), None)
+                if args.rate:
+                    await asyncio.sleep(max(0.0, started + (n + 1) / args.rate - time.perf_counter()))
+            deadline = time.perf_counter() + args.timeout
+            while sum(1 for c in fake.calls if _retry_count(c) == 0) < expected_dials:
+                if time.perf_counter() > deadline:
+                    print("Timed out waiting for dials.", file=sys.stderr)
+                    break
+                await asyncio.sleep(0.05)
+            # Let the last call logs flush and status callbacks (and any redials) play out.
+            await asyncio.sleep(args.settle)
+            await fake.drain()
+            # Redials are delayed queue jobs; wait until the last of them has been placed and called back.
+            while await call_queue.depth() and time.perf_counter() < deadline:
+                await asyncio.sleep(0.1)
+                await fake.drain()
+            await asyncio.to_thread(call_log_writer.flush)
+    finally:
+        await signal_coalescer.flush_all()
+        await worker_pool.stop()
+        await close_async_client()
+        server.should_exit = True
+        await serving
+        await runner.cleanup()
+        await dispose_async_engine()
+
+    first_dial, last_dial = [], []
+    initial = [c for c in fake.calls if _retry_count(c) == 0]
+    dials_by_group = {}
+    for call in initial:
+        parsed = parse_room_name(call.conference_room)
+        if parsed:
+            dials_by_group.setdefault(parsed[0], []).append(call.received_at)
+    for chat_id, at in signalled_at.items():
+        dials = dials_by_group.get(chat_id)
+        if dials:
+            first_dial.append(min(dials) - at)
+            last_dial.append(max(dials) - at)
+    dial_times = [c.received_at for c in initial]
+    dial_span = (max(dial_times) - min(dial_times)) if len(dial_times) > 1 else float("nan")
+    callbacks = [cb for c in fake.calls for cb in c.callbacks_sent]
+    return {
+        "signals": args.signals,
+        "dials": len(initial),
+        "expected_dials": expected_dials,
+        "redials": len(fake.calls) - len(initial),
+        "callbacks_delivered": sum(1 for _, status in callbacks if status == 204),
+        "callbacks_sent": len(callbacks),
+        "first_dial_p50_ms": percentile(first_dial, 0.50) * 1000,
+        "first_dial_p95_ms": percentile(first_dial, 0.95) * 1000,
+        "last_dial_p50_ms": percentile(last_dial, 0.50) * 1000,
+        "last_dial_p95_ms": percentile(last_dial, 0.95) * 1000,
+        "last_dial_max_ms": max(last_dial, default=float("nan")) * 1000,
+        "calls_per_second": len(initial) / dial_span if dial_span else float("nan"),
+        "db_queries_per_signal": queries.count / args.signals,
+        "rooms_open_at_end": room_allocator.count("allocated") + room_allocator.count("active"),
+    }
+
+
+# metric -> (direction a regression moves it in, absolute slack added to the tolerance)
+CHECKS = {
+    "first_dial_p95_ms": ("up", 50.0),
+    "last_dial_p95_ms": ("up", 100.0),
+    "calls_per_second": ("down", 0.0),
+    "db_queries_per_signal": ("up", 0.5),
+}
+
+
+def check(results, baseline, tolerance):
+    failures = []
+    if results["dials"] < results["expected_dials"]:
+        failures.append(f"only {results['dials']} of {results['expected_dials']} calls were placed")
+    for metric, (direction, slack) in CHECKS.items():
+        expected, actual = baseline["results"][metric], results[metric]
+        if direction == "up" and actual > expected * (1 + tolerance) + slack:
+            failures.append(f"{metric} {actual:.2f} > baseline {expected:.2f}")
+        if direction == "down" and actual < expected * (1 - tolerance) - slack:
+            failures.append(f"{metric} {actual:.2f} < baseline {expected:.2f}")
+    return failures
+
+
+def main():
+    parser = argparse.ArgumentParser(description="End-to-end signal-to-dial load test.")
+    parser.add_argument("--signals", type=int, default=20, help="signals to replay, one per group")
+    parser.add_argument("--subscribers", type=int, default=25, help="recipients per group")
+    parser.add_argument("--rate", type=float, default=10.0, help="signals per second (0 = as fast as possible)")
+    parser.add_argument("--latency-ms", type=float, default=150.0, help="fake calls.create latency")
+    parser.add_argument("--reject-rate", type=float, default=0.02)
+    parser.add_argument("--no-answer-rate", type=float, default=0.05)
+    parser.add_argument("--busy-rate", type=float, default=0.02)
+    parser.add_argument("--timeout", type=float, default=120.0)
+    parser.add_argument("--settle", type=float, default=1.5, help="seconds to let callbacks and redials finish")
+    parser.add_argument("--twilio-port", type=int, default=0)
+    parser.add_argument("--check", action="store_true", help="fail if results regress against the baseline")
+    parser.add_argument("--record", action="store_true", help="write results as the new baseline")
+    parser.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE)
+    args = parser.parse_args()
+
+    web_port = _free_port()
+    args.twilio_port = args.twilio_port or _free_port()
+    configure_environment(web_port, args.twilio_port)
+    from utils.logging_config import configure_logging
+    configure_logging(level="WARNING", fmt="text")
+    seed(args.signals, args.subscribers)
+    results = asyncio.run(run(args, web_port))
+    for key, value in results.items():
+        print(f"{key:>24}: {value:.2f}" if isinstance(value, float) else f"{key:>24}: {value}")
+
+    config = {key: getattr(args, key) for key in ("signals", "subscribers", "rate", "latency_ms", "reject_rate", "no_answer_rate", "busy_rate")}
+    config.update({key: os.environ[key] for key in ("SIGNAL_DEBOUNCE_SECONDS", "TWILIO_CALLS_PER_SECOND", "CALL_QUEUE_BACKEND")})
+    if args.record:
+        with open(BASELINE_PATH, "w") as f:
+            json.dump({"config": config, "results": results}, f, indent=2, sort_keys=True)
+            f.write("\n")
+        print(f"Baseline written to {BASELINE_PATH}")
+    if args.check:
+        with open(BASELINE_PATH) as f:
+            baseline = json.load(f)
+        if baseline["config"] != config:
+            print("Warning: run configuration differs from the baseline's.", file=sys.stderr)
+        failures = check(results, baseline, args.tolerance)
+        for failure in failures:
+            print(f"REGRESSION: {failure}", file=sys.stderr)
+        sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
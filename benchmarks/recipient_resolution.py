@@ -0,0 +1,173 @@
+# benchmarks/recipient_resolution.py
+"""
+Recipient resolution for one signal, before and after unifying the recipient
+tables, on the same seeded dataset:
+
+  legacy   group lookup, call_alert_subscriptions by group, then one users
+           lookup per subscription (the lazy `subscription.user` load)
+  joined   the legacy tables with the users/groups joins done in one query
+  unified  one query against alert_subscriptions, served by the covering
+           ix_alert_subscriptions_group_active index
+
+The legacy tables are recreated under bench_* names so the real schema is
+left alone.
+
+    INTERNAL_DATABASE_URL=postgresql://... python -m benchmarks.recipient_resolution
+"""
+import time
+import datetime
+import statistics
+from sqlalchemy import MetaData, Table, Column, Integer, String, Boolean, ForeignKey, select, event
+from db.internal_database import engine, SessionLocal
+from db.migrate import upgrade
+from models.alert_subscription import AlertSubscription
+
+GROUPS = 50
+SUBSCRIBERS_PER_GROUP = 100
+RESOLUTIONS = 200
+
+legacy = MetaData()
+bench_users = Table(
+    "bench_users", legacy,
+    Column("id", Integer, primary_key=True),
+    Column("telegram_id", String, unique=True, index=True, nullable=False),
+    Column("phone_number", String, nullable=False),
+)
+bench_groups = Table(
+    "bench_groups", legacy,
+    Column("id", Integer, primary_key=True),
+    Column("telegram_group_id", String, unique=True, index=True, nullable=False),
+    Column("name", String, nullable=False),
+)
+bench_call_alert_subscriptions = Table(
+    "bench_call_alert_subscriptions", legacy,
+    Column("id", Integer, primary_key=True),
+    Column("user_id", Integer, ForeignKey("bench_users.id")),
+    Column("group_id", Integer, ForeignKey("bench_groups.id")),
+    Column("active", Boolean),
+    Column("call_window_start", String),
+    Column("call_window_end", String),
+)
+
+
+def seed():
+    upgrade()
+    legacy.create_all(bind=engine)
+    with engine.begin() as conn:
+        if conn.execute(select(bench_groups.c.id).limit(1)).first() is None:
+            conn.execute(bench_groups.insert(), [
+                {"id": g + 1, "telegram_group_id": f"bench-{g}", "name": f"Bench {g}"} for g in range(GROUPS)
+            ])
+            conn.execute(bench_users.insert(), [
+                {"id": g * SUBSCRIBERS_PER_GROUP + u + 1, "telegram_id": f"bench-{g}-{u}",
+                 "phone_number": f"+1555{g:03d}{u:04d}"}
+                for g in range(GROUPS) for u in range(SUBSCRIBERS_PER_GROUP)
+            ])
+            conn.execute(bench_call_alert_subscriptions.insert(), [
+                {"user_id": g * SUBSCRIBERS_PER_GROUP + u + 1, "group_id": g + 1, "active": True,
+                 "call_window_start": "00:00", "call_window_end": "23:59"}
+                for g in range(GROUPS) for u in range(SUBSCRIBERS_PER_GROUP)
+            ])
+    session = SessionLocal()
+    try:
+        if session.query(AlertSubscription.id).filter(AlertSubscription.group_id.like("bench-%")).first():
+            return
+        end = datetime.datetime.utcnow() + datetime.timedelta(days=365)
+        session.bulk_insert_mappings(AlertSubscription, [
+            {
+                "telegram_user_id": f"bench-{g}-{u}",
+                "group_id": f"bench-{g}",
+                "phone_number": f"+1555{g:03d}{u:04d}",
+                "subscription_end": end,
+                "active": True,
+            }
+            for g in range(GROUPS) for u in range(SUBSCRIBERS_PER_GROUP)
+        ])
+        session.commit()
+    finally:
+        session.close()
+
+
+def resolve_legacy(conn, telegram_group_id):
+    group_id = conn.execute(
+        select(bench_groups.c.id).where(bench_groups.c.telegram_group_id == telegram_group_id)
+    ).scalar()
+    subscriptions = conn.execute(
+        select(bench_call_alert_subscriptions).where(
+            bench_call_alert_subscriptions.c.group_id == group_id,
+            bench_call_alert_subscriptions.c.active == True,
+        )
+    ).all()
+    return [
+        (row.id, conn.execute(select(bench_users.c.phone_number).where(bench_users.c.id == row.user_id)).scalar(),
+         row.call_window_start, row.call_window_end)
+        for row in subscriptions
+    ]
+
+
+def resolve_joined(conn, telegram_group_id):
+    return conn.execute(
+        select(
+            bench_call_alert_subscriptions.c.id,
+            bench_users.c.phone_number,
+            bench_call_alert_subscriptions.c.call_window_start,
+            bench_call_alert_subscriptions.c.call_window_end,
+        )
+        .join(bench_users, bench_users.c.id == bench_call_alert_subscriptions.c.user_id)
+        .join(bench_groups, bench_groups.c.id == bench_call_alert_subscriptions.c.group_id)
+        .where(bench_groups.c.telegram_group_id == telegram_group_id, bench_call_alert_subscriptions.c.active == True)
+    ).all()
+
+
+def resolve_unified(conn, telegram_group_id):
+    return conn.execute(
+        select(
+            AlertSubscription.id,
+            AlertSubscription.phone_number,
+            AlertSubscription.call_window_start_minute,
+            AlertSubscription.call_window_end_minute,
+            AlertSubscription.timezone,
+            AlertSubscription.subscription_end,
+        ).where(
+            AlertSubscription.group_id == telegram_group_id,
+            AlertSubscription.active == True,
+            AlertSubscription.subscription_end > datetime.datetime.utcnow(),
+        )
+    ).all()
+
+
+def run(resolve):
+    queries = [0]
+
+    def count(*_):
+        queries[0] += 1
+
+    latencies = []
+    with engine.connect() as conn:
+        resolve(conn, "bench-0")  # warm caches
+        event.listen(engine, "before_cursor_execute", count)
+        try:
+            for n in range(RESOLUTIONS):
+                started = time.perf_counter()
+                recipients = resolve(conn, f"bench-{n % GROUPS}")
+                latencies.append(time.perf_counter() - started)
+                assert len(recipients) == SUBSCRIBERS_PER_GROUP
+        finally:
+            event.remove(engine, "before_cursor_execute", count)
+    latencies.sort()
+    return {
+        "p50_ms": statistics.median(latencies) * 1000,
+        "p95_ms": latencies[int(len(latencies) * 0.95) - 1] * 1000,
+        "queries_per_signal": queries[0] / RESOLUTIONS,
+    }
+
+
+def main():
+    seed()
+    for name, resolve in (("legacy", resolve_legacy), ("joined", resolve_joined), ("unified", resolve_unified)):
+        result = run(resolve)
+        print(f"{name:>8}: " + " ".join(f"{key}={value:.2f}" for key, value in result.items()))
+
+
+if __name__ == "__main__":
+    main()
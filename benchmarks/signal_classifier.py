@@ -0,0 +1,59 @@
+# benchmarks/signal_classifier.py
+"""
+Precision/recall and throughput of the signal classifier against the labeled
+corpus in signal_corpus.jsonl, compared with the original substring scan.
+
+    python -m benchmarks.signal_classifier
+"""
+import os
+import json
+import timeit
+from utils.filters import is_signal_message
+
+CORPUS_PATH = os.path.join(os.path.dirname(__file__), "signal_corpus.jsonl")
+
+
+def legacy_is_signal_message(message_text: str) -> bool:
+    message_text = message_text.upper()
+    keywords = ["BUY", "SELL", "TP", "SL"]
+    return any(keyword in message_text for keyword in keywords)
+
+
+def load_corpus(path=CORPUS_PATH):
+    with open(path) as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def score(classify, corpus):
+    tp = fp = fn = 0
+    for example in corpus:
+        predicted = classify(example["text"])
+        if predicted and example["signal"]:
+            tp += 1
+        elif predicted:
+            fp += 1
+        elif example["signal"]:
+            fn += 1
+    precision = tp / (tp + fp) if tp + fp else 1.0
+    recall = tp / (tp + fn) if tp + fn else 1.0
+    return precision, recall, fp
+
+
+def throughput(classify, corpus, repeat=200):
+    texts = [example["text"] for example in corpus]
+    seconds = min(timeit.repeat(lambda: [classify(t) for t in texts], number=repeat, repeat=3))
+    return seconds / (repeat * len(texts)) * 1e9
+
+
+def main():
+    corpus = load_corpus()
+    print(f"{len(corpus)} labeled messages")
+    for name, classify in (("substring scan", legacy_is_signal_message), ("compiled regex", is_signal_message)):
+        precision, recall, false_positives = score(classify, corpus)
+        ns = throughput(classify, corpus)
+        print(f"{name:>15}: precision={precision:.3f} recall={recall:.3f} "
+              f"false_positives={false_positives} {ns:.0f} ns/message")
+
+
+if __name__ == "__main__":
+    main()
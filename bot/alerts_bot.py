@@ -1,38 +1,66 @@
 # bot/alerts_bot.py
+import os
+import uuid
 import logging
 import datetime
 from telegram import Update, InlineKeyboardButton, InlineKeyboardMarkup
 from telegram.ext import CallbackContext
-from db.external_ormar_config import database  # External DB for SyncGram subscriptions
+from db.external_ormar_config import database, connect_external  # External DB for SyncGram subscriptions
 from models.subscription import Subscription as SyncSubscription  # External subscription model
-from db.internal_database import SessionLocal  # Internal DB for alerts subscriptions
+from sqlalchemy import select, update as sql_update
+from db.internal_database import get_session  # Internal DB for alerts subscriptions
 from models.alert_subscription import AlertSubscription  # Internal alerts subscription model
-from backend.paystack import initiate_paystack_payment  # Korapay payment integration
+from backend.paystack import initiate_paystack_payment, verify_paystack_transaction  # Paystack payment integration
+from backend.subscription_index import subscription_index
+from backend.escalation import escalation_engine
+from backend.analytics import hourly_rollups, summarize
+from backend.subscriptions import SUBSCRIPTION_PRICE_NGN, SUBSCRIPTION_DAYS, activate_alert_subscription, payment_covers_subscription
 from bot.listener import handle_message
+from bot.state_store import conversation_store, signup_key
+from utils.ttl_cache import TTLCache
 
 logger = logging.getLogger(__name__)
 
+# Bounds for /ack_timeout, in seconds.
+ACK_TIMEOUT_RANGE = (15, 3600)
+# How long a user's SyncGram group memberships are reused between /start commands.
+MEMBERSHIP_CACHE_TTL_SECONDS = float(os.getenv("MEMBERSHIP_CACHE_TTL_SECONDS", "60"))
+_membership_cache = TTLCache(ttl=MEMBERSHIP_CACHE_TTL_SECONDS)
+
+async def get_user_group_ids(user_id: str):
+    """
+    Returns the SyncGram group ids the user is subscribed to, using the shared
+    external connection pool and a short-lived per-user cache.
+    """
+    group_ids = _membership_cache.get(user_id)
+    if group_ids is None:
+        if not database.is_connected:
+            await connect_external()
+        sync_subs = await SyncSubscription.objects.filter(user_id=user_id).all()
+        group_ids = [sub.group_id for sub in sync_subs]
+        # Only cache hits, so a user who has just joined a group is not told they have none.
+        if group_ids:
+            _membership_cache.set(user_id, group_ids)
+    return group_ids
+
 async def start_alerts(update: Update, context: CallbackContext):
     """
     /start command for the AlertsBySyncGram Bot.
-    Connects to the external DB and fetches the groups the user is in.
+    Fetches the groups the user is in from the external DB.
     """
     user_id = str(update.effective_user.id)
     await update.message.reply_text("Welcome to AlertsBySyncGram Bot! Checking your SyncGram groups...")
     
-    # Connect to external DB and fetch subscriptions for this user.
-    await database.connect()
-    sync_subs = await SyncSubscription.objects.filter(user_id=user_id).all()
-    await database.disconnect()
+    group_ids = await get_user_group_ids(user_id)
 
-    if not sync_subs:
+    if not group_ids:
         await update.message.reply_text("No groups found for you. Please join a SyncGram group first.")
         return
 
     # Build inline buttons based on the group_id from each subscription.
     keyboard = []
-    for sub in sync_subs:
-        keyboard.append([InlineKeyboardButton(f"Group {sub.group_id}", callback_data=f"subscribe:{sub.group_id}")])
+    for group_id in group_ids:
+        keyboard.append([InlineKeyboardButton(f"Group {group_id}", callback_data=f"subscribe:{group_id}")])
     reply_markup = InlineKeyboardMarkup(keyboard)
     await update.message.reply_text("Select the group for which you want to subscribe to AlertsBySyncGram:", reply_markup=reply_markup)
 
@@ -40,13 +68,14 @@ async def button_handler(update: Update, context: CallbackContext):
     """
     Handles button callbacks when the user selects a group.
     Stores the selected group id and prompts for the phone number.
+    Signup state lives in the shared conversation store, so any bot instance can continue it.
     """
     query = update.callback_query
     await query.answer()
     data = query.data  # Expected format "subscribe:<group_id>"
     if data.startswith("subscribe:"):
         group_id = data.split(":", 1)[1]
-        context.user_data["alert_group_id"] = group_id
+        await conversation_store.update(signup_key(update.effective_user.id), alert_group_id=group_id)
         await query.edit_message_text("Please enter your phone number in E.164 format (e.g., +234XXXXXXXXXX):")
 
 async def handle_phone_alerts(update: Update, context: CallbackContext):
@@ -55,65 +84,66 @@ async def handle_phone_alerts(update: Update, context: CallbackContext):
     """
     phone = update.message.text.strip()
     # Save the phone number for later use.
-    context.user_data["phone"] = phone
+    await conversation_store.update(signup_key(update.effective_user.id), phone=phone)
     await update.message.reply_text("Thank you. Now please enter your email address (e.g., user@example.com):")
 
 async def handle_email_alerts(update: Update, context: CallbackContext):
     """
     Collects the email address from the user, then creates a new alert subscription in the internal DB,
-    and finally initiates payment via Korapay.
+    and finally initiates payment via Paystack.
     """
     email = update.message.text.strip()
-    context.user_data["email"] = email
-
-    group_id = context.user_data.get("alert_group_id")
     user_id = str(update.effective_user.id)
+    state = await conversation_store.update(signup_key(user_id), email=email)
+
+    group_id = state.get("alert_group_id")
     if not group_id:
         await update.message.reply_text("Please select a group first using /start.")
         return
 
     # Create a new alert subscription record in the internal database.
-    session = SessionLocal()
     start_date = datetime.datetime.utcnow()
-    # For example, the subscription is valid for 30 days.
-    end_date = start_date + datetime.timedelta(days=30)
+    end_date = start_date + datetime.timedelta(days=SUBSCRIPTION_DAYS)
     new_alert_sub = AlertSubscription(
         telegram_user_id=user_id,
         group_id=group_id,
-        phone_number=context.user_data.get("phone"),
+        phone_number=state.get("phone"),
         subscription_start=start_date,
         subscription_end=end_date,
-        active=False  # Initially inactive until payment is confirmed.
+        active=False,  # Initially inactive until payment is confirmed.
+        payment_reference=str(uuid.uuid4())
     )
-    session.add(new_alert_sub)
-    session.commit()
-    session.refresh(new_alert_sub)
-    session.close()
-
-    # Initiate Korapay payment.
-    # Replace "https://yourdomain.com/payment_complete" with your actual redirect URL.
-    payment_link = initiate_paystack_payment(
-        amount=1000,
+    async with get_session() as session:
+        session.add(new_alert_sub)
+        await session.commit()
+
+    # Initiate Paystack payment.
+    # Replace "https://t.me/SyncgramAlertBot" with your actual redirect URL if needed.
+    payment_link = await initiate_paystack_payment(
+        amount=SUBSCRIPTION_PRICE_NGN,
         subscription_id=new_alert_sub.id,
         callback_url="https://t.me/SyncgramAlertBot",
         customer_email=email,
-        customer_name=""  # You can also ask for and use the customer's name if desired.
+        customer_name="",  # You can also ask for and use the customer's name if desired.
+        reference=new_alert_sub.payment_reference
     )
     
     if payment_link:
         # Store the new subscription's ID for later confirmation.
-        context.user_data["alert_subscription_id"] = str(new_alert_sub.id)
+        await conversation_store.update(signup_key(user_id), alert_subscription_id=str(new_alert_sub.id))
         await update.message.reply_text(
-            f"Please complete your payment of ₦1000 here: {payment_link}\nAfter payment, type /payment_success to confirm."
+            f"Please complete your payment of ₦{SUBSCRIPTION_PRICE_NGN} here: {payment_link}\n"
+            "Your subscription activates automatically once the payment goes through; you can also type /payment_success to check."
         )
     else:
         await update.message.reply_text("Error initiating payment. Please try again later.")
 
 async def payment_success(update: Update, context: CallbackContext):
     """
-    Confirms payment and marks the alert subscription as active.
+    Verifies the payment with Paystack and marks the alert subscription as active.
     """
-    sub_id_str = context.user_data.get("alert_subscription_id")
+    key = signup_key(update.effective_user.id)
+    sub_id_str = (await conversation_store.get(key)).get("alert_subscription_id")
     if not sub_id_str:
         await update.message.reply_text("No alert subscription found. Please start with /start.")
         return
@@ -123,17 +153,87 @@ async def payment_success(update: Update, context: CallbackContext):
         await update.message.reply_text("Invalid subscription ID.")
         return
 
-    session = SessionLocal()
-    alert_sub = session.query(AlertSubscription).filter(AlertSubscription.id == sub_id).first()
-    if alert_sub:
-        alert_sub.active = True
-        alert_sub.subscription_start = datetime.datetime.utcnow()
-        alert_sub.subscription_end = alert_sub.subscription_start + datetime.timedelta(days=30)
-        session.commit()
-        await update.message.reply_text("Payment confirmed! You are now subscribed to AlertsBySyncGram for this group.")
-    else:
-        await update.message.reply_text("Alert subscription not found.")
-    session.close()
+    async with get_session() as session:
+        alert_sub = (await session.execute(
+            select(AlertSubscription).where(AlertSubscription.id == sub_id)
+        )).scalars().first()
+        if not alert_sub:
+            await update.message.reply_text("Alert subscription not found.")
+            return
+        if alert_sub.paid_at is not None and not alert_sub.active:
+            await update.message.reply_text("This subscription has ended. Use /start to renew it.")
+            return
+        if alert_sub.paid_at is None:
+            transaction = await verify_paystack_transaction(alert_sub.payment_reference)
+            if not transaction or not payment_covers_subscription(transaction):
+                await update.message.reply_text("We could not confirm your payment yet. Please try again in a moment.")
+                return
+            await activate_alert_subscription(session, alert_sub)
+    await conversation_store.clear(key)
+    await update.message.reply_text("Payment confirmed! You are now subscribed to AlertsBySyncGram for this group.")
+
+async def acknowledge_alert(update: Update, context: CallbackContext):
+    """
+    Handles the Acknowledge button on an alert DM: stops the escalation to SMS and calls.
+    """
+    query = update.callback_query
+    key = query.data.split(":", 1)[1]  # Expected format "ack:<alert id>:<subscription id>"
+    first = await escalation_engine.acknowledge(key)
+    await query.answer("Acknowledged." if first else "Already acknowledged.")
+    if first:
+        await query.edit_message_reply_markup(reply_markup=None)
+
+async def set_ack_timeout(update: Update, context: CallbackContext):
+    """
+    /ack_timeout <seconds>: how long alerts wait for an acknowledgement before escalating,
+    for all of the user's subscriptions.
+    """
+    low, high = ACK_TIMEOUT_RANGE
+    try:
+        seconds = int(context.args[0])
+    except (IndexError, ValueError):
+        seconds = None
+    if seconds is None or not low <= seconds <= high:
+        await update.message.reply_text(f"Usage: /ack_timeout <seconds>, between {low} and {high}.")
+        return
+    user_id = str(update.effective_user.id)
+    async with get_session() as session:
+        await session.execute(
+            sql_update(AlertSubscription)
+            .where(AlertSubscription.telegram_user_id == user_id)
+            .values(ack_timeout_seconds=seconds)
+            .execution_options(synchronize_session=False)
+        )
+        subscriptions = (await session.execute(
+            select(AlertSubscription).where(AlertSubscription.telegram_user_id == user_id)
+        )).scalars().all()
+        await session.commit()
+    for alert_sub in subscriptions:
+        subscription_index.upsert_subscription(alert_sub)
+    await update.message.reply_text(f"Alerts will now wait {seconds} seconds for your acknowledgement before escalating.")
+
+async def group_stats(update: Update, context: CallbackContext):
+    """
+    /stats [hours] in a group: call volume and answer rate for this group's alerts, from the hourly rollups.
+    """
+    chat = update.effective_chat
+    if chat.type not in ("group", "supergroup"):
+        await update.message.reply_text("Use /stats in the group you want call statistics for.")
+        return
+    try:
+        hours = max(1, min(int(context.args[0]), 24 * 90)) if context.args else 24
+    except ValueError:
+        hours = 24
+    totals = summarize(await hourly_rollups(str(chat.id), datetime.datetime.utcnow() - datetime.timedelta(hours=hours)))
+    answer_rate = f"{totals['answer_rate']:.0%}" if totals["answer_rate"] is not None else "n/a"
+    mean_duration = f"{totals['mean_duration_seconds']:.0f}s" if totals["mean_duration_seconds"] is not None else "n/a"
+    await update.message.reply_text(
+        f"Alert calls in the last {hours}h:\n"
+        f"Dials: {totals['dials']} (+{totals['retries']} retries, {totals['suppressed']} suppressed, {totals['rejected']} rejected)\n"
+        f"Answered: {totals['answered']} ({answer_rate}), no answer: {totals['no_answer']}, busy: {totals['busy']}\n"
+        f"Mean call length: {mean_duration}\n"
+        f"SMS sent: {totals['sms']}"
+    )
 
 def register_alerts_handlers(application):
     """
@@ -141,6 +241,9 @@ def register_alerts_handlers(application):
     """
     from telegram.ext import CommandHandler, CallbackQueryHandler, MessageHandler, filters
     application.add_handler(CommandHandler("start", start_alerts))
+    application.add_handler(CommandHandler("ack_timeout", set_ack_timeout))
+    application.add_handler(CommandHandler("stats", group_stats))
+    application.add_handler(CallbackQueryHandler(acknowledge_alert, pattern=r"^ack:"))
     application.add_handler(CallbackQueryHandler(button_handler))
     # Use a regex for phone numbers.
     application.add_handler(MessageHandler(filters.Regex(r'^\+\d{10,15}$'), handle_phone_alerts))
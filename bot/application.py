@@ -0,0 +1,43 @@
+# bot/application.py
+# python-telegram-bot and the handler modules are imported inside the functions below,
+# so reading the Telegram settings from this module stays cheap.
+import os
+
+ALERTS_BOT_TOKEN = os.getenv("ALERTS_BOT_TOKEN")
+# "polling" (default) runs the bot beside the API server; "webhook" serves updates from the FastAPI app.
+TELEGRAM_MODE = os.getenv("TELEGRAM_MODE", "polling")
+TELEGRAM_WEBHOOK_URL = os.getenv("TELEGRAM_WEBHOOK_URL")  # Public base URL, e.g., https://alerts.example.com
+TELEGRAM_WEBHOOK_SECRET = os.getenv("TELEGRAM_WEBHOOK_SECRET")
+TELEGRAM_WEBHOOK_PATH = "/telegram/update"
+
+
+def build_application(token=ALERTS_BOT_TOKEN, polling=True):
+    """
+    Builds the AlertsBySyncGram bot Application with all handlers registered.
+    In polling mode the lifecycle hooks run through run_polling; in webhook mode
+    there is no Updater and the caller drives startup and shutdown.
+    """
+    from telegram.ext import ApplicationBuilder
+    from bot.alerts_bot import register_alerts_handlers
+    from backend.lifecycle import on_startup, on_shutdown
+    builder = ApplicationBuilder().token(token)
+    if polling:
+        builder = builder.post_init(on_startup).post_shutdown(on_shutdown)
+    else:
+        builder = builder.updater(None)
+    application = builder.build()
+    register_alerts_handlers(application)
+    return application
+
+
+async def set_telegram_webhook(token=ALERTS_BOT_TOKEN):
+    """
+    Points Telegram at our /telegram/update route. Run once per deployment, not per worker.
+    """
+    from telegram import Bot, Update
+    async with Bot(token) as bot:
+        await bot.set_webhook(
+            url=f"{TELEGRAM_WEBHOOK_URL.rstrip('/')}{TELEGRAM_WEBHOOK_PATH}",
+            secret_token=TELEGRAM_WEBHOOK_SECRET,
+            allowed_updates=Update.ALL_TYPES,
+        )
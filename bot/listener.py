@@ -3,16 +3,24 @@ import logging
 from telegram import Update
 from telegram.ext import CallbackContext
 from utils.filters import is_signal_message
+from utils.metrics import Counter
 from backend import alerts
 
 logger = logging.getLogger(__name__)
 
+MESSAGES_RECEIVED = Counter("telegram_messages_received_total", "Group messages received by the listener.")
+SIGNALS_CLASSIFIED = Counter(
+    "signal_classifier_results_total", "Listener messages by classifier result.", ["result"]
+)
+
 async def handle_message(update: Update, context: CallbackContext):
     text = update.message.text
-    logger.info("Received message: %s", text)
-    if is_signal_message(text):
-        logger.info("Signal detected in message: %s", text)
-        # Process the signal (make sure your alerts.process_signal is async or use await if needed)
+    MESSAGES_RECEIVED.inc()
+    # Per-message events are DEBUG (sampled) and never include the message text.
+    if is_signal_message(text, str(update.message.chat.id)):
+        SIGNALS_CLASSIFIED.inc(result="signal")
+        logger.debug("Signal detected in chat %s (%d chars)", update.message.chat.id, len(text or ""))
         await alerts.process_signal(update)
     else:
-        logger.info("Message did not contain a signal keyword.")
+        SIGNALS_CLASSIFIED.inc(result="ignored")
+        logger.debug("Message in chat %s did not contain a signal keyword.", update.message.chat.id)
@@ -0,0 +1,205 @@
+# bot/state_store.py
+import os
+import time
+import asyncio
+import logging
+from datetime import datetime, timedelta
+from sqlalchemy import select, delete
+from db.internal_database import get_session
+from models.conversation_state import ConversationState
+
+logger = logging.getLogger(__name__)
+
+CONVERSATION_STORE_BACKEND = os.getenv("CONVERSATION_STORE_BACKEND", "sql")  # "sql" or "memory"
+# Half-finished conversations are forgotten after this long.
+CONVERSATION_STATE_TTL_SECONDS = int(os.getenv("CONVERSATION_STATE_TTL_SECONDS", str(7 * 24 * 3600)))
+# Dirty entries are written to the database at most this long after they change.
+CONVERSATION_STORE_FLUSH_INTERVAL = float(os.getenv("CONVERSATION_STORE_FLUSH_INTERVAL", "0.5"))
+# Clean entries are re-read after this long, so changes made by other bot instances are seen.
+CONVERSATION_STORE_CACHE_TTL_SECONDS = float(os.getenv("CONVERSATION_STORE_CACHE_TTL_SECONDS", "1"))
+_PURGE_EVERY_SECONDS = 600
+
+
+class MemoryStateStore:
+    """
+    Process-local stand-in for SqlStateStore, for tests and single-process runs.
+    State does not survive a restart.
+    """
+
+    def __init__(self, ttl=CONVERSATION_STATE_TTL_SECONDS):
+        self.ttl = ttl
+        self._data = {}
+
+    async def get(self, key):
+        entry = self._data.get(key)
+        if entry is None or entry[1] < time.monotonic():
+            self._data.pop(key, None)
+            return {}
+        return dict(entry[0])
+
+    async def get_many(self, keys):
+        return {key: data for key in keys if (data := await self.get(key))}
+
+    async def update(self, key, **fields):
+        data = await self.get(key)
+        data.update(fields)
+        self._data[key] = (data, time.monotonic() + self.ttl)
+        return data
+
+    async def clear(self, key):
+        self._data.pop(key, None)
+
+    def start(self):
+        pass
+
+    async def stop(self):
+        pass
+
+
+class SqlStateStore:
+    """
+    Conversation state in the internal database (Postgres or SQLite), so any
+    bot instance can continue a conversation and restarts do not lose it.
+
+    Writes go to a local write-behind buffer that a background task flushes
+    every CONVERSATION_STORE_FLUSH_INTERVAL; reads are served from the buffer
+    or a short-lived cache before falling back to the database.
+    """
+
+    def __init__(self, ttl=CONVERSATION_STATE_TTL_SECONDS, flush_interval=CONVERSATION_STORE_FLUSH_INTERVAL,
+                 cache_ttl=CONVERSATION_STORE_CACHE_TTL_SECONDS):
+        self.ttl = ttl
+        self.flush_interval = flush_interval
+        self.cache_ttl = cache_ttl
+        self._dirty = {}  # key -> data, or None for a pending delete
+        self._cache = {}  # key -> (data, fetched_at)
+        self._task = None
+        self._last_purge = time.monotonic()
+
+    async def get(self, key):
+        if key in self._dirty:
+            data = self._dirty[key]
+            return dict(data) if data is not None else {}
+        cached = self._cache.get(key)
+        if cached is not None and time.monotonic() - cached[1] < self.cache_ttl:
+            return dict(cached[0])
+        async with get_session() as session:
+            row = (await session.execute(
+                select(ConversationState.data).where(
+                    ConversationState.key == key, ConversationState.expires_at > datetime.utcnow()
+                )
+            )).first()
+        data = dict(row.data) if row else {}
+        self._cache[key] = (data, time.monotonic())
+        return dict(data)
+
+    async def get_many(self, keys):
+        """
+        Returns {key: data} for the keys that have state, reading every uncached key in one query.
+        """
+        found, missing = {}, []
+        now = time.monotonic()
+        for key in keys:
+            if key in self._dirty:
+                if self._dirty[key] is not None:
+                    found[key] = dict(self._dirty[key])
+            elif key in self._cache and now - self._cache[key][1] < self.cache_ttl:
+                if self._cache[key][0]:
+                    found[key] = dict(self._cache[key][0])
+            else:
+                missing.append(key)
+        if missing:
+            async with get_session() as session:
+                rows = (await session.execute(
+                    select(ConversationState.key, ConversationState.data).where(
+                        ConversationState.key.in_(missing), ConversationState.expires_at > datetime.utcnow()
+                    )
+                )).all()
+            fetched = {row.key: dict(row.data) for row in rows}
+            for key in missing:
+                self._cache[key] = (fetched.get(key, {}), now)
+            found.update(fetched)
+        return found
+
+    async def update(self, key, **fields):
+        data = await self.get(key)
+        data.update(fields)
+        self._dirty[key] = data
+        self._cache.pop(key, None)
+        if self._task is None:
+            await self.flush()
+        return data
+
+    async def clear(self, key):
+        self._dirty[key] = None
+        self._cache.pop(key, None)
+        if self._task is None:
+            await self.flush()
+
+    async def flush(self):
+        """
+        Writes every pending change in one transaction.
+        """
+        if not self._dirty:
+            return
+        pending, self._dirty = self._dirty, {}
+        now = datetime.utcnow()
+        try:
+            async with get_session() as session:
+                for key, data in pending.items():
+                    if data is None:
+                        await session.execute(delete(ConversationState).where(ConversationState.key == key))
+                    else:
+                        await session.merge(ConversationState(
+                            key=key, data=data, updated_at=now, expires_at=now + timedelta(seconds=self.ttl)
+                        ))
+                await session.commit()
+        except Exception:
+            # Put the changes back unless a newer write for the same key arrived meanwhile.
+            for key, data in pending.items():
+                self._dirty.setdefault(key, data)
+            raise
+
+    async def purge_expired(self):
+        async with get_session() as session:
+            result = await session.execute(delete(ConversationState).where(ConversationState.expires_at <= datetime.utcnow()))
+            await session.commit()
+        if result.rowcount:
+            logger.info("Purged %d expired conversation states.", result.rowcount)
+
+    async def _run(self):
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            try:
+                await self.flush()
+                if time.monotonic() - self._last_purge > _PURGE_EVERY_SECONDS:
+                    self._last_purge = time.monotonic()
+                    await self.purge_expired()
+            except Exception as e:
+                logger.exception("Conversation state flush failed: %s", e)
+            if len(self._cache) > 10000:
+                self._cache.clear()
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+        await self.flush()
+
+
+def build_conversation_store(backend=CONVERSATION_STORE_BACKEND):
+    if backend == "memory":
+        return MemoryStateStore()
+    return SqlStateStore()
+
+
+conversation_store = build_conversation_store()
+
+
+def signup_key(user_id):
+    return f"signup:{user_id}"
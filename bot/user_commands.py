@@ -1,10 +1,13 @@
 # bot/user_commands.py
 from telegram import Update
 from telegram.ext import CallbackContext
-from db.internal_database import SessionLocal
+import datetime
+from sqlalchemy import select, update as sql_update
+from db.internal_database import get_session
 from models.user import User
 from models.group import Group
-from models.call_subscription import CallAlertSubscription
+from models.alert_subscription import AlertSubscription
+from backend.subscription_index import subscription_index
 import logging
 
 logger = logging.getLogger(__name__)
@@ -22,38 +25,56 @@ async def handle_phone(update: Update, context: CallbackContext):
     telegram_id = str(update.message.from_user.id)
     logger.info("Received phone number %s from user: %s", phone_number, telegram_id)
     
-    db = SessionLocal()
-    user = db.query(User).filter(User.telegram_id == telegram_id).first()
-    if not user:
-        logger.info("User %s not found, creating new record.", telegram_id)
-        user = User(telegram_id=telegram_id, phone_number=phone_number)
-        db.add(user)
-        db.commit()
-    else:
-        logger.info("User %s found, updating phone number.", telegram_id)
-        user.phone_number = phone_number
-        db.commit()
-    
-    chat_id = str(update.message.chat.id)
-    group = db.query(Group).filter(Group.telegram_group_id == chat_id).first()
-    if not group:
-        logger.info("Group %s not found, creating new group record.", chat_id)
-        group = Group(telegram_group_id=chat_id, name=update.message.chat.title or "Unknown")
-        db.add(group)
-        db.commit()
-    
-    subscription = db.query(CallAlertSubscription).filter(
-        CallAlertSubscription.user_id == user.id,
-        CallAlertSubscription.group_id == group.id
-    ).first()
-    
-    if not subscription:
-        logger.info("No subscription for user %s in group %s, creating one.", telegram_id, chat_id)
-        subscription = CallAlertSubscription(user_id=user.id, group_id=group.id)
-        db.add(subscription)
-        db.commit()
-    else:
-        logger.info("User %s already subscribed to group %s", telegram_id, chat_id)
+    async with get_session() as db:
+        user = (await db.execute(select(User).where(User.telegram_id == telegram_id))).scalars().first()
+        if not user:
+            logger.info("User %s not found, creating new record.", telegram_id)
+            user = User(telegram_id=telegram_id, phone_number=phone_number)
+            db.add(user)
+            await db.commit()
+        else:
+            logger.info("User %s found, updating phone number.", telegram_id)
+            if user.phone_number != phone_number:
+                # Phone numbers are stored on each subscription; the old one may be cached under any of the user's groups.
+                await db.execute(
+                    sql_update(AlertSubscription)
+                    .where(AlertSubscription.telegram_user_id == telegram_id)
+                    .values(phone_number=phone_number)
+                    .execution_options(synchronize_session=False)
+                )
+                subscription_index.invalidate()
+            user.phone_number = phone_number
+            await db.commit()
+
+        chat_id = str(update.message.chat.id)
+        group = (await db.execute(select(Group).where(Group.telegram_group_id == chat_id))).scalars().first()
+        if not group:
+            logger.info("Group %s not found, creating new group record.", chat_id)
+            group = Group(telegram_group_id=chat_id, name=update.message.chat.title or "Unknown")
+            db.add(group)
+            await db.commit()
+
+        subscription = (await db.execute(select(AlertSubscription).where(
+            AlertSubscription.telegram_user_id == telegram_id,
+            AlertSubscription.group_id == chat_id
+        ))).scalars().first()
+
+        if not subscription:
+            logger.info("No subscription for user %s in group %s, creating one.", telegram_id, chat_id)
+            # Inactive until paid for, like subscriptions created through /start.
+            subscription = AlertSubscription(
+                telegram_user_id=telegram_id,
+                group_id=chat_id,
+                phone_number=phone_number,
+                subscription_end=datetime.datetime.utcnow(),
+                active=False
+            )
+            db.add(subscription)
+            await db.commit()
+        else:
+            logger.info("User %s already subscribed to group %s", telegram_id, chat_id)
+
+    # Keep the signal hot path's recipient index in step with the new phone number/subscription.
+    subscription_index.upsert_subscription(subscription, group.name)
     
     await update.message.reply_text("You have been subscribed to call alerts for this group!")
-    db.close()
@@ -1,7 +1,6 @@
 # db/external_ormar_config.py
 import os
 import sqlalchemy
-from sqlalchemy import create_engine
 from databases import Database
 
 # Retrieve the external database URL from the environment.
@@ -9,10 +8,31 @@ EXTERNAL_DATABASE_URL = os.getenv("EXTERNAL_DATABASE_URL")
 # Ensure the URL uses the correct scheme.
 EXTERNAL_DATABASE_URL = str(EXTERNAL_DATABASE_URL).replace("postgres://", "postgresql://", 1)
 
+# Connection pool bounds for the external (SyncGram) database.
+EXTERNAL_DB_POOL_MIN_SIZE = int(os.getenv("EXTERNAL_DB_POOL_MIN_SIZE", "1"))
+EXTERNAL_DB_POOL_MAX_SIZE = int(os.getenv("EXTERNAL_DB_POOL_MAX_SIZE", "10"))
+
+_pool_options = {} if EXTERNAL_DATABASE_URL.startswith("sqlite") else {
+    "min_size": EXTERNAL_DB_POOL_MIN_SIZE,
+    "max_size": EXTERNAL_DB_POOL_MAX_SIZE,
+}
+
 # Create the SQLAlchemy metadata and the asynchronous Database instance.
-database = Database(EXTERNAL_DATABASE_URL)
+database = Database(EXTERNAL_DATABASE_URL, **_pool_options)
 metadata = sqlalchemy.MetaData()
 
 
-# Create an engine if needed (for synchronous operations)
-engine = create_engine(EXTERNAL_DATABASE_URL)
+async def connect_external():
+    """
+    Opens the external connection pool; called once at application startup.
+    """
+    if not database.is_connected:
+        await database.connect()
+
+
+async def disconnect_external():
+    """
+    Closes the external connection pool; called on application shutdown.
+    """
+    if database.is_connected:
+        await database.disconnect()
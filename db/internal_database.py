@@ -1,11 +1,90 @@
 # db/internal_database.py
 import os
+import asyncio
+import weakref
+from contextlib import asynccontextmanager
 from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession
 from sqlalchemy.orm import sessionmaker, declarative_base
 
 # Use the PostgreSQL URL from your environment variable.
 INTERNAL_DATABASE_URL = os.getenv("INTERNAL_DATABASE_URL")
 
+# Pool settings for the async engine used by the bot and webhook handlers.
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "10"))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "20"))
+DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "5"))
+DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", "1800"))
+
+
+def to_async_url(url):
+    """
+    Maps a sync database URL onto its async driver (asyncpg for Postgres, aiosqlite for SQLite).
+    """
+    url = str(url).replace("postgres://", "postgresql://", 1)
+    for prefix in ("postgresql+psycopg2://", "postgresql://"):
+        if url.startswith(prefix):
+            return "postgresql+asyncpg://" + url[len(prefix):]
+    if url.startswith("sqlite://"):
+        return "sqlite+aiosqlite://" + url[len("sqlite://"):]
+    return url
+
+
+ASYNC_INTERNAL_DATABASE_URL = os.getenv("ASYNC_INTERNAL_DATABASE_URL") or to_async_url(INTERNAL_DATABASE_URL)
+
+# Synchronous engine, kept for schema management and scripts.
 engine = create_engine(INTERNAL_DATABASE_URL)
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 Base = declarative_base()
+
+_pool_options = {} if ASYNC_INTERNAL_DATABASE_URL.startswith("sqlite") else {
+    "pool_size": DB_POOL_SIZE,
+    "max_overflow": DB_MAX_OVERFLOW,
+    "pool_timeout": DB_POOL_TIMEOUT,
+    "pool_recycle": DB_POOL_RECYCLE,
+    "pool_pre_ping": True,
+}
+# One async engine per event loop: asyncpg connections belong to the loop that opened them, and in
+# polling mode the webhook app runs its own loop in a thread next to the bot's.
+_async_engines = weakref.WeakKeyDictionary()
+_async_sessionmakers = weakref.WeakKeyDictionary()
+
+
+def get_async_engine():
+    """
+    Returns the async engine (and its connection pool) for the running event loop.
+    """
+    loop = asyncio.get_running_loop()
+    async_engine = _async_engines.get(loop)
+    if async_engine is None:
+        async_engine = create_async_engine(ASYNC_INTERNAL_DATABASE_URL, **_pool_options)
+        _async_engines[loop] = async_engine
+        _async_sessionmakers[loop] = sessionmaker(async_engine, class_=AsyncSession, autoflush=False, expire_on_commit=False)
+    return async_engine
+
+
+async def dispose_async_engine():
+    """
+    Closes the running loop's pooled connections; call before the loop shuts down.
+    """
+    loop = asyncio.get_running_loop()
+    _async_sessionmakers.pop(loop, None)
+    async_engine = _async_engines.pop(loop, None)
+    if async_engine is not None:
+        await async_engine.dispose()
+
+
+@asynccontextmanager
+async def get_session():
+    """
+    Yields an AsyncSession on the running loop's engine that is rolled back on error and always closed.
+    """
+    get_async_engine()
+    session = _async_sessionmakers[asyncio.get_running_loop()]()
+    try:
+        yield session
+    except Exception:
+        await session.rollback()
+        raise
+    finally:
+        await session.close()
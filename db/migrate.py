@@ -0,0 +1,28 @@
+# db/migrate.py
+import logging
+import os
+from alembic import command
+from alembic.config import Config
+
+logger = logging.getLogger(__name__)
+
+ALEMBIC_INI = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "alembic.ini")
+
+
+def alembic_config():
+    config = Config(ALEMBIC_INI)
+    config.set_main_option("script_location", os.path.join(os.path.dirname(ALEMBIC_INI), "migrations"))
+    return config
+
+
+def upgrade(revision="head"):
+    """Bring the internal database schema up to `revision`."""
+    config = alembic_config()
+    config.attributes["configure_logger"] = False
+    logger.info("Upgrading internal database schema to %s", revision)
+    command.upgrade(config, revision)
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    upgrade()
@@ -6,49 +6,41 @@ import uvicorn
 import logging
 import nest_asyncio
 from dotenv import load_dotenv
+from utils.logging_config import configure_logging
 
 # Load environment variables from .env
 load_dotenv()
 
-# Allow nested event loops
-nest_asyncio.apply()
-
-logging.basicConfig(
-    level=logging.INFO,
-    format="%(asctime)s - %(name)s - %(levelname)s - %(message)s"
-)
+# Non-blocking, redacted JSON-lines logging (see utils/logging_config.py).
+configure_logging()
 logger = logging.getLogger(__name__)
 
-# (External DB tables are managed via ormar in models; no local DB for subscriptions here.)
-from db.internal_database import engine, Base
-
-# Import all internal models to ensure they are registered.
-import models.user        # Internal User model.
-import models.group       # Internal Group model.
-import models.call_subscription  # Internal CallAlertSubscription model.
-import models.call_log    # Internal CallLog model.
-import models.alert_subscription  # Internal AlertSubscription model.
+# Telegram settings; the bot Application and its handlers are imported when it is built.
+from bot.application import ALERTS_BOT_TOKEN, TELEGRAM_MODE, TELEGRAM_WEBHOOK_SECRET, build_application, set_telegram_webhook
 
-# Create all tables in the internal PostgreSQL database.
-Base.metadata.create_all(bind=engine)
-logger.info("Internal database tables created.")
+WEB_HOST = os.getenv("WEB_HOST", "0.0.0.0")
+WEB_PORT = int(os.getenv("WEB_PORT", "8000"))
+# Number of uvicorn worker processes in webhook mode; each runs its own bot Application.
+WEB_CONCURRENCY = int(os.getenv("WEB_CONCURRENCY", "1"))
+# Schema changes are a deploy step (`python -m db.migrate`); set this to also run them here.
+RUN_MIGRATIONS_ON_START = os.getenv("RUN_MIGRATIONS_ON_START", "false").lower() in ("1", "true", "yes")
 
-# Import Telegram bot handlers.
-from telegram.ext import ApplicationBuilder, CommandHandler, CallbackQueryHandler, MessageHandler, filters
-from bot.alerts_bot import register_alerts_handlers
+def run_migrations():
+    from db.migrate import upgrade
+    upgrade()
+    logger.info("Internal database schema is up to date.")
 
 def start_fastapi():
-    logger.info("Starting FastAPI webhook server on port 8000")
-    uvicorn.run("backend.webhook:app", host="0.0.0.0", port=8000)
+    logger.info("Starting FastAPI webhook server on port %s", WEB_PORT)
+    uvicorn.run("backend.webhook:app", host=WEB_HOST, port=WEB_PORT, log_config=None)
 
 async def run_alerts_bot():
-    token = os.getenv("ALERTS_BOT_TOKEN")
+    token = ALERTS_BOT_TOKEN
     if not token:
         logger.error("ALERTS_BOT_TOKEN is not set in the environment!")
         return
-    logger.info("Initializing AlertsBySyncGram Bot with token: %s", token)
-    app_alerts = ApplicationBuilder().token(token).build()
-    register_alerts_handlers(app_alerts)
+    logger.info("Initializing AlertsBySyncGram Bot.")
+    app_alerts = build_application(token)
     logger.info("Starting AlertsBySyncGram Bot polling for updates.")
     await app_alerts.run_polling(close_loop=False)
 
@@ -57,10 +49,31 @@ async def main():
         run_alerts_bot(),
     )
 
+def run_webhook_mode():
+    """
+    Serves Telegram updates, Twilio callbacks and the bot from the same uvicorn
+    event loop(s); scale out with WEB_CONCURRENCY or more hosts behind a load balancer.
+    """
+    if not ALERTS_BOT_TOKEN:
+        logger.error("ALERTS_BOT_TOKEN is not set in the environment!")
+        return
+    if not TELEGRAM_WEBHOOK_SECRET:
+        logger.error("TELEGRAM_WEBHOOK_SECRET must be set in webhook mode; Telegram updates would all be rejected.")
+        return
+    asyncio.run(set_telegram_webhook(ALERTS_BOT_TOKEN))
+    logger.info("Starting webhook mode with %d worker(s) on port %s", WEB_CONCURRENCY, WEB_PORT)
+    uvicorn.run("backend.webhook:app", host=WEB_HOST, port=WEB_PORT, workers=WEB_CONCURRENCY, log_config=None)
+
 if __name__ == "__main__":
-    # Start the FastAPI webhook server in a daemon thread.
-    threading.Thread(target=start_fastapi, daemon=True).start()
-    try:
-        asyncio.run(main())
-    except Exception as e:
-        logger.exception("Error running AlertsBySyncGram Bot: %s", e)
+    if RUN_MIGRATIONS_ON_START:
+        run_migrations()
+    if TELEGRAM_MODE == "webhook":
+        run_webhook_mode()
+    else:
+        # Polling fallback: allow nested event loops and run FastAPI in a daemon thread.
+        nest_asyncio.apply()
+        threading.Thread(target=start_fastapi, daemon=True).start()
+        try:
+            asyncio.run(main())
+        except Exception as e:
+            logger.exception("Error running AlertsBySyncGram Bot: %s", e)
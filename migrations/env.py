@@ -0,0 +1,46 @@
+# migrations/env.py
+from logging.config import fileConfig
+from alembic import context
+from sqlalchemy import create_engine
+from db.internal_database import Base, INTERNAL_DATABASE_URL
+
+# Import all internal models so autogenerate sees every table.
+import models.user
+import models.group
+import models.alert_subscription
+import models.call_log
+import models.call_job
+import models.conversation_state
+import models.escalation_timer
+import models.dial_guard_state
+import models.call_event
+import models.call_rollup
+import models.signal_burst
+import models.caller_id_slot
+
+config = context.config
+# Leave the application's logging alone when migrations run in-process.
+if config.config_file_name is not None and config.attributes.get("configure_logger", True):
+    fileConfig(config.config_file_name)
+
+target_metadata = Base.metadata
+
+
+def run_migrations_offline():
+    context.configure(url=INTERNAL_DATABASE_URL, target_metadata=target_metadata, literal_binds=True)
+    with context.begin_transaction():
+        context.run_migrations()
+
+
+def run_migrations_online():
+    engine = create_engine(INTERNAL_DATABASE_URL)
+    with engine.connect() as connection:
+        context.configure(connection=connection, target_metadata=target_metadata)
+        with context.begin_transaction():
+            context.run_migrations()
+
+
+if context.is_offline_mode():
+    run_migrations_offline()
+else:
+    run_migrations_online()
@@ -0,0 +1,115 @@
+"""Baseline: schema previously created by Base.metadata.create_all
+
+Creates any missing table, column or index of the pre-migration schema, so it
+applies both to an empty database and to one built by create_all at any
+earlier point.
+
+Revision ID: 0001
+Revises:
+Create Date: 2026-10-18
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = "0001"
+down_revision: Union[str, None] = None
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def _tables():
+    return [
+        ("users", [
+            sa.Column("id", sa.Integer, primary_key=True),
+            sa.Column("telegram_id", sa.String, nullable=False),
+            sa.Column("phone_number", sa.String, nullable=False),
+            sa.Column("active", sa.Boolean),
+        ]),
+        ("groups", [
+            sa.Column("id", sa.Integer, primary_key=True),
+            sa.Column("telegram_group_id", sa.String, nullable=False),
+            sa.Column("name", sa.String, nullable=False),
+        ]),
+        ("call_alert_subscriptions", [
+            sa.Column("id", sa.Integer, primary_key=True),
+            sa.Column("user_id", sa.Integer, sa.ForeignKey("users.id")),
+            sa.Column("group_id", sa.Integer, sa.ForeignKey("groups.id")),
+            sa.Column("active", sa.Boolean),
+            sa.Column("call_window_start", sa.String),
+            sa.Column("call_window_end", sa.String),
+            sa.Column("timezone", sa.String, server_default="UTC"),
+        ]),
+        ("alert_subscriptions", [
+            sa.Column("id", sa.Integer, primary_key=True),
+            sa.Column("telegram_user_id", sa.String, nullable=False),
+            sa.Column("group_id", sa.String, nullable=False),
+            sa.Column("phone_number", sa.String, nullable=False),
+            sa.Column("subscription_start", sa.DateTime),
+            sa.Column("subscription_end", sa.DateTime, nullable=False),
+            sa.Column("active", sa.Boolean),
+            sa.Column("payment_reference", sa.String),
+            sa.Column("reminder_sent_at", sa.DateTime),
+        ]),
+        ("call_logs", [
+            sa.Column("id", sa.Integer, primary_key=True),
+            sa.Column("subscription_id", sa.Integer, sa.ForeignKey("alert_subscriptions.id")),
+            sa.Column("status", sa.String),
+            sa.Column("details", sa.String),
+            sa.Column("timestamp", sa.DateTime),
+        ]),
+        ("call_jobs", [
+            sa.Column("id", sa.Integer, primary_key=True),
+            sa.Column("kind", sa.String, nullable=False),
+            sa.Column("payload", sa.JSON, nullable=False),
+            sa.Column("status", sa.String, nullable=False),
+            sa.Column("attempts", sa.Integer, nullable=False),
+            sa.Column("available_at", sa.DateTime, nullable=False),
+            sa.Column("locked_at", sa.DateTime),
+            sa.Column("locked_by", sa.String),
+            sa.Column("last_error", sa.String),
+            sa.Column("created_at", sa.DateTime),
+        ]),
+    ]
+
+
+_INDEXES = [
+    ("ix_users_id", "users", ["id"], False),
+    ("ix_users_telegram_id", "users", ["telegram_id"], True),
+    ("ix_groups_id", "groups", ["id"], False),
+    ("ix_groups_telegram_group_id", "groups", ["telegram_group_id"], True),
+    ("ix_call_alert_subscriptions_id", "call_alert_subscriptions", ["id"], False),
+    ("ix_alert_subscriptions_id", "alert_subscriptions", ["id"], False),
+    ("ix_alert_subscriptions_telegram_user_id", "alert_subscriptions", ["telegram_user_id"], False),
+    ("ix_alert_subscriptions_group_id", "alert_subscriptions", ["group_id"], False),
+    ("ix_alert_subscriptions_payment_reference", "alert_subscriptions", ["payment_reference"], True),
+    ("ix_alert_subscriptions_active_end", "alert_subscriptions", ["active", "subscription_end"], False),
+    ("ix_call_logs_id", "call_logs", ["id"], False),
+    ("ix_call_jobs_id", "call_jobs", ["id"], False),
+    ("ix_call_jobs_status_available_at", "call_jobs", ["status", "available_at"], False),
+]
+
+
+def upgrade() -> None:
+    inspector = sa.inspect(op.get_bind())
+    existing_tables = set(inspector.get_table_names())
+    for name, columns in _tables():
+        if name not in existing_tables:
+            op.create_table(name, *columns)
+            continue
+        present = {column["name"] for column in inspector.get_columns(name)}
+        for column in columns:
+            if column.name not in present:
+                op.add_column(name, column.copy())
+    inspector = sa.inspect(op.get_bind())
+    for index_name, table, columns, unique in _INDEXES:
+        if index_name not in {index["name"] for index in inspector.get_indexes(table)}:
+            op.create_index(index_name, table, columns, unique=unique)
+
+
+def downgrade() -> None:
+    for name, _ in reversed(_tables()):
+        op.drop_table(name)
@@ -0,0 +1,116 @@
+"""Unify call_alert_subscriptions into alert_subscriptions
+
+Moves call windows and timezone onto alert_subscriptions as integer minutes,
+copies the legacy rows across, drops the legacy table and replaces the
+single-column group_id index with a covering (group_id, active) index.
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-18
+
+"""
+import datetime
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = "0002"
+down_revision: Union[str, None] = "0001"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Legacy call subscriptions never expired; carry that over explicitly.
+LEGACY_SUBSCRIPTION_END = datetime.datetime(2099, 12, 31)
+
+_COVERING_COLUMNS = [
+    "id", "phone_number", "subscription_end",
+    "call_window_start_minute", "call_window_end_minute", "timezone",
+]
+
+
+def _minutes(value, default):
+    try:
+        hours, minutes = str(value).split(":")[:2]
+        return int(hours) * 60 + int(minutes)
+    except (TypeError, ValueError):
+        return default
+
+
+def upgrade() -> None:
+    bind = op.get_bind()
+    with op.batch_alter_table("alert_subscriptions") as batch:
+        batch.add_column(sa.Column("call_window_start_minute", sa.Integer, nullable=False, server_default="0"))
+        batch.add_column(sa.Column("call_window_end_minute", sa.Integer, nullable=False, server_default="1439"))
+        batch.add_column(sa.Column("timezone", sa.String, nullable=False, server_default="UTC"))
+
+    legacy = bind.execute(sa.text(
+        "SELECT u.telegram_id, u.phone_number, g.telegram_group_id, c.active, "
+        "c.call_window_start, c.call_window_end, c.timezone "
+        "FROM call_alert_subscriptions c "
+        "JOIN users u ON u.id = c.user_id "
+        "JOIN groups g ON g.id = c.group_id"
+    )).fetchall()
+    alert_subscriptions = sa.table(
+        "alert_subscriptions",
+        sa.column("telegram_user_id", sa.String),
+        sa.column("group_id", sa.String),
+        sa.column("phone_number", sa.String),
+        sa.column("subscription_start", sa.DateTime),
+        sa.column("subscription_end", sa.DateTime),
+        sa.column("active", sa.Boolean),
+        sa.column("call_window_start_minute", sa.Integer),
+        sa.column("call_window_end_minute", sa.Integer),
+        sa.column("timezone", sa.String),
+    )
+    existing = {
+        (row.telegram_user_id, row.group_id)
+        for row in bind.execute(sa.select(alert_subscriptions.c.telegram_user_id, alert_subscriptions.c.group_id))
+    }
+    now = datetime.datetime.utcnow()
+    rows = [
+        {
+            "telegram_user_id": row.telegram_id,
+            "group_id": row.telegram_group_id,
+            "phone_number": row.phone_number,
+            "subscription_start": now,
+            "subscription_end": LEGACY_SUBSCRIPTION_END,
+            "active": bool(row.active),
+            "call_window_start_minute": _minutes(row.call_window_start, 0),
+            "call_window_end_minute": _minutes(row.call_window_end, 23 * 60 + 59),
+            "timezone": row.timezone or "UTC",
+        }
+        for row in legacy
+        if (row.telegram_id, row.telegram_group_id) not in existing
+    ]
+    if rows:
+        op.bulk_insert(alert_subscriptions, rows)
+
+    op.drop_table("call_alert_subscriptions")
+    op.drop_index("ix_alert_subscriptions_group_id", table_name="alert_subscriptions")
+    op.create_index(
+        "ix_alert_subscriptions_group_active",
+        "alert_subscriptions",
+        ["group_id", "active"],
+        postgresql_include=_COVERING_COLUMNS,
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_alert_subscriptions_group_active", table_name="alert_subscriptions")
+    op.create_index("ix_alert_subscriptions_group_id", "alert_subscriptions", ["group_id"])
+    op.create_table(
+        "call_alert_subscriptions",
+        sa.Column("id", sa.Integer, primary_key=True, index=True),
+        sa.Column("user_id", sa.Integer, sa.ForeignKey("users.id")),
+        sa.Column("group_id", sa.Integer, sa.ForeignKey("groups.id")),
+        sa.Column("active", sa.Boolean),
+        sa.Column("call_window_start", sa.String),
+        sa.Column("call_window_end", sa.String),
+        sa.Column("timezone", sa.String),
+    )
+    with op.batch_alter_table("alert_subscriptions") as batch:
+        batch.drop_column("timezone")
+        batch.drop_column("call_window_end_minute")
+        batch.drop_column("call_window_start_minute")
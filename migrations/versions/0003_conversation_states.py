@@ -0,0 +1,33 @@
+"""Add conversation_states for the durable bot conversation store
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-18
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = "0003"
+down_revision: Union[str, None] = "0002"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "conversation_states",
+        sa.Column("key", sa.String, primary_key=True),
+        sa.Column("data", sa.JSON, nullable=False),
+        sa.Column("updated_at", sa.DateTime, nullable=False),
+        sa.Column("expires_at", sa.DateTime, nullable=False),
+    )
+    op.create_index("ix_conversation_states_expires_at", "conversation_states", ["expires_at"])
+
+
+def downgrade() -> None:
+    op.drop_index("ix_conversation_states_expires_at", table_name="conversation_states")
+    op.drop_table("conversation_states")
@@ -0,0 +1,55 @@
+"""Add per-subscription ack timeouts and persisted escalation timers
+
+Adds alert_subscriptions.ack_timeout_seconds, widens the covering recipient
+index with the columns the escalation ladder reads (telegram_user_id and the
+ack timeout), and creates escalation_timers.
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-18
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = "0004"
+down_revision: Union[str, None] = "0003"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+_COVERING_COLUMNS = [
+    "id", "phone_number", "subscription_end",
+    "call_window_start_minute", "call_window_end_minute", "timezone",
+]
+
+
+def _recreate_covering_index(columns):
+    op.drop_index("ix_alert_subscriptions_group_active", table_name="alert_subscriptions")
+    op.create_index(
+        "ix_alert_subscriptions_group_active",
+        "alert_subscriptions",
+        ["group_id", "active"],
+        postgresql_include=columns,
+    )
+
+
+def upgrade() -> None:
+    with op.batch_alter_table("alert_subscriptions") as batch:
+        batch.add_column(sa.Column("ack_timeout_seconds", sa.Integer, nullable=True))
+    _recreate_covering_index(_COVERING_COLUMNS + ["telegram_user_id", "ack_timeout_seconds"])
+    op.create_table(
+        "escalation_timers",
+        sa.Column("key", sa.String, primary_key=True),
+        sa.Column("payload", sa.JSON, nullable=False),
+        sa.Column("due_at", sa.DateTime, nullable=False),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("escalation_timers")
+    _recreate_covering_index(_COVERING_COLUMNS)
+    with op.batch_alter_table("alert_subscriptions") as batch:
+        batch.drop_column("ack_timeout_seconds")
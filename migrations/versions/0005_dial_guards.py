@@ -0,0 +1,31 @@
+"""Add dial_guards for per-number rate limiting and dial de-duplication
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2026-10-18
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = "0005"
+down_revision: Union[str, None] = "0004"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "dial_guards",
+        sa.Column("phone_number", sa.String, primary_key=True),
+        sa.Column("tokens", sa.Float, nullable=False),
+        sa.Column("refilled_at", sa.DateTime, nullable=False),
+        sa.Column("in_flight_until", sa.DateTime, nullable=True),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("dial_guards")
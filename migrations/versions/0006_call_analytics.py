@@ -0,0 +1,95 @@
+"""Add call_events, hourly call rollups and call_logs indexes
+
+call_events is append-only. On Postgres it is range-partitioned by day on
+occurred_at, with a default partition and the first week of daily
+partitions; backend.analytics keeps creating (and expiring) partitions
+after that. Elsewhere it is a plain table.
+
+Revision ID: 0006
+Revises: 0005
+Create Date: 2026-10-18
+
+"""
+import datetime
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = "0006"
+down_revision: Union[str, None] = "0005"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+_INITIAL_PARTITION_DAYS = 7
+
+_COUNT_COLUMNS = (
+    "dials", "retries", "rejected", "suppressed", "answered", "completed",
+    "busy", "no_answer", "failed", "canceled", "sms",
+)
+
+
+def upgrade() -> None:
+    bind = op.get_bind()
+    if bind.dialect.name == "postgresql":
+        op.execute("""
+            CREATE TABLE call_events (
+                id BIGINT GENERATED BY DEFAULT AS IDENTITY,
+                occurred_at TIMESTAMP NOT NULL,
+                group_id VARCHAR,
+                subscription_id INTEGER,
+                call_sid VARCHAR,
+                event VARCHAR NOT NULL,
+                retry_count INTEGER NOT NULL DEFAULT 0,
+                duration_seconds INTEGER,
+                PRIMARY KEY (id, occurred_at)
+            ) PARTITION BY RANGE (occurred_at)
+        """)
+        op.execute("CREATE TABLE call_events_default PARTITION OF call_events DEFAULT")
+        today = datetime.datetime.utcnow().date()
+        for offset in range(_INITIAL_PARTITION_DAYS):
+            day = today + datetime.timedelta(days=offset)
+            op.execute(
+                f"CREATE TABLE call_events_p{day:%Y%m%d} PARTITION OF call_events "
+                f"FOR VALUES FROM ('{day}') TO ('{day + datetime.timedelta(days=1)}')"
+            )
+    else:
+        op.create_table(
+            "call_events",
+            sa.Column("id", sa.Integer, primary_key=True, autoincrement=True),
+            sa.Column("occurred_at", sa.DateTime, nullable=False),
+            sa.Column("group_id", sa.String),
+            sa.Column("subscription_id", sa.Integer),
+            sa.Column("call_sid", sa.String),
+            sa.Column("event", sa.String, nullable=False),
+            sa.Column("retry_count", sa.Integer, nullable=False, server_default="0"),
+            sa.Column("duration_seconds", sa.Integer),
+        )
+
+    op.create_table(
+        "call_rollups_hourly",
+        sa.Column("group_id", sa.String, primary_key=True),
+        sa.Column("hour", sa.DateTime, primary_key=True),
+        *[sa.Column(name, sa.Integer, nullable=False, server_default="0") for name in _COUNT_COLUMNS],
+        sa.Column("duration_seconds", sa.BigInteger, nullable=False, server_default="0"),
+    )
+    state = op.create_table(
+        "call_rollup_state",
+        sa.Column("name", sa.String, primary_key=True),
+        sa.Column("last_event_id", sa.BigInteger, nullable=False, server_default="0"),
+    )
+    # Seeded so concurrent rollup runs can lock the row instead of racing to create it.
+    op.bulk_insert(state, [{"name": "hourly", "last_event_id": 0}])
+
+    op.create_index("ix_call_logs_subscription_id_timestamp", "call_logs", ["subscription_id", "timestamp"])
+    op.create_index("ix_call_logs_timestamp", "call_logs", ["timestamp"])
+
+
+def downgrade() -> None:
+    op.drop_index("ix_call_logs_timestamp", table_name="call_logs")
+    op.drop_index("ix_call_logs_subscription_id_timestamp", table_name="call_logs")
+    op.drop_table("call_rollup_state")
+    op.drop_table("call_rollups_hourly")
+    # Dropping a partitioned table drops its partitions.
+    op.drop_table("call_events")
@@ -0,0 +1,31 @@
+"""Record the caller ID on call_events
+
+Status callbacks carry the number that placed the call, so answer rates can
+be computed per caller ID. On Postgres the column and index propagate to
+every call_events partition.
+
+Revision ID: 0007
+Revises: 0006
+Create Date: 2026-10-18
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = "0007"
+down_revision: Union[str, None] = "0006"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column("call_events", sa.Column("caller_id", sa.String, nullable=True))
+    op.create_index("ix_call_events_caller_id_occurred_at", "call_events", ["caller_id", "occurred_at"])
+
+
+def downgrade() -> None:
+    op.drop_index("ix_call_events_caller_id_occurred_at", table_name="call_events")
+    op.drop_column("call_events", "caller_id")
@@ -0,0 +1,33 @@
+"""Add signal_bursts for the shared signal coalescer state
+
+Revision ID: 0008
+Revises: 0007
+Create Date: 2026-10-18
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = "0008"
+down_revision: Union[str, None] = "0007"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "signal_bursts",
+        sa.Column("group_id", sa.String, primary_key=True),
+        sa.Column("title", sa.String, nullable=True),
+        sa.Column("messages", sa.JSON, nullable=False),
+        sa.Column("fire_at", sa.DateTime, nullable=True),
+        sa.Column("last_dispatch_at", sa.DateTime, nullable=True),
+        sa.Column("dispatches", sa.JSON, nullable=False),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("signal_bursts")
@@ -0,0 +1,27 @@
+"""Add alert_subscriptions.updated_at so every process can see which groups changed
+
+Revision ID: 0009
+Revises: 0008
+Create Date: 2026-10-18
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = "0009"
+down_revision: Union[str, None] = "0008"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column("alert_subscriptions", sa.Column("updated_at", sa.DateTime, nullable=True))
+    op.create_index("ix_alert_subscriptions_updated_at", "alert_subscriptions", ["updated_at"])
+
+
+def downgrade() -> None:
+    op.drop_index("ix_alert_subscriptions_updated_at", table_name="alert_subscriptions")
+    op.drop_column("alert_subscriptions", "updated_at")
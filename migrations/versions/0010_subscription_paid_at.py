@@ -0,0 +1,30 @@
+"""Record when each alert subscription's payment reference was used
+
+Revision ID: 0010
+Revises: 0009
+Create Date: 2026-10-18
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = "0010"
+down_revision: Union[str, None] = "0009"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column("alert_subscriptions", sa.Column("paid_at", sa.DateTime, nullable=True))
+    # Subscriptions that are, or were, running have been paid for.
+    op.execute(
+        "UPDATE alert_subscriptions SET paid_at = subscription_start "
+        "WHERE active = true OR reminder_sent_at IS NOT NULL"
+    )
+
+
+def downgrade() -> None:
+    op.drop_column("alert_subscriptions", "paid_at")
@@ -1,15 +1,47 @@
 # models/alert_subscription.py
 import datetime
-from sqlalchemy import Column, Integer, String, Boolean, DateTime
+from sqlalchemy import Column, Integer, String, Boolean, DateTime, Index
 from db.internal_database import Base
 
 class AlertSubscription(Base):
+    """
+    One call-alert recipient: a Telegram user's paid subscription to a group's signals.
+    This is the only table the dial path reads.
+    """
     __tablename__ = "alert_subscriptions"
 
     id = Column(Integer, primary_key=True, index=True)
     telegram_user_id = Column(String, nullable=False, index=True)
-    group_id = Column(String, nullable=False, index=True)  # This should match the group_id from external subscription
+    group_id = Column(String, nullable=False)  # Telegram group id; matches the group_id from the external subscription
     phone_number = Column(String, nullable=False)
     subscription_start = Column(DateTime, default=datetime.datetime.utcnow)
     subscription_end = Column(DateTime, nullable=False)  # e.g., subscription valid for 30 days
     active = Column(Boolean, default=True)
+    payment_reference = Column(String, unique=True, index=True, nullable=True)  # Paystack transaction reference
+    paid_at = Column(DateTime, nullable=True)  # When payment_reference activated this subscription; each activates once
+    reminder_sent_at = Column(DateTime, nullable=True)  # Renewal reminder for the current period
+    # Call window as minutes after local midnight in `timezone`; start > end wraps past midnight.
+    call_window_start_minute = Column(Integer, nullable=False, default=0)
+    call_window_end_minute = Column(Integer, nullable=False, default=23 * 60 + 59)
+    timezone = Column(String, nullable=False, default="UTC")  # IANA name
+    # Seconds to wait for an acknowledgement before each escalation step; NULL uses ESCALATION_ACK_TIMEOUT_SECONDS.
+    ack_timeout_seconds = Column(Integer, nullable=True)
+    # Set on every insert and UPDATE statement; other processes poll it to drop stale recipient lists.
+    updated_at = Column(DateTime, nullable=True, default=datetime.datetime.utcnow, onupdate=datetime.datetime.utcnow)
+
+    __table_args__ = (
+        # Serves the expiry sweeper's "active and ending before X" range scans.
+        Index("ix_alert_subscriptions_active_end", "active", "subscription_end"),
+        Index("ix_alert_subscriptions_updated_at", "updated_at"),
+        # Covering index for recipient resolution: the dial path is an index-only scan on Postgres.
+        Index(
+            "ix_alert_subscriptions_group_active",
+            "group_id",
+            "active",
+            postgresql_include=[
+                "id", "phone_number", "subscription_end",
+                "call_window_start_minute", "call_window_end_minute", "timezone",
+                "telegram_user_id", "ack_timeout_seconds",
+            ],
+        ),
+    )
@@ -0,0 +1,27 @@
+# models/call_event.py
+from sqlalchemy import Column, BigInteger, Integer, String, DateTime, Index
+from datetime import datetime
+from db.internal_database import Base
+
+class CallEvent(Base):
+    """
+    Append-only record of one thing that happened to an alert call: a dial,
+    a suppressed or rejected dial, a redial, or a Twilio status callback.
+    On Postgres the table is range-partitioned by day on occurred_at (see migration 0006).
+    """
+    __tablename__ = "call_events"
+
+    id = Column(BigInteger().with_variant(Integer, "sqlite"), primary_key=True, autoincrement=True)
+    occurred_at = Column(DateTime, nullable=False, default=datetime.utcnow)
+    group_id = Column(String, nullable=True)  # Telegram group id
+    subscription_id = Column(Integer, nullable=True)  # Known for dials, not for callbacks
+    call_sid = Column(String, nullable=True)
+    event = Column(String, nullable=False)  # dialed, rejected, suppressed, retry, sms, or a Twilio CallStatus
+    retry_count = Column(Integer, nullable=False, default=0)
+    duration_seconds = Column(Integer, nullable=True)  # Twilio CallDuration, on the completed callback
+    caller_id = Column(String, nullable=True)  # Twilio From, on status callbacks; weighs the caller-ID pool
+
+    __table_args__ = (
+        # Caller-ID answer-rate reads: one number's recent events (see migration 0007).
+        Index("ix_call_events_caller_id_occurred_at", "caller_id", "occurred_at"),
+    )
@@ -0,0 +1,21 @@
+# models/call_job.py
+from sqlalchemy import Column, Integer, String, DateTime, JSON, Index
+from datetime import datetime
+from db.internal_database import Base
+
+class CallJob(Base):
+    __tablename__ = "call_jobs"
+
+    id = Column(Integer, primary_key=True, index=True)
+    kind = Column(String, nullable=False)
+    payload = Column(JSON, nullable=False)
+    status = Column(String, nullable=False, default="pending")  # pending, running, done, failed
+    attempts = Column(Integer, nullable=False, default=0)
+    available_at = Column(DateTime, nullable=False, default=datetime.utcnow)
+    locked_at = Column(DateTime, nullable=True)
+    locked_by = Column(String, nullable=True)
+    last_error = Column(String, nullable=True)
+    created_at = Column(DateTime, default=datetime.utcnow)
+
+    # Serves the worker claim query: pending jobs that are due, oldest first.
+    __table_args__ = (Index("ix_call_jobs_status_available_at", "status", "available_at"),)
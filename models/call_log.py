@@ -1,5 +1,5 @@
 # models/call_log.py
-from sqlalchemy import Column, Integer, String, DateTime, ForeignKey
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Index
 from datetime import datetime
 from db.internal_database import Base
 
@@ -11,3 +11,9 @@ class CallLog(Base):
     status = Column(String)
     details = Column(String)
     timestamp = Column(DateTime, default=datetime.utcnow)
+
+    __table_args__ = (
+        # Per-subscription history, newest first, and time-range scans for reports.
+        Index("ix_call_logs_subscription_id_timestamp", "subscription_id", "timestamp"),
+        Index("ix_call_logs_timestamp", "timestamp"),
+    )
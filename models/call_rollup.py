@@ -0,0 +1,34 @@
+# models/call_rollup.py
+from sqlalchemy import Column, BigInteger, Integer, String, DateTime
+from db.internal_database import Base
+
+class CallRollupHourly(Base):
+    """
+    Per-group, per-hour call counts, maintained incrementally from call_events.
+    """
+    __tablename__ = "call_rollups_hourly"
+
+    group_id = Column(String, primary_key=True)
+    hour = Column(DateTime, primary_key=True)  # UTC, truncated to the hour
+    dials = Column(Integer, nullable=False, default=0)
+    retries = Column(Integer, nullable=False, default=0)
+    rejected = Column(Integer, nullable=False, default=0)
+    suppressed = Column(Integer, nullable=False, default=0)
+    answered = Column(Integer, nullable=False, default=0)
+    completed = Column(Integer, nullable=False, default=0)
+    busy = Column(Integer, nullable=False, default=0)
+    no_answer = Column(Integer, nullable=False, default=0)
+    failed = Column(Integer, nullable=False, default=0)
+    canceled = Column(Integer, nullable=False, default=0)
+    sms = Column(Integer, nullable=False, default=0)
+    duration_seconds = Column(BigInteger, nullable=False, default=0)
+
+
+class CallRollupState(Base):
+    """
+    How far into call_events each rollup has read.
+    """
+    __tablename__ = "call_rollup_state"
+
+    name = Column(String, primary_key=True)  # e.g. "hourly"
+    last_event_id = Column(BigInteger, nullable=False, default=0)
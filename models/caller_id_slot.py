@@ -0,0 +1,13 @@
+# models/caller_id_slot.py
+from sqlalchemy import Column, String, DateTime
+from db.internal_database import Base
+
+class CallerIdSlot(Base):
+    """
+    The earliest time the next call may start from one outbound caller ID, shared by every process
+    so the number's CPS holds however many workers dial (see backend/dial_guard.py).
+    """
+    __tablename__ = "caller_id_slots"
+
+    caller_id = Column(String, primary_key=True)
+    next_slot = Column(DateTime, nullable=False)  # UTC, from the database clock
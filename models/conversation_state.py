@@ -0,0 +1,16 @@
+# models/conversation_state.py
+from sqlalchemy import Column, String, DateTime, JSON
+from datetime import datetime
+from db.internal_database import Base
+
+class ConversationState(Base):
+    """
+    Per-user state of a multi-step bot conversation (e.g. the signup flow),
+    shared by every bot instance.
+    """
+    __tablename__ = "conversation_states"
+
+    key = Column(String, primary_key=True)  # e.g. "signup:<telegram user id>"
+    data = Column(JSON, nullable=False, default=dict)
+    updated_at = Column(DateTime, nullable=False, default=datetime.utcnow)
+    expires_at = Column(DateTime, nullable=False, index=True)
@@ -0,0 +1,14 @@
+# models/dial_guard_state.py
+from sqlalchemy import Column, String, Float, DateTime
+from db.internal_database import Base
+
+class DialGuardState(Base):
+    """
+    Per-phone-number dial budget and in-flight lease, shared by every process (see backend/dial_guard.py).
+    """
+    __tablename__ = "dial_guards"
+
+    phone_number = Column(String, primary_key=True)
+    tokens = Column(Float, nullable=False)
+    refilled_at = Column(DateTime, nullable=False)
+    in_flight_until = Column(DateTime, nullable=True)  # NULL once the call's final status arrives
@@ -0,0 +1,15 @@
+# models/escalation_timer.py
+from sqlalchemy import Column, String, DateTime, JSON
+from db.internal_database import Base
+
+class EscalationTimer(Base):
+    """
+    A pending escalation step, saved when it is scheduled and deleted by the
+    process that runs it (or by an ack), so a restarted process picks the
+    alert ladder up where it stopped.
+    """
+    __tablename__ = "escalation_timers"
+
+    key = Column(String, primary_key=True)  # "<alert id>:<subscription id>:<step>"
+    payload = Column(JSON, nullable=False)
+    due_at = Column(DateTime, nullable=False)
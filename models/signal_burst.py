@@ -0,0 +1,17 @@
+# models/signal_burst.py
+from sqlalchemy import Column, String, DateTime, JSON
+from db.internal_database import Base
+
+class SignalBurst(Base):
+    """
+    Per-group coalescer state shared by every bot, webhook and worker process:
+    the messages not yet sent, when they are due to go out, and recent alert times.
+    """
+    __tablename__ = "signal_bursts"
+
+    group_id = Column(String, primary_key=True)  # Telegram group id
+    title = Column(String, nullable=True)
+    messages = Column(JSON, nullable=False, default=list)  # held until fire_at
+    fire_at = Column(DateTime, nullable=True)  # set while a send is scheduled
+    last_dispatch_at = Column(DateTime, nullable=True)
+    dispatches = Column(JSON, nullable=False, default=list)  # ISO times of alerts sent in the last hour
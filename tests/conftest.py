@@ -0,0 +1,26 @@
+# tests/conftest.py
+# App modules read their configuration at import time, so the environment is
+# set here, before any test module imports them.
+# With TEST_POSTGRES_URL set (as in CI) the internal database is that scratch Postgres
+# database, and the Postgres-only backends are tested alongside the memory ones.
+import os
+import tempfile
+import pytest
+
+TEST_POSTGRES_URL = os.getenv("TEST_POSTGRES_URL")
+
+_scratch = tempfile.mkdtemp(prefix="alert-tests-")
+os.environ["INTERNAL_DATABASE_URL"] = TEST_POSTGRES_URL or f"sqlite:///{_scratch}/internal.db"
+os.environ["EXTERNAL_DATABASE_URL"] = f"sqlite:///{_scratch}/external.db"
+os.environ["CALL_QUEUE_BACKEND"] = "memory"
+os.environ["DIAL_GUARD_BACKEND"] = "memory"
+os.environ["SIGNAL_COALESCER_BACKEND"] = "memory"
+os.environ.setdefault("TWILIO_ACCOUNT_SID", "ACtest")
+os.environ.setdefault("TWILIO_AUTH_TOKEN", "test")
+os.environ["PAYSTACK_SECRET_KEY"] = "sk_test_fake"
+
+
+@pytest.fixture(scope="session", autouse=True)
+def internal_schema():
+    from db.migrate import upgrade
+    upgrade()
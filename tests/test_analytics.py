@@ -0,0 +1,34 @@
+# tests/test_analytics.py
+import uuid
+import asyncio
+from datetime import datetime, timedelta
+from backend.analytics import refresh_rollups, hourly_rollups, summarize
+
+
+def _record(group_id, *ages):
+    """
+    Inserts one "dialed" event per age (seconds before now), in that id order.
+    """
+    from db.internal_database import SessionLocal
+    from models.call_event import CallEvent
+    now = datetime.utcnow()
+    with SessionLocal() as session:
+        for age in ages:
+            session.add(CallEvent(occurred_at=now - timedelta(seconds=age), group_id=group_id, event="dialed"))
+            session.commit()
+
+
+def _dials(group_id):
+    rows = asyncio.run(hourly_rollups(group_id, datetime.utcnow() - timedelta(days=1)))
+    return summarize(rows)["dials"]
+
+
+def test_watermark_stops_at_events_inside_the_lag_window():
+    group_id = f"-100{uuid.uuid4().int % 10**9}"
+    asyncio.run(refresh_rollups(lag=0))
+    # The middle event was buffered later than the one inserted after it.
+    _record(group_id, 600, 5, 600)
+    asyncio.run(refresh_rollups(lag=60))
+    assert _dials(group_id) == 1
+    asyncio.run(refresh_rollups(lag=0))
+    assert _dials(group_id) == 3
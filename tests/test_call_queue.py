@@ -0,0 +1,56 @@
+# tests/test_call_queue.py
+import asyncio
+from sqlalchemy import delete
+from db.internal_database import engine, SessionLocal
+from models.call_job import CallJob
+from backend import call_queue as call_queue_module
+from backend.call_queue import MemoryCallQueue, PostgresCallQueue
+
+
+def _queues():
+    # The Postgres queue needs SKIP LOCKED, so it is only tested when the suite runs on Postgres.
+    queues = [MemoryCallQueue()]
+    if engine.dialect.name == "postgresql":
+        with SessionLocal() as session:
+            session.execute(delete(CallJob))
+            session.commit()
+        queues.append(PostgresCallQueue())
+    return queues
+
+
+def test_concurrent_workers_never_claim_the_same_job():
+    async def scenario(queue):
+        ids = {await queue.enqueue("alert", {"n": n}) for n in range(6)}
+        batches = await asyncio.gather(*(queue.claim(f"worker-{w}", limit=2) for w in range(4)))
+        claimed = [job.id for batch in batches for job in batch]
+        return ids, claimed
+    for queue in _queues():
+        ids, claimed = asyncio.run(scenario(queue))
+        assert sorted(claimed) == sorted(ids)
+
+
+def test_delayed_job_waits_until_it_is_due():
+    async def scenario(queue):
+        await queue.enqueue("redial", {}, delay=0.3)
+        early = await queue.claim("worker-1")
+        await asyncio.sleep(0.4)
+        return early, await queue.claim("worker-1")
+    for queue in _queues():
+        early, due = asyncio.run(scenario(queue))
+        assert early == [] and [job.kind for job in due] == ["redial"]
+
+
+def test_expired_lease_is_taken_over_and_the_old_worker_loses_it(monkeypatch):
+    monkeypatch.setattr(call_queue_module, "CALL_JOB_LEASE_SECONDS", 0.2)
+
+    async def scenario(queue):
+        job_id = await queue.enqueue("alert", {})
+        [job] = await queue.claim("worker-1")
+        renewed = await queue.heartbeat(job_id, "worker-1")
+        await asyncio.sleep(0.3)
+        [retaken] = await queue.claim("worker-2")
+        return job, renewed, retaken, await queue.heartbeat(job_id, "worker-1"), await queue.heartbeat(job_id, "worker-2")
+    for queue in _queues():
+        job, renewed, retaken, old_worker, new_worker = asyncio.run(scenario(queue))
+        assert renewed and retaken.id == job.id and retaken.attempts == 2
+        assert not old_worker and new_worker
@@ -0,0 +1,45 @@
+# tests/test_coalescer.py
+import uuid
+import asyncio
+from backend.call_queue import MemoryCallQueue
+from backend.coalescer import MemoryCoalescerStore, SqlCoalescerStore, SignalCoalescer
+
+
+def _coalescer(store, sent, **options):
+    async def dispatch(chat_id, title, message_text):
+        sent.append(message_text)
+    return SignalCoalescer(dispatch, MemoryCallQueue(), store, **options)
+
+
+def test_lone_signal_is_sent_at_once():
+    sent = []
+    coalescer = _coalescer(MemoryCoalescerStore(), sent, debounce=5, cooldown=60)
+    assert asyncio.run(coalescer.submit("-1001", "Signals", "BUY EURUSD 1.085")) == "scheduled"
+    assert sent == ["BUY EURUSD 1.085"]
+
+
+def test_signals_during_the_cooldown_go_out_as_one_trailing_alert():
+    async def scenario(store):
+        sent = []
+        coalescer = _coalescer(store, sent, debounce=0, cooldown=0.2)
+        chat_id = f"-100{uuid.uuid4().int % 10**9}"
+        outcomes = [await coalescer.submit(chat_id, "Signals", text) for text in ("BUY EURUSD", "TP 1.09", "SL 1.08")]
+        await asyncio.sleep(0.25)
+        await coalescer.fire(chat_id)
+        return outcomes, sent
+    for store in (MemoryCoalescerStore(), SqlCoalescerStore()):
+        outcomes, sent = asyncio.run(scenario(store))
+        assert outcomes == ["scheduled", "cooldown", "cooldown"]
+        assert sent == ["BUY EURUSD", "TP 1.09\nSL 1.08"]
+
+
+def test_signals_held_too_long_are_dropped():
+    async def scenario():
+        sent = []
+        coalescer = _coalescer(MemoryCoalescerStore(), sent, debounce=0, cooldown=0.2, max_hold=0.1)
+        await coalescer.submit("-1001", "Signals", "BUY EURUSD")
+        await coalescer.submit("-1001", "Signals", "SELL GBPJPY")
+        await asyncio.sleep(0.25)
+        await coalescer.fire("-1001")
+        return sent
+    assert asyncio.run(scenario()) == ["BUY EURUSD"]
@@ -0,0 +1,55 @@
+# tests/test_dial_guard.py
+import uuid
+import asyncio
+from db.internal_database import engine
+from backend.dial_guard import MemoryDialGuard, PostgresDialGuard
+
+
+def _guards(**options):
+    # The Postgres guard's upserts are Postgres SQL, so it is only tested when the suite runs on Postgres.
+    guards = [MemoryDialGuard(**options)]
+    if engine.dialect.name == "postgresql":
+        guards.append(PostgresDialGuard(**options))
+    return guards
+
+
+def _numbers(count):
+    # Fresh numbers each run: the Postgres guard's rows outlive the test.
+    return [f"+1555{uuid.uuid4().int % 10**7:07d}" for _ in range(count)]
+
+
+def test_number_on_a_call_is_not_dialed_again():
+    async def scenario(guard, a, b, c):
+        first = await guard.acquire_many([a, b])
+        again = await guard.acquire_many([a, c])
+        await guard.release(a)
+        return first, again, await guard.acquire_many([a])
+    for guard in _guards():
+        a, b, c = _numbers(3)
+        first, again, after_release = asyncio.run(scenario(guard, a, b, c))
+        assert first == {a, b}
+        assert again == {c}
+        assert after_release == {a}
+
+
+def test_burst_limits_back_to_back_calls():
+    async def scenario(guard, number):
+        allowed = []
+        for _ in range(3):
+            allowed.append(await guard.acquire_many([number]))
+            await guard.release(number)
+        return allowed
+    for guard in _guards(burst=2, refill_seconds=3600):
+        [number] = _numbers(1)
+        assert asyncio.run(scenario(guard, number)) == [{number}, {number}, set()]
+
+
+def test_caller_id_slots_are_spaced_by_the_cps():
+    async def scenario(guard, caller_id):
+        # Concurrent calls from one number get evenly spaced slots.
+        return await asyncio.gather(*(guard.reserve_slot(caller_id, 0.5) for _ in range(4)))
+    for guard in _guards():
+        [caller_id] = _numbers(1)
+        delays = sorted(asyncio.run(scenario(guard, caller_id)))
+        assert delays[0] < 0.1
+        assert all(0.4 < later - earlier < 0.6 for earlier, later in zip(delays, delays[1:]))
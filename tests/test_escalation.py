@@ -0,0 +1,69 @@
+# tests/test_escalation.py
+import uuid
+import asyncio
+from contextlib import asynccontextmanager
+from backend import escalation as escalation_module
+from backend.escalation import Escalation, EscalationEngine
+
+
+def _engine(calls):
+    engine = EscalationEngine(ladder=("sms", "call"))
+
+    async def step_call(batch):
+        calls.extend(escalation.key for escalation in batch)
+        return []
+    engine._step_call = step_call
+    return engine
+
+
+def _escalation():
+    # Waiting on the call step, as after a delivered SMS.
+    return Escalation(uuid.uuid4().hex[:12], "-1001", "Signals", "BUY EURUSD", 7, "+15550001111",
+                      ack_timeout_seconds=0, step=1)
+
+
+def test_restored_step_runs_in_one_process_only():
+    async def scenario():
+        calls = []
+        owner, other = _engine(calls), _engine(calls)
+        escalation = _escalation()
+        await owner._schedule([escalation])
+        await other.restore()
+        assert escalation.key in other.wheel
+        await asyncio.gather(owner._escalate([escalation]), other._escalate([Escalation(**vars(escalation))]))
+        return calls, escalation.key
+    calls, key = asyncio.run(scenario())
+    assert calls == [key]
+
+
+def test_acknowledged_step_is_not_run():
+    async def scenario():
+        calls = []
+        owner, other = _engine(calls), _engine(calls)
+        escalation = _escalation()
+        await owner._schedule([escalation])
+        assert await other.acknowledge(escalation.key)
+        await owner._escalate([escalation])
+        await other.restore()
+        return calls, escalation.key in other.wheel
+    calls, restored = asyncio.run(scenario())
+    assert calls == [] and not restored
+
+
+def test_step_that_could_not_be_saved_still_runs(monkeypatch):
+    @asynccontextmanager
+    async def database_down():
+        raise ConnectionError("database unavailable")
+        yield
+
+    async def scenario():
+        calls = []
+        engine = _engine(calls)
+        escalation = _escalation()
+        monkeypatch.setattr(escalation_module, "get_session", database_down)
+        await engine._schedule([escalation])
+        monkeypatch.undo()
+        await engine._escalate([escalation])
+        return calls, escalation.key
+    calls, key = asyncio.run(scenario())
+    assert calls == [key]
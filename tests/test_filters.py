@@ -0,0 +1,37 @@
+# tests/test_filters.py
+from utils.filters import parse_signal, parse_signals
+from backend.escalation import sms_summary
+
+
+def test_direction_word_is_not_the_pair_base():
+    assert parse_signal("BUY EUR/USD @ 1.085 TP 1.09 SL 1.08").summary() == "BUY EURUSD @ 1.085 TP 1.09 SL 1.08"
+
+
+def test_entry_after_pair_and_order_type():
+    signal = parse_signal("SELL GBP/JPY now 190.5")
+    assert (signal.direction, signal.pair, signal.entry) == ("SELL", "GBPJPY", 190.5)
+
+
+def test_instrument_named_in_words():
+    assert parse_signal("Buy gold now 2345, sl 2338, tp 2360").summary() == "BUY XAUUSD @ 2345 TP 2360 SL 2338"
+
+
+def test_coalesced_alert_is_parsed_per_signal():
+    signals = parse_signals("BUY EURUSD 1.085 TP 1.09\nSELL GBPJPY 191.2 SL 192")
+    assert [signal.summary() for signal in signals] == ["BUY EURUSD @ 1.085 TP 1.09", "SELL GBPJPY @ 191.2 SL 192"]
+    assert sms_summary("BUY EURUSD 1.085 TP 1.09\nSELL GBPJPY 191.2 SL 192") == (
+        "BUY EURUSD @ 1.085 TP 1.09 | SELL GBPJPY @ 191.2 SL 192"
+    )
+
+
+def test_multiline_signal_stays_one_signal():
+    assert [signal.summary() for signal in parse_signals("BUY EURUSD 1.085\nTP 1.09\nSL 1.08")] == [
+        "BUY EURUSD @ 1.085 TP 1.09 SL 1.08"
+    ]
+
+
+def test_sms_falls_back_to_the_text_without_pair_or_entry():
+    assert sms_summary("BUY EURUSD TP 1.09 SL 1.08") is None
+    assert sms_summary("Buy now 2345, sl 2338") is None
+    assert sms_summary("EURUSD TP1 hit") is None
+    assert sms_summary("Good morning traders") is None
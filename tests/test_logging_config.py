@@ -0,0 +1,21 @@
+# tests/test_logging_config.py
+import json
+import logging
+from utils.logging_config import JsonFormatter, Redactor
+
+
+def _format(**extra):
+    record = logging.makeLogRecord({"msg": "Calling %s", "args": ("+2348012345678",), "levelno": logging.INFO, **extra})
+    return json.loads(JsonFormatter(Redactor(["sk_live_abcdef123456"])).format(record))
+
+
+def test_message_and_extra_fields_are_redacted():
+    entry = _format(phone="+2348012345678", number=2348012345678, payload={"to": ["+2348012345678"]},
+                    auth="Bearer sk_live_abcdef123456", group_id="-1001234567890", attempt=2)
+    assert entry["msg"] == "Calling +***5678"
+    assert entry["phone"] == "+***5678"
+    assert entry["number"] == "+***5678"
+    assert entry["payload"] == {"to": ["+***5678"]}
+    assert entry["auth"] == "Bearer [REDACTED]"
+    assert entry["group_id"] == "-1001234567890"
+    assert entry["attempt"] == 2
@@ -0,0 +1,158 @@
+# tests/test_paystack.py
+import hmac
+import asyncio
+import hashlib
+import datetime
+import httpx
+from backend import paystack
+from benchmarks.fake_paystack import FakePaystackConfig, start_fake_paystack
+
+SECRET_KEY = "sk_test_fake"
+
+
+def _run(monkeypatch, scenario):
+    """
+    Runs `scenario(fake)` in a fresh event loop against the Paystack stub, with backend.paystack pointed at it.
+    """
+    async def main():
+        fake, runner, base_url = await start_fake_paystack(FakePaystackConfig(secret_key=SECRET_KEY))
+        monkeypatch.setattr(paystack, "PAYSTACK_BASE_URL", base_url)
+        try:
+            return await scenario(fake)
+        finally:
+            await paystack.close_paystack_client()
+            await runner.cleanup()
+    return asyncio.run(main())
+
+
+def _subscription(reference, active=False):
+    from db.internal_database import SessionLocal
+    from models.alert_subscription import AlertSubscription
+    with SessionLocal() as session:
+        session.query(AlertSubscription).filter(AlertSubscription.payment_reference == reference).delete()
+        session.add(AlertSubscription(
+            telegram_user_id="42", group_id="-1001", phone_number="+15550001111", active=active,
+            subscription_end=datetime.datetime.utcnow(), payment_reference=reference,
+        ))
+        session.commit()
+
+
+def _is_active(reference):
+    from db.internal_database import SessionLocal
+    from models.alert_subscription import AlertSubscription
+    with SessionLocal() as session:
+        return session.query(AlertSubscription).filter(AlertSubscription.payment_reference == reference).one().active
+
+
+async def _post_webhook(body, signature):
+    from backend.webhook import app
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as client:
+        return await client.post("/paystack/webhook", content=body, headers={"x-paystack-signature": signature})
+
+
+def test_initialize_returns_authorization_url(monkeypatch):
+    async def scenario(fake):
+        url = await paystack.initiate_paystack_payment(1000, 7, "https://example.test/done", "a@example.test", reference="init-1")
+        return url, fake.transactions["init-1"]
+
+    url, transaction = _run(monkeypatch, scenario)
+    assert url.startswith("https://checkout.paystack.test/")
+    assert transaction["amount"] == 100000  # kobo
+    assert transaction["metadata"] == {"subscription_id": 7}
+
+
+def test_initialize_with_wrong_key_returns_none(monkeypatch):
+    monkeypatch.setenv("PAYSTACK_SECRET_KEY", "sk_test_wrong")
+
+    async def scenario(fake):
+        return await paystack.initiate_paystack_payment(1000, 7, "https://example.test/done", "a@example.test")
+
+    assert _run(monkeypatch, scenario) is None
+
+
+def test_verify_only_returns_successful_transactions(monkeypatch):
+    async def scenario(fake):
+        await paystack.initiate_paystack_payment(1000, 7, "https://example.test/done", "a@example.test", reference="verify-1")
+        before = await paystack.verify_paystack_transaction("verify-1")
+        fake.pay("verify-1")
+        after = await paystack.verify_paystack_transaction("verify-1")
+        unknown = await paystack.verify_paystack_transaction("no-such-reference")
+        return before, after, unknown
+
+    before, after, unknown = _run(monkeypatch, scenario)
+    assert before is None
+    assert after["status"] == "success" and after["reference"] == "verify-1"
+    assert unknown is None
+
+
+def test_webhook_signature_check():
+    body = b'{"event": "charge.success"}'
+    signature = hmac.new(SECRET_KEY.encode(), body, hashlib.sha512).hexdigest()
+    assert paystack.is_valid_webhook_signature(body, signature)
+    assert not paystack.is_valid_webhook_signature(body + b" ", signature)
+    assert not paystack.is_valid_webhook_signature(body, "")
+
+
+def test_charge_success_webhook_activates_subscription(monkeypatch):
+    _subscription("hook-1")
+
+    async def scenario(fake):
+        await paystack.initiate_paystack_payment(1000, 7, "https://example.test/done", "a@example.test", reference="hook-1")
+        fake.pay("hook-1")
+        return await _post_webhook(*fake.charge_success("hook-1"))
+
+    assert _run(monkeypatch, scenario).status_code == 200
+    assert _is_active("hook-1")
+
+
+def test_replayed_charge_does_not_reactivate_expired_subscription(monkeypatch):
+    from sqlalchemy import update
+    from db.internal_database import SessionLocal
+    from models.alert_subscription import AlertSubscription
+    from backend.expiry import deactivate_expired
+    _subscription("hook-replay")
+
+    async def scenario(fake):
+        await paystack.initiate_paystack_payment(1000, 7, "https://example.test/done", "a@example.test", reference="hook-replay")
+        fake.pay("hook-replay")
+        webhook = fake.charge_success("hook-replay")
+        await _post_webhook(*webhook)
+        # The 30 days run out and the expiry sweep deactivates the subscription.
+        with SessionLocal() as session:
+            session.execute(update(AlertSubscription).where(AlertSubscription.payment_reference == "hook-replay")
+                            .values(subscription_end=datetime.datetime.utcnow() - datetime.timedelta(minutes=1)))
+            session.commit()
+        await deactivate_expired()
+        return await _post_webhook(*webhook)
+
+    assert _run(monkeypatch, scenario).status_code == 200
+    assert not _is_active("hook-replay")
+
+
+def test_webhook_with_bad_signature_is_rejected(monkeypatch):
+    _subscription("hook-2")
+
+    async def scenario(fake):
+        await paystack.initiate_paystack_payment(1000, 7, "https://example.test/done", "a@example.test", reference="hook-2")
+        fake.pay("hook-2")
+        return await _post_webhook(*fake.charge_success("hook-2", secret_key="sk_test_forged"))
+
+    assert _run(monkeypatch, scenario).status_code == 401
+    assert not _is_active("hook-2")
+
+
+def test_underpaid_charge_does_not_activate(monkeypatch):
+    _subscription("hook-3")
+
+    async def scenario(fake):
+        await paystack.initiate_paystack_payment(1000, 7, "https://example.test/done", "a@example.test", reference="hook-3")
+        fake.pay("hook-3", amount=100)  # 1 NGN
+        return await _post_webhook(*fake.charge_success("hook-3"))
+
+    assert _run(monkeypatch, scenario).status_code == 200
+    assert not _is_active("hook-3")
+
+
+def test_activate_by_reference_ignores_unknown_reference():
+    from backend.subscriptions import activate_by_reference
+    assert asyncio.run(activate_by_reference("never-initialized")) is None
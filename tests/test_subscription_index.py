@@ -0,0 +1,30 @@
+# tests/test_subscription_index.py
+import uuid
+import asyncio
+import datetime
+from sqlalchemy import update
+from db.internal_database import SessionLocal
+from models.alert_subscription import AlertSubscription
+from backend.subscription_index import SubscriptionIndex
+
+
+def test_change_from_another_process_drops_the_cached_group():
+    group_id = f"-100{uuid.uuid4().int % 10**9}"
+    with SessionLocal() as session:
+        session.add(AlertSubscription(
+            telegram_user_id="42", group_id=group_id, phone_number="+15550001111", active=True,
+            subscription_end=datetime.datetime.utcnow() + datetime.timedelta(days=30),
+        ))
+        session.commit()
+    index = SubscriptionIndex()
+    asyncio.run(index.warm())
+    assert len(index.get(group_id).recipients) == 1
+    assert asyncio.run(index.refresh_changed(overlap=0)) == []
+
+    # Another process expires the subscription; this index never sees the call.
+    with SessionLocal() as session:
+        session.execute(update(AlertSubscription).where(AlertSubscription.group_id == group_id).values(active=False))
+        session.commit()
+    assert asyncio.run(index.refresh_changed(overlap=0)) == [group_id]
+    assert index.get(group_id) is None
+    assert asyncio.run(index.load_group(group_id)).recipients == ()
@@ -0,0 +1,54 @@
+# utils/call_windows.py
+import logging
+from datetime import datetime, timezone
+from functools import lru_cache
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+MINUTES_PER_DAY = 24 * 60
+
+
+def to_minute_of_day(value: str) -> int:
+    """
+    Converts an "HH:MM" string to minutes after midnight.
+    """
+    hours, minutes = value.split(":")
+    return int(hours) * 60 + int(minutes)
+
+
+@lru_cache(maxsize=None)
+def get_zone(name: str):
+    try:
+        return ZoneInfo(name)
+    except (ZoneInfoNotFoundError, ValueError):
+        logger.warning("Unknown timezone %r, falling back to UTC.", name)
+        return timezone.utc
+
+
+def utc_offset_minutes(name: str, now: datetime) -> int:
+    """
+    Current UTC offset of a timezone in minutes, honouring daylight saving time.
+    """
+    return int(now.astimezone(get_zone(name)).utcoffset().total_seconds() // 60)
+
+
+def window_mask(starts: np.ndarray, ends: np.ndarray, local_minutes: np.ndarray) -> np.ndarray:
+    """
+    Vectorized window check. A window whose start is after its end wraps past
+    midnight (e.g. 22:00-06:00 matches 23:30 and 05:00). Both ends are inclusive.
+    """
+    inside = (starts <= local_minutes) & (local_minutes <= ends)
+    wrapped = (local_minutes >= starts) | (local_minutes <= ends)
+    return np.where(starts <= ends, inside, wrapped)
+
+
+def local_minutes_of_day(now: datetime, timezones, tz_codes: np.ndarray) -> np.ndarray:
+    """
+    Local minute-of-day for every subscriber, given the distinct timezones of a
+    group and each subscriber's index into them.
+    """
+    offsets = np.fromiter((utc_offset_minutes(name, now) for name in timezones), dtype=np.int32, count=len(timezones))
+    utc_minute = now.hour * 60 + now.minute
+    return (utc_minute + offsets[tz_codes]) % MINUTES_PER_DAY
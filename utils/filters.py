@@ -1,9 +1,168 @@
 # utils/filters.py
+import os
+import re
+import json
+from dataclasses import dataclass, field
+from functools import lru_cache
+from typing import List, Optional
 
-def is_signal_message(message_text: str) -> bool:
+DEFAULT_SIGNAL_KEYWORDS = ("BUY", "SELL", "TP", "SL")
+
+# Optional per-group overrides, e.g. {"-1001234567890": ["BUY", "SELL", "LONG", "SHORT"]}.
+SIGNAL_GROUP_KEYWORDS = json.loads(os.getenv("SIGNAL_GROUP_KEYWORDS", "{}"))
+
+_NUMBER = r"(\d+(?:\.\d+)?)"
+_DIRECTION_RE = re.compile(r"\b(BUY|SELL|LONG|SHORT)\b", re.IGNORECASE)
+# Words that start or qualify an order are never the base of a pair ("BUY EUR/USD" is EURUSD, not BUYEUR).
+_NOT_A_BASE = r"(?!(?:BUY|SELL|LONG|SHORT|LIMIT|STOP|NOW|ENTRY|OPEN|PRICE|AT|TP\d*|SL)\b)"
+_PAIR_RE = re.compile(
+    r"\b" + _NOT_A_BASE + r"([A-Z][A-Z0-9]{1,5})\s?/?\s?(USDT|USD|EUR|GBP|JPY|CHF|CAD|AUD|NZD|BTC|ETH)\b", re.IGNORECASE
+)
+# Instruments usually written by name rather than as a pair.
+_INSTRUMENT_ALIASES = {"GOLD": "XAUUSD", "SILVER": "XAGUSD"}
+_ALIAS_RE = re.compile(r"\b(" + "|".join(_INSTRUMENT_ALIASES) + r")\b", re.IGNORECASE)
+_ORDER_TYPE = r"(?:\s+(?:LIMIT|STOP|NOW))?"
+_ENTRY_RE = re.compile(
+    r"\b(?:BUY|SELL|LONG|SHORT)\b" + _ORDER_TYPE + r"(?:\s+[A-Z0-9/]+?)??" + _ORDER_TYPE
+    + r"\s*(?:@|AT|ENTRY)?\s*[:=]?\s*" + _NUMBER
+    + r"|\b(?:ENTRY|OPEN|PRICE)\b\s*[:=@-]?\s*" + _NUMBER,
+    re.IGNORECASE,
+)
+# A coalesced alert joins several messages with newlines; each line opening an order starts a new signal.
+_SIGNAL_BREAK_RE = re.compile(r"\n(?=\s*(?:BUY|SELL|LONG|SHORT)\b)", re.IGNORECASE)
+_LEVEL_SEPARATOR = r"(?:\s*[:=@-]\s*|\s+)"
+_TAKE_PROFIT_RE = re.compile(r"\bTP\d*" + _LEVEL_SEPARATOR + _NUMBER, re.IGNORECASE)
+_STOP_LOSS_RE = re.compile(r"\bSL" + _LEVEL_SEPARATOR + _NUMBER, re.IGNORECASE)
+_HIT_RE = re.compile(r"\b(TP\d*|SL)\s+(?:HIT|REACHED|DONE|TRIGGERED)\b", re.IGNORECASE)
+
+
+def _trie_pattern(words):
+    """
+    Builds a prefix-factored alternation ("BUY|S(?:ELL|L)|TP") so the regex engine
+    never re-tries a shared prefix once per keyword.
+    """
+    trie = {}
+    for word in words:
+        node = trie
+        for char in word:
+            node = node.setdefault(char, {})
+        node[""] = {}
+
+    def build(node):
+        branches = [re.escape(char) + build(child) for char, child in sorted(node.items()) if char]
+        optional = "" in node
+        if not branches:
+            return ""
+        if len(branches) == 1 and not optional:
+            return branches[0]
+        return "(?:" + "|".join(branches) + ")" + ("?" if optional else "")
+
+    return build(trie)
+
+
+class SignalClassifier:
+    """
+    Matches signal keywords as whole words in a single compiled regex pass.
+    Keywords may carry a numeric suffix ("TP1", "TP2"), but "TIP", "SLOW",
+    "BUYER" or "STOP" do not match.
+    """
+
+    def __init__(self, keywords=DEFAULT_SIGNAL_KEYWORDS):
+        self.keywords = frozenset(keyword.upper() for keyword in keywords)
+        self._pattern = re.compile(r"\b" + _trie_pattern(self.keywords) + r"\d*\b")
+
+    def is_signal(self, message_text: str) -> bool:
+        # A case-sensitive search over the upper-cased text is markedly faster than re.IGNORECASE.
+        return self._pattern.search(message_text.upper()) is not None
+
+
+@lru_cache(maxsize=None)
+def _classifier_for(keywords: frozenset) -> SignalClassifier:
+    return SignalClassifier(keywords)
+
+
+_default_classifier = _classifier_for(frozenset(DEFAULT_SIGNAL_KEYWORDS))
+_group_classifiers = {}
+
+
+def get_classifier(group_id: Optional[str] = None) -> SignalClassifier:
+    """
+    Returns the compiled classifier for a group. Classifiers are built once per
+    distinct keyword set and shared between groups that use the same set.
+    """
+    if group_id is None:
+        return _default_classifier
+    classifier = _group_classifiers.get(group_id)
+    if classifier is None:
+        keywords = SIGNAL_GROUP_KEYWORDS.get(str(group_id))
+        classifier = _classifier_for(frozenset(k.upper() for k in keywords)) if keywords else _default_classifier
+        _group_classifiers[group_id] = classifier
+    return classifier
+
+
+def is_signal_message(message_text: str, group_id: Optional[str] = None) -> bool:
     """
     Check if the message contains trading signal keywords.
     """
-    message_text = message_text.upper()
-    keywords = ["BUY", "SELL", "TP", "SL"]
-    return any(keyword in message_text for keyword in keywords)
+    return get_classifier(group_id).is_signal(message_text)
+
+
+@dataclass
+class Signal:
+    direction: Optional[str] = None  # "BUY" or "SELL"
+    pair: Optional[str] = None       # e.g. "EURUSD"
+    entry: Optional[float] = None
+    take_profits: List[float] = field(default_factory=list)
+    stop_loss: Optional[float] = None
+    hits: List[str] = field(default_factory=list)  # levels reported as reached, e.g. ["TP1"]
+
+    def summary(self) -> str:
+        """
+        One-line form for short channels, e.g. "BUY EURUSD @ 1.085 TP 1.09/1.095 SL 1.08" or "TP1 HIT".
+        """
+        parts = [part for part in (self.direction, self.pair) if part]
+        if self.entry is not None:
+            parts.append(f"@ {self.entry:g}")
+        if self.take_profits:
+            parts.append("TP " + "/".join(f"{value:g}" for value in self.take_profits))
+        if self.stop_loss is not None:
+            parts.append(f"SL {self.stop_loss:g}")
+        parts.extend(f"{level} HIT" for level in self.hits)
+        return " ".join(parts)
+
+
+def parse_signal(message_text: str) -> Optional[Signal]:
+    """
+    Extracts pair, direction, entry, take-profit and stop-loss levels, and levels reported
+    as hit ("TP1 hit"), from a signal message. Returns None when the message has none of them.
+    """
+    signal = Signal()
+    direction = _DIRECTION_RE.search(message_text)
+    if direction:
+        signal.direction = "BUY" if direction.group(1).upper() in ("BUY", "LONG") else "SELL"
+    pair = _PAIR_RE.search(message_text)
+    if pair:
+        signal.pair = (pair.group(1) + pair.group(2)).upper()
+    else:
+        alias = _ALIAS_RE.search(message_text)
+        if alias:
+            signal.pair = _INSTRUMENT_ALIASES[alias.group(1).upper()]
+    entry = _ENTRY_RE.search(message_text)
+    if entry:
+        signal.entry = float(entry.group(1) or entry.group(2))
+    signal.take_profits = [float(value) for value in _TAKE_PROFIT_RE.findall(message_text)]
+    stop_loss = _STOP_LOSS_RE.search(message_text)
+    if stop_loss:
+        signal.stop_loss = float(stop_loss.group(1))
+    signal.hits = [level.upper() for level in _HIT_RE.findall(message_text)]
+    if signal == Signal():
+        return None
+    return signal
+
+
+def parse_signals(message_text: str) -> List[Optional[Signal]]:
+    """
+    Parses each signal in a possibly coalesced alert separately, one entry per
+    signal in order; None for a part that holds no signal.
+    """
+    return [parse_signal(part) for part in _SIGNAL_BREAK_RE.split(message_text)]
@@ -0,0 +1,182 @@
+# utils/logging_config.py
+import os
+import re
+import sys
+import json
+import queue
+import atexit
+import random
+import logging
+import datetime
+from logging.handlers import QueueHandler, QueueListener
+
+LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO").upper()
+LOG_FORMAT = os.getenv("LOG_FORMAT", "json")  # json | text
+# Fraction of DEBUG records kept; DEBUG is where per-message and per-call events live.
+LOG_DEBUG_SAMPLE_RATE = float(os.getenv("LOG_DEBUG_SAMPLE_RATE", "0.01"))
+# Records buffered between the application threads and the writer thread; overflow is dropped.
+LOG_QUEUE_SIZE = int(os.getenv("LOG_QUEUE_SIZE", "10000"))
+# Environment variables whose values must never reach the log output.
+SECRET_ENV_VARS = (
+    "ALERTS_BOT_TOKEN", "TWILIO_AUTH_TOKEN", "PAYSTACK_SECRET_KEY", "TELEGRAM_WEBHOOK_SECRET",
+    "INTERNAL_DATABASE_URL", "EXTERNAL_DATABASE_URL",
+)
+
+_BOT_TOKEN = re.compile(r"\b\d{6,}:[A-Za-z0-9_-]{30,}\b")
+# "+"-prefixed numbers, or 11-15 bare digits; negative Telegram chat ids are left alone.
+_PHONE_NUMBER = re.compile(r"\+\d[\d ()-]{7,}\d|(?<![\w-])\d{11,15}\b")
+_TEXT_FORMAT = "%(asctime)s - %(name)s - %(levelname)s - %(message)s"
+
+_listener = None
+
+
+def _mask_phone(match):
+    digits = re.sub(r"\D", "", match.group(0))
+    return f"+***{digits[-4:]}" if len(digits) >= 9 else match.group(0)
+
+
+class Redactor:
+    """
+    Masks configured secrets, Telegram bot tokens and phone numbers (all but the last four digits).
+    """
+
+    def __init__(self, secrets=()):
+        self.secrets = sorted({s for s in secrets if s and len(s) >= 6}, key=len, reverse=True)
+
+    def __call__(self, text):
+        for secret in self.secrets:
+            text = text.replace(secret, "[REDACTED]")
+        text = _BOT_TOKEN.sub("[REDACTED]", text)
+        return _PHONE_NUMBER.sub(_mask_phone, text)
+
+
+class JsonFormatter(logging.Formatter):
+    """
+    One JSON object per line. Fields passed via `extra=` are included, redacted like the message.
+    """
+
+    _RESERVED = set(vars(logging.makeLogRecord({}))) | {"message", "asctime"}
+
+    def __init__(self, redactor=None):
+        super().__init__()
+        self.redactor = redactor or (lambda text: text)
+
+    def format(self, record):
+        entry = {
+            "ts": datetime.datetime.fromtimestamp(record.created, datetime.timezone.utc).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "msg": self.redactor(record.getMessage()),
+        }
+        for key, value in vars(record).items():
+            if key not in self._RESERVED and not key.startswith("_"):
+                entry[key] = self._redact(value)
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            entry["exc"] = self.redactor(record.exc_text)
+        return json.dumps(entry, default=str)
+
+    def _redact(self, value):
+        if isinstance(value, str):
+            return self.redactor(value)
+        if isinstance(value, dict):
+            return {key: self._redact(item) for key, item in value.items()}
+        if isinstance(value, (list, tuple, set)):
+            return [self._redact(item) for item in value]
+        if value is None or isinstance(value, (bool, float)):
+            return value
+        # Anything else (e.g. a phone number passed as an int) is kept unless its text needs masking.
+        text = str(value)
+        masked = self.redactor(text)
+        return value if masked == text else masked
+
+
+class RedactingTextFormatter(logging.Formatter):
+    def __init__(self, redactor=None):
+        super().__init__(_TEXT_FORMAT)
+        self.redactor = redactor or (lambda text: text)
+
+    def formatMessage(self, record):
+        record.message = self.redactor(record.message)
+        return super().formatMessage(record)
+
+    def formatException(self, exc_info):
+        return self.redactor(super().formatException(exc_info))
+
+
+class DebugSampler(logging.Filter):
+    """
+    Passes every record at INFO and above, and a random `rate` fraction of DEBUG records.
+    """
+
+    def __init__(self, rate):
+        super().__init__()
+        self.rate = rate
+
+    def filter(self, record):
+        return record.levelno > logging.DEBUG or random.random() < self.rate
+
+
+class NonBlockingQueueHandler(QueueHandler):
+    """
+    QueueHandler that drops records instead of blocking when the writer falls behind.
+    Formatting and I/O happen on the listener thread; the caller only enqueues.
+    """
+
+    def __init__(self, log_queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def prepare(self, record):
+        # Merge args now (they may be mutated later); formatting and tracebacks are left to the listener.
+        record.msg = record.getMessage()
+        record.args = None
+        return record
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+def configure_logging(level=LOG_LEVEL, fmt=LOG_FORMAT, debug_sample_rate=LOG_DEBUG_SAMPLE_RATE, stream=None):
+    """
+    Routes all logging through a bounded queue to a background writer thread that
+    formats (JSON lines by default), redacts and writes to stderr. Safe to call more than once.
+    """
+    global _listener
+    if _listener is not None:
+        return _listener
+
+    redactor = Redactor(os.getenv(name) for name in SECRET_ENV_VARS)
+    handler = logging.StreamHandler(stream or sys.stderr)
+    handler.setFormatter(JsonFormatter(redactor) if fmt == "json" else RedactingTextFormatter(redactor))
+
+    log_queue = queue.Queue(LOG_QUEUE_SIZE)
+    queue_handler = NonBlockingQueueHandler(log_queue)
+    queue_handler.addFilter(DebugSampler(debug_sample_rate))
+
+    root = logging.getLogger()
+    for existing in list(root.handlers):
+        root.removeHandler(existing)
+    root.addHandler(queue_handler)
+    root.setLevel(level)
+    # httpx logs every request at INFO, including the bot token in Telegram API URLs.
+    logging.getLogger("httpx").setLevel(logging.WARNING)
+
+    _listener = QueueListener(log_queue, handler, respect_handler_level=True)
+    _listener.start()
+    atexit.register(stop_logging)
+    return _listener
+
+
+def stop_logging():
+    """
+    Flushes queued records and stops the writer thread.
+    """
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
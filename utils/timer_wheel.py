@@ -0,0 +1,75 @@
+# utils/timer_wheel.py
+import math
+import time
+
+
+class TimerWheel:
+    """
+    Hashed timing wheel: `slots` buckets of `tick` seconds each. Scheduling and
+    cancelling are O(1); advancing touches only the buckets that came due.
+    Timers further out than one revolution carry a round count and stay in
+    their bucket until it comes around that many more times.
+    """
+
+    def __init__(self, tick: float = 1.0, slots: int = 512):
+        self.tick = tick
+        self.slots = slots
+        self._buckets = [dict() for _ in range(slots)]
+        self._index = {}  # key -> bucket number
+        self._cursor = 0
+        self._ticked_at = time.monotonic()
+
+    def schedule(self, key, delay: float, value):
+        """
+        Fires `value` under `key` after `delay` seconds, replacing any timer already set for `key`.
+        """
+        self.cancel(key)
+        # Counted from the last tick and rounded up, so a timer never fires early.
+        ticks = max(1, math.ceil((time.monotonic() - self._ticked_at + delay) / self.tick))
+        bucket = (self._cursor + ticks) % self.slots
+        self._buckets[bucket][key] = ((ticks - 1) // self.slots, value, time.time() + delay)
+        self._index[key] = bucket
+
+    def cancel(self, key):
+        """
+        Removes the timer for `key`; returns its value, or None if none was pending.
+        """
+        bucket = self._index.pop(key, None)
+        if bucket is None:
+            return None
+        return self._buckets[bucket].pop(key)[1]
+
+    def advance(self, now=None):
+        """
+        Moves the wheel up to `now` (monotonic) and returns the (key, value) pairs that came due.
+        """
+        now = time.monotonic() if now is None else now
+        due = []
+        while now - self._ticked_at >= self.tick:
+            self._ticked_at += self.tick
+            self._cursor = (self._cursor + 1) % self.slots
+            bucket = self._buckets[self._cursor]
+            for key, (rounds, value, due_at) in list(bucket.items()):
+                if rounds:
+                    bucket[key] = (rounds - 1, value, due_at)
+                else:
+                    del bucket[key]
+                    del self._index[key]
+                    due.append((key, value))
+        return due
+
+    def snapshot(self):
+        """
+        Every pending timer as (key, value, wall-clock due time), e.g. to persist on shutdown.
+        """
+        return [
+            (key, value, due_at)
+            for bucket in self._buckets
+            for key, (_, value, due_at) in bucket.items()
+        ]
+
+    def __contains__(self, key):
+        return key in self._index
+
+    def __len__(self):
+        return len(self._index)
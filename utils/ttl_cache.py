@@ -0,0 +1,39 @@
+# utils/ttl_cache.py
+import time
+
+
+class TTLCache:
+    """
+    Small dict-backed cache whose entries expire ttl seconds after they are set.
+    When full, the entry closest to expiry is evicted.
+    """
+
+    def __init__(self, ttl: float, maxsize: int = 10000):
+        self.ttl = ttl
+        self.maxsize = maxsize
+        self._data = {}
+
+    def get(self, key, default=None):
+        item = self._data.get(key)
+        if item is None:
+            return default
+        value, expires_at = item
+        if time.monotonic() >= expires_at:
+            self._data.pop(key, None)
+            return default
+        return value
+
+    def set(self, key, value):
+        if key not in self._data and len(self._data) >= self.maxsize:
+            oldest = min(self._data, key=lambda k: self._data[k][1])
+            self._data.pop(oldest, None)
+        self._data[key] = (value, time.monotonic() + self.ttl)
+
+    def invalidate(self, key=None):
+        if key is None:
+            self._data.clear()
+        else:
+            self._data.pop(key, None)
+
+    def __len__(self):
+        return len(self._data)